@@ -1,4 +1,4 @@
-"""This module contains ArticlesCommandPanel implementation, a class containing three labels, four buttons and three entries.
+"""This module contains ArticlesCommandPanel implementation, a class containing three labels, five buttons and three entries.
 
 Dependencies:
     tkinter 
@@ -20,12 +20,13 @@ from check_values import *
 from video_detection import VideoDetection 
 
 class ArticlesCommandPanel (tk.Frame): 
-    """ArticlesCommandPanel is a frame containing three labels, four buttons and three entries.
+    """ArticlesCommandPanel is a frame containing three labels, five buttons and three entries.
 
     Each method related to the ArticlesManager data structure is associated with a button.
 
     Attributes:
         button_detection (tk.Button): button for detecting and decoding barcodes.
+        button_continuous (tk.Button): button for detecting barcodes in continuous mode, inserting the records without the popup.
         button_insert (tk.Button): button for adding records.
         button_modify (tk.Button): button for modifying a quantity of an article.
         button_delete (tk.Button): button for deleting a quantity of an article.
@@ -59,8 +60,10 @@ class ArticlesCommandPanel (tk.Frame):
         tk.Label(master=self, text='Qty', font=self._frame_font).grid(row=2, column=0, sticky='nswe')
         tk.Label(master=self, text='Qty da\nAggiornare', font=self._frame_font).grid(row=6, column=0, sticky='nswe')
 
-        self.button_detection = tk.Button(master=self, text='Avvia Lettura', relief=self.relief, borderwidth=self.borderwidth, font=self._frame_font, command=self.video_detection.video_detection)
-        self.button_detection.grid(row=0, column=0, sticky='nswe', columnspan=2, padx=self._padx, pady=self._pady)
+        self.button_detection = tk.Button(master=self, text='Avvia\nLettura', relief=self.relief, borderwidth=self.borderwidth, font=self._frame_font, command=self.video_detection.video_detection)
+        self.button_detection.grid(row=0, column=0, sticky='nswe', padx=self._padx, pady=self._pady)
+        self.button_continuous = tk.Button(master=self, text='Lettura\nContinua', relief=self.relief, borderwidth=self.borderwidth, font=self._frame_font, command=self.video_detection.continuous_detection)
+        self.button_continuous.grid(row=0, column=1, sticky='nswe', padx=self._padx, pady=self._pady)
         self.entry_art = tk.Entry(master=self, relief=self.relief, borderwidth=self.borderwidth, font=self._frame_font)
         self.entry_art.grid(row=1, column=1, sticky='nswe', padx=self._padx, pady=self._pady)
         self.entry_art.bind('<Button-1>', show_keyboard)
@@ -96,7 +99,7 @@ class ArticlesCommandPanel (tk.Frame):
             messagebox.showerror(title='Errore!', message='Quantita\' non valida.')
             return
         
-        self.master.files_manager.files[inserted_file].insert_record((article, qty))
+        self.master.files_manager.insert_record(inserted_file, (article, qty))
         messagebox.showinfo(title='Successo!', message='Record inserito con successo.')
 
     def remove_qty(self):
@@ -122,11 +125,11 @@ class ArticlesCommandPanel (tk.Frame):
             messagebox.showerror(title='Errore!', message='Articolo non presente nel file.') 
             return
 
-        if qty not in self.master.files_manager.files[inserted_file].dict_articoli[article]:
+        if not self.master.files_manager.files[inserted_file].has_record((article, qty)):
             messagebox.showerror(title='Errore!', message='Quantita\' non presente per l\'articolo ' + article) 
             return
         
-        self.master.files_manager.files[inserted_file].delete_qty((article, qty))
+        self.master.files_manager.delete_qty(inserted_file, (article, qty))
         messagebox.showinfo(title='Successo!', message='Quantita\' rimossa con successo per l\'articolo ' + article)
         
     def modify_qty(self):
@@ -157,11 +160,11 @@ class ArticlesCommandPanel (tk.Frame):
             messagebox.showerror(title='Errore!', message='Articolo non presente nel file.') 
             return
 
-        if old_qty not in self.master.files_manager.files[inserted_file].dict_articoli[article]:
+        if not self.master.files_manager.files[inserted_file].has_record((article, old_qty)):
             messagebox.showerror(title='Errore!', message='Quantita\' non presente per l\'articolo ' + article) 
             return
         
-        self.master.files_manager.files[inserted_file].modify_record((article, old_qty, new_qty))
+        self.master.files_manager.modify_record(inserted_file, (article, old_qty, new_qty))
         messagebox.showinfo(title='Successo!', message='Quantita\' modificata con successo per l\'articolo ' + article)
 
 
@@ -1,5 +1,8 @@
 """This module contains the ArticlesManager implementation, a class representing a data structure.
 
+Dependencies:
+    array: module for compact arrays of integers, used for storing the quantities.
+
 Example:
     from articles_manager import ArticlesManager
 
@@ -13,12 +16,140 @@ Example:
     obj.insert_records_list([('90515689','1000'),('90515689','500'),('90515689','300')])    
 """
 
+from array import array
+
+MAX_QTY = (1 << 64) - 1  # Greatest quantity that can be stored (8 bytes integers).
+_INDEX_THRESHOLD = 256  # Number of different quantities of an article after which the positions are indexed in a dictionary.
+
+def _compact_array(values: list) -> array:
+    """Return an array of the values (non-negative integers) with the smallest type able to contain them."""
+
+    top = max(values, default=0)
+    for typecode in 'BHIQ':
+        if top < 1 << (8 * array(typecode).itemsize):
+            return array(typecode, values)
+    raise OverflowError('Quantita\' troppo grande.')
+
+def _to_qty(qty) -> int:
+    """Return the quantity as integer (leading zeros are ignored, '0050' is 50), None if it is not a number
+    or if it is greater than MAX_QTY."""
+
+    try:
+        qty = int(qty)
+    except (TypeError, ValueError):
+        return None
+    return qty if qty <= MAX_QTY else None
+
+class _Quantities:
+    """Multiset of the quantities of an article.
+
+    The different quantities and the number of records of each one are stored in two arrays of integers (4 bytes for each value).
+    For articles with many different quantities, a dictionary quantity -> position is added, so each operation costs O(1).
+    The last quantity takes the place of a deleted one, so the order of the quantities is not kept.
+    The number of records and the sum of the quantities (pieces) are updated at every operation.
+    """
+
+    __slots__ = ('qtys', 'counts', 'index', 'records', 'pieces')
+
+    def __init__(self):
+        self.qtys = array('I')
+        self.counts = array('I')
+        self.index = None  # None until the article has more than _INDEX_THRESHOLD different quantities.
+        self.records = 0
+        self.pieces = 0
+
+    def _position(self, qty: int) -> int:
+        """Return the position of the quantity in the arrays, -1 if it is not present."""
+
+        if self.index is not None:
+            return self.index.get(qty, -1)
+        try:
+            return self.qtys.index(qty)
+        except ValueError:
+            return -1
+
+    def add(self, qty: int, count: int = 1):
+        """Add count records with the quantity."""
+
+        self.records += count
+        self.pieces += qty * count
+
+        pos = self._position(qty)
+        if pos >= 0:
+            self.counts[pos] += count
+            return
+
+        try:
+            self.qtys.append(qty)
+        except OverflowError:  # Quantities greater than 4294967295 need 8 bytes.
+            self.qtys = array('Q', self.qtys)
+            self.qtys.append(qty)
+        self.counts.append(count)
+
+        if self.index is not None:
+            self.index[qty] = len(self.qtys) - 1
+        elif len(self.qtys) > _INDEX_THRESHOLD:
+            self.index = {q: i for i, q in enumerate(self.qtys)}
+
+    def remove(self, qty: int) -> bool:
+        """Remove a record with the quantity, return False if the quantity is not present."""
+
+        pos = self._position(qty)
+        if pos < 0:
+            return False
+
+        self.records -= 1
+        self.pieces -= qty
+
+        if self.counts[pos] > 1:
+            self.counts[pos] -= 1
+            return True
+
+        last = len(self.qtys) - 1
+        if pos != last:  # The last quantity takes the place of the deleted one.
+            self.qtys[pos] = self.qtys[last]
+            self.counts[pos] = self.counts[last]
+            if self.index is not None:
+                self.index[self.qtys[pos]] = pos
+        self.qtys.pop()
+        self.counts.pop()
+        if self.index is not None:
+            del self.index[qty]
+        return True
+
+    def __contains__(self, qty: int) -> bool:
+        return self._position(qty) >= 0
+
+    def __len__(self) -> int:
+        return len(self.qtys)
+
+    def __iter__(self):
+        return iter(self.qtys)
+
+    def items(self):
+        """Return an iterator of tuples (quantity, number of records)."""
+
+        return zip(self.qtys, self.counts)
+
 class ArticlesManager:
     """ArticlesManager is the data structure representing the content of an inventory file.
 
     The data structure is a dictionary organized as follows:
     - key (str): article.
-    - value (list): list of quantities as string.
+    - value (_Quantities): multiset of the quantities of the article, that is two arrays of integers
+      with the different quantities and the number of records of each quantity.
+
+    Inserting, deleting and modifying a quantity cost O(1), even for articles with thousands of records,
+    and each different quantity takes 8 bytes.
+    The methods receive the quantities as string (as inserted by the user) and store them as integers,
+    so the leading zeros are not kept: '0050' and '50' are the same quantity and are exported as 50.
+
+    The number of records and the sum of the quantities (pieces), of each article and of the whole file,
+    are updated at every operation, so they are returned in O(1) by get_article_totals() and get_totals().
+
+    With pickle, ArticlesManager is saved in columns: the list of articles and three arrays of integers
+    (number of different quantities of each article, quantities, number of records of each quantity),
+    each one with the smallest type able to contain its values.
 
     Attributes:
         dict_articoli (dict): dictionary containing tuples (article, quantity).
@@ -28,6 +159,46 @@ class ArticlesManager:
         """Initialize ArticlesManager."""
 
         self.dict_articoli = {}
+        self._records = 0
+        self._pieces = 0
+
+    def __getstate__(self) -> dict:
+        """Return the state of ArticlesManager saved by pickle, in columns of compact arrays of integers."""
+
+        multisets = self.dict_articoli.values()
+        sizes = _compact_array([len(quantities) for quantities in multisets])
+        qtys = _compact_array([qty for quantities in multisets for qty in quantities.qtys])
+        counts = _compact_array([count for quantities in multisets for count in quantities.counts])
+
+        return {'articles': list(self.dict_articoli), 'sizes': sizes, 'qtys': qtys, 'counts': counts}
+
+    def __setstate__(self, state: dict):
+        """Restore ArticlesManager from pickle.
+
+        The data saved by the previous versions (lists or dictionaries of quantities as string) are converted too.
+        """
+
+        self.dict_articoli = {}
+
+        if 'articles' in state:
+            qtys = iter(state['qtys'])
+            counts = iter(state['counts'])
+            for art, size in zip(state['articles'], state['sizes']):
+                quantities = self.dict_articoli[art] = _Quantities()
+                for _ in range(size):
+                    quantities.add(next(qtys), next(counts))
+
+        else:
+            for art, qtys in state['dict_articoli'].items():
+                if isinstance(qtys, dict):  # Dictionary quantity -> number of records.
+                    qtys = [qty for qty, count in qtys.items() for _ in range(count)]
+                quantities = self.dict_articoli[art] = _Quantities()
+                for qty in qtys:
+                    quantities.add(int(qty))
+
+        # The totals are not saved, they are computed again from the totals of the articles.
+        self._records = sum(quantities.records for quantities in self.dict_articoli.values())
+        self._pieces = sum(quantities.pieces for quantities in self.dict_articoli.values())
 
     def insert_record(self, record: tuple) -> bool:
         """Given a tuple, insert the record into ArticlesManager.
@@ -40,6 +211,9 @@ class ArticlesManager:
         Return:
             bool: True if succesful.
 
+        Raise:
+            ValueError: if the quantity is not a number or it is greater than MAX_QTY (nothing is inserted).
+
         Example:
             >>> obj = ArticlesManager()
             >>> obj.insert_record(record = ('90515689','1000'))
@@ -47,24 +221,32 @@ class ArticlesManager:
         """
 
         art, qty = record
+        int_qty = _to_qty(qty)
+        if int_qty is None:
+            raise ValueError('Quantita\' non valida: ' + str(qty) + '.')
+        self._insert(art, int_qty)
+        return True
 
-        if art not in self.dict_articoli:
-            self.dict_articoli[art] = [qty]
-        else:
-            self.dict_articoli[art].append(qty)
+    def _insert(self, art: str, qty: int):
+        """Insert a record whose quantity is already an integer not greater than MAX_QTY."""
 
-        return True
+        if art not in self.dict_articoli:
+            self.dict_articoli[art] = _Quantities()
+        self.dict_articoli[art].add(qty)
+        self._records += 1
+        self._pieces += qty
 
     def delete_qty(self, record: tuple) -> bool:
         """Given a tuple, delete the quantity of record from ArticlesManager.
 
-        If there are not quantities for an article, the method does not delete the article, but it has an empty list.
+        If there are not quantities for an article, the method does not delete the article, but it has an empty multiset.
 
         Arg:
             record (tuple): tuple (article, quantity) with quantity to delete.
 
         Return:
-            bool: False if the article is not in ArticlesManager or if the quantity is not present in the article, otherwise True.
+            bool: False if the article is not in ArticlesManager, if the quantity is not present in the article
+            or if it is not a number, otherwise True.
 
         Example:
             >>> obj = ArticlesManager()
@@ -74,15 +256,16 @@ class ArticlesManager:
         """
 
         art, qty = record
+        qty = _to_qty(qty)
 
-        if art not in self.dict_articoli:
+        if art not in self.dict_articoli or qty is None:
             return False
         else:
-            if qty not in self.dict_articoli[art]:
+            if not self.dict_articoli[art].remove(qty):
                 return False
             else:
-                pos = self.dict_articoli[art].index(qty)
-                del self.dict_articoli[art][pos]
+                self._records -= 1
+                self._pieces -= qty
                 return True
 
     def modify_record(self, record: tuple) -> bool:
@@ -92,7 +275,8 @@ class ArticlesManager:
             record (tuple): tuple (article, old_quantity, new_quantity).
 
         Return:
-            bool: False if the article is not in ArticlesManager or if the old_quantity is not present in the article, otherwise True.
+            bool: False if the article is not in ArticlesManager, if the old_quantity is not present in the article
+            or if a quantity is not a number, otherwise True.
 
         Example:
             >>> obj = ArticlesManager()
@@ -102,15 +286,16 @@ class ArticlesManager:
         """
 
         art, old_qty, new_qty = record
+        old_qty, new_qty = _to_qty(old_qty), _to_qty(new_qty)
 
-        if art not in self.dict_articoli:
+        if art not in self.dict_articoli or old_qty is None or new_qty is None:
             return False
         else:
-            if old_qty not in self.dict_articoli[art]:
+            if not self.dict_articoli[art].remove(old_qty):
                 return False
             else:
-                pos = self.dict_articoli[art].index(old_qty)
-                self.dict_articoli[art][pos] = new_qty
+                self.dict_articoli[art].add(new_qty)
+                self._pieces += new_qty - old_qty
                 return True
 
     def insert_records_list(self, lista_val: list) -> bool:
@@ -122,6 +307,10 @@ class ArticlesManager:
         Return:
             bool: False if the list is empty, otherwise True.
 
+        Raise:
+            ValueError: if a quantity is not a number or it is greater than MAX_QTY.
+            All the quantities are checked before inserting, so no record of the list is inserted.
+
         Example:
             >>> obj = ArticlesManager()
             >>> obj.insert_records_list([('90515689','1000'),('90515689','500'),('90515689','300')])
@@ -131,8 +320,128 @@ class ArticlesManager:
         if not lista_val:  # Empty list.
             return False
 
-        for record in lista_val:
-            self.insert_record(record)
+        qtys = [_to_qty(qty) for _, qty in lista_val]
+        if None in qtys:
+            raise ValueError('Quantita\' non valida: ' + str(lista_val[qtys.index(None)][1]) + '.')
+
+        for (art, _), qty in zip(lista_val, qtys):
+            self._insert(art, qty)
         return True
 
+    def has_record(self, record: tuple) -> bool:
+        """Given a tuple, check if the record is in ArticlesManager.
+
+        Arg:
+            record (tuple): tuple (article, quantity).
+
+        Return:
+            bool: True if the article has at least a record with the quantity, otherwise False.
+
+        Example:
+            >>> obj = ArticlesManager()
+            >>> obj.insert_record(record = ('90515689','1000'))
+            >>> obj.has_record(('90515689', '1000'))
+            True
+        """
+
+        art, qty = record
+        qty = _to_qty(qty)
+
+        return art in self.dict_articoli and qty is not None and qty in self.dict_articoli[art]
+
+    def get_article_totals(self, art: str) -> tuple:
+        """Return the number of records and the number of pieces (sum of the quantities) of an article.
+
+        Arg:
+            art (str): article.
+
+        Return:
+            tuple (records, pieces): (0, 0) if the article is not in ArticlesManager.
+
+        Example:
+            >>> obj = ArticlesManager()
+            >>> obj.insert_records_list([('90515689','1000'),('90515689','500')])
+            >>> obj.get_article_totals('90515689')
+            (2, 1500)
+        """
+
+        if art not in self.dict_articoli:
+            return (0, 0)
+
+        quantities = self.dict_articoli[art]
+        return (quantities.records, quantities.pieces)
+
+    def get_totals(self) -> tuple:
+        """Return the number of records and the number of pieces (sum of the quantities) of the whole file.
+
+        Return:
+            tuple (records, pieces).
+
+        Example:
+            >>> obj = ArticlesManager()
+            >>> obj.insert_records_list([('90515689','1000'),('12567345','500')])
+            >>> obj.get_totals()
+            (2, 1500)
+        """
+
+        return (self._records, self._pieces)
+
+    def get_quantities(self, art: str) -> list:
+        """Return the quantities of an article, one for each record.
+
+        Arg:
+            art (str): article.
+
+        Return:
+            (list): empty list if the article is not in ArticlesManager, otherwise the list of quantities as integers.
+
+        Example:
+            >>> obj = ArticlesManager()
+            >>> obj.insert_records_list([('90515689','1000'),('90515689','500'),('90515689','1000')])
+            >>> obj.get_quantities('90515689')
+            [1000, 1000, 500]
+        """
+
+        if art not in self.dict_articoli:
+            return []
+
+        return [qty for qty, count in self.dict_articoli[art].items() for _ in range(count)]
+
+    def iter_records(self):
+        """Return an iterator of all the records (article, quantity) in ArticlesManager.
+
+        Return:
+            iterator of tuples (article, quantity), with quantity as integer.
+
+        Example:
+            >>> obj = ArticlesManager()
+            >>> obj.insert_records_list([('90515689','1000'),('90515689','500')])
+            >>> list(obj.iter_records())
+            [('90515689', 1000), ('90515689', 500)]
+        """
+
+        for art, counts in self.dict_articoli.items():
+            for qty, count in counts.items():
+                for _ in range(count):
+                    yield (art, qty)
+
+    def iter_sorted_records(self):
+        """Return an iterator of all the records (article, quantity), with the articles in alphabetical order
+        and the quantities of each article in ascending order.
+
+        Only the list of the articles and the quantities of one article at a time are sorted, the records are not copied.
+
+        Return:
+            iterator of tuples (article, quantity), with quantity as integer.
+
+        Example:
+            >>> obj = ArticlesManager()
+            >>> obj.insert_records_list([('90515689','1000'),('12567345','300'),('90515689','500')])
+            >>> list(obj.iter_sorted_records())
+            [('12567345', 300), ('90515689', 500), ('90515689', 1000)]
+        """
 
+        for art in sorted(self.dict_articoli):
+            for qty, count in sorted(self.dict_articoli[art].items()):
+                for _ in range(count):
+                    yield (art, qty)
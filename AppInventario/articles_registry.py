@@ -0,0 +1,401 @@
+"""This module contains the ArticlesRegistry implementation, a class representing the MP registry loaded in memory.
+
+The registry is kept in a binary companion store next to the Excel file (same name, extension '.dat'):
+a small header followed by the articles sorted in alphabetical order, each one padded with zero bytes to the same width.
+The store is rebuilt from the Excel file only when the Excel file changes (different size or modification time),
+otherwise loading the registry is a single read of the store.
+
+In memory the registry is the content of the store, so it costs a few bytes per article,
+and the match of an article is exact (binary search of the code, not a search of a part of it).
+
+The articles added by the user are kept in a small sorted list and appended to a delta file (extension '.delta'),
+so adding an article does not depend on the size of the registry.
+The delta is written into the Excel file and into the store in batches (flush), when it grows
+or when the application is closed.
+
+Dependencies:
+    openpyxl: library with writing and reading functionalities of Excel files.
+    bisect: module for binary search on sorted sequences.
+    heapq: module used for merging the sorted store with the sorted delta.
+    numpy: library for the membership of many articles at once (see contains_batch()).
+    struct: module for packing the header of the store.
+    os
+    metrics: the module containing the counters and the latency histograms of the App.
+
+Example:
+    from articles_registry import ArticlesRegistry
+
+    obj = ArticlesRegistry()
+    print('90351051' in obj)
+
+    obj.add('Z9035105')
+    obj.flush()
+"""
+
+import os
+import struct
+import heapq
+from bisect import bisect_left, insort
+import numpy as np
+import openpyxl
+import metrics
+
+REGISTRY_PATH = 'C:\\Users\\lara_\\OneDrive\\Desktop\\AppInventario\\AppInventario\\anagrafica_articoli.xlsx'
+
+_STORE_MAGIC = b'ANAG'
+_STORE_VERSION = 1
+_STORE_HEADER = struct.Struct('<4sHHIqq')  # magic, version, width, number of articles, Excel mtime (ns), Excel size.
+_MIN_WIDTH = 8
+FLUSH_BATCH = 500  # Number of added articles after which the delta is written into the Excel file.
+
+class _FixedWidthCodes:
+    """Read-only sequence of the articles contained in a buffer of fixed-width codes, used by bisect."""
+
+    def __init__(self, buffer: bytes, width: int):
+        self._buffer = buffer
+        self._width = width
+
+    def __len__(self) -> int:
+        return len(self._buffer) // self._width
+
+    def __getitem__(self, index: int) -> bytes:
+        start = index * self._width
+        return self._buffer[start:start + self._width]
+
+class ArticlesRegistry:
+    """ArticlesRegistry is the data structure representing the MP registry.
+
+    The data structure is a buffer of bytes containing the articles of the 'ARTICOLO' column of the Excel file,
+    sorted in alphabetical order and padded with zero bytes to the same width,
+    plus a sorted list of the articles added and not yet written into the Excel file.
+
+    Attributes:
+        excel_path (str): path of the Excel file containing the MP registry.
+        store_path (str): path of the binary store of the MP registry.
+        delta_path (str): path of the file containing the articles not yet written into the Excel file.
+    """
+
+    def __init__(self, excel_path: str = REGISTRY_PATH):
+        """Initialize ArticlesRegistry with excel_path.
+
+        The registry is not read here, but the first time it is used.
+
+        Arg:
+            excel_path (str): path of the Excel file containing the MP registry.
+        """
+
+        self.excel_path = excel_path
+        self.store_path = os.path.splitext(excel_path)[0] + '.dat'
+        self.delta_path = os.path.splitext(excel_path)[0] + '.delta'
+        self._codes = None  # None until the registry is loaded.
+        self._width = _MIN_WIDTH
+        self._added = []  # Sorted list of the added articles (as bytes) not yet written into the Excel file.
+
+    @metrics.timed('registry.load')
+    def load(self) -> int:
+        """Load the registry from the binary store, rebuilding the store if the Excel file has changed.
+
+        The articles of the delta file (added before a crash or before closing without a flush) are loaded too.
+
+        Return:
+            int: number of articles in the registry.
+
+        Example:
+            >>> obj = ArticlesRegistry()
+            >>> obj.load()
+            13357
+        """
+
+        if not self._read_store():
+            self.rebuild()
+        self._read_delta()
+        return len(self)
+
+    @metrics.timed('registry.rebuild')
+    def rebuild(self) -> int:
+        """Read the Excel file and rewrite the binary store.
+
+        Return:
+            int: number of articles in the registry.
+        """
+
+        workbook = openpyxl.load_workbook(self.excel_path, read_only=True)  # Read only mode streams the rows.
+        worksheet = workbook.active
+        rows = worksheet.iter_rows(values_only=True)
+
+        header = next(rows, ())
+        column = header.index('ARTICOLO') if 'ARTICOLO' in header else 0
+
+        articles = set()
+        for row in rows:
+            if column < len(row) and row[column] is not None:
+                articles.add(str(row[column]).encode('utf-8'))
+        workbook.close()
+
+        self._set_codes(sorted(articles))
+        self._write_store()
+        return len(self._codes)
+
+    def _set_codes(self, sorted_articles: list):
+        """Build the buffer of fixed-width codes from a sorted list of articles as bytes."""
+
+        self._width = max([_MIN_WIDTH] + [len(art) for art in sorted_articles])
+        buffer = b''.join(art.ljust(self._width, b'\0') for art in sorted_articles)
+        self._codes = _FixedWidthCodes(buffer, self._width)
+
+    def _excel_signature(self) -> tuple:
+        """Return (modification time in ns, size) of the Excel file, (0, 0) if it does not exist."""
+
+        try:
+            stat = os.stat(self.excel_path)
+        except OSError:
+            return (0, 0)
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _read_store(self) -> bool:
+        """Load the registry from the binary store.
+
+        Return:
+            bool: False if the store does not exist, is not valid or is older than the Excel file, otherwise True.
+        """
+
+        try:
+            with open(self.store_path, 'rb') as store:
+                data = store.read()
+        except OSError:
+            return False
+
+        if len(data) < _STORE_HEADER.size:
+            return False
+
+        magic, version, width, count, mtime_ns, size = _STORE_HEADER.unpack_from(data)
+        if magic != _STORE_MAGIC or version != _STORE_VERSION or len(data) != _STORE_HEADER.size + width * count:
+            return False
+
+        signature = self._excel_signature()
+        if signature != (0, 0) and signature != (mtime_ns, size):  # The Excel file has been changed after the store was written.
+            return False
+
+        self._width = width
+        self._codes = _FixedWidthCodes(data[_STORE_HEADER.size:], width)
+        return True
+
+    def _write_store(self):
+        """Write the binary store, marked with the signature of the current Excel file."""
+
+        mtime_ns, size = self._excel_signature()
+        header = _STORE_HEADER.pack(_STORE_MAGIC, _STORE_VERSION, self._width, len(self._codes), mtime_ns, size)
+
+        temp_path = self.store_path + '.tmp'
+        with open(temp_path, 'wb') as store:
+            store.write(header)
+            store.write(self._codes._buffer)
+        os.replace(temp_path, self.store_path)  # The old store is replaced only when the new one is complete.
+
+    def _read_delta(self):
+        """Load the articles of the delta file that are not already in the store."""
+
+        self._added = []
+        try:
+            with open(self.delta_path, 'rb') as delta:
+                lines = delta.read().split(b'\n')
+        except OSError:
+            return
+
+        for line in lines:
+            art = line.strip()
+            if art and not self._in_store(art) and not self._in_added(art):
+                insort(self._added, art)
+
+    def _get_codes(self) -> _FixedWidthCodes:
+        """Return the codes of the registry, loading them if they have not been loaded yet."""
+
+        if self._codes is None:
+            self.load()
+        return self._codes
+
+    def _in_store(self, art: bytes) -> bool:
+        """Return True if the article (as bytes) is in the store."""
+
+        if len(art) > self._width:
+            return False
+
+        key = art.ljust(self._width, b'\0')
+        pos = bisect_left(self._codes, key)
+        return pos < len(self._codes) and self._codes[pos] == key
+
+    def _in_added(self, art: bytes) -> bool:
+        """Return True if the article (as bytes) is in the added articles."""
+
+        pos = bisect_left(self._added, art)
+        return pos < len(self._added) and self._added[pos] == art
+
+    def __contains__(self, art: str) -> bool:
+        """Return True if the article is in the registry (exact match)."""
+
+        self._get_codes()
+        key = art.encode('utf-8')
+        return self._in_store(key) or self._in_added(key)
+
+    def contains_batch(self, arts) -> np.ndarray:
+        """Check many articles at once: the articles are searched in the store with a single vectorized binary search.
+
+        Arg:
+            arts (list, np.ndarray or pd.Series): articles as string.
+
+        Return:
+            (np.ndarray): array of bool, True where the article is in the registry (exact match).
+
+        Example:
+            >>> obj = ArticlesRegistry()
+            >>> obj.contains_batch(['90351051', 'H0351051'])
+            array([ True, False])
+        """
+
+        codes = self._get_codes()
+        strings = np.array(arts, dtype=str).reshape(-1)
+        try:
+            keys = strings.astype(bytes)  # Fast conversion, valid only for ASCII articles.
+        except UnicodeEncodeError:
+            keys = np.char.encode(strings, 'utf-8')
+        if keys.size == 0:
+            return np.zeros(0, dtype=bool)
+
+        fits = np.char.str_len(keys) <= self._width  # Longer articles cannot be in the store (and would be cut by astype).
+        padded_keys = keys.astype('S' + str(self._width))
+        stored = np.frombuffer(codes._buffer, dtype='S' + str(self._width))  # No copy: the array is a view of the store.
+
+        pos = np.searchsorted(stored, padded_keys)
+        found = np.zeros(keys.size, dtype=bool)
+        valid_pos = pos < stored.size
+        found[valid_pos] = stored[pos[valid_pos]] == padded_keys[valid_pos]
+        found &= fits
+
+        if self._added:
+            found |= np.isin(keys, np.array(self._added))
+        return found
+
+    def __len__(self) -> int:
+        """Return the number of articles in the registry."""
+
+        return len(self._get_codes()) + len(self._added)
+
+    def add(self, art: str) -> bool:
+        """Add an article to the registry.
+
+        The article is inserted in the sorted list of the added articles and appended to the delta file,
+        the Excel file and the store are rewritten only every FLUSH_BATCH articles (see flush()).
+
+        Arg:
+            art (str): article to add.
+
+        Return:
+            bool: False if the article is already in the registry, otherwise True.
+
+        Example:
+            >>> obj = ArticlesRegistry()
+            >>> obj.add('Z9035105')
+            True
+        """
+
+        if art in self:
+            return False
+
+        key = art.encode('utf-8')
+        with open(self.delta_path, 'ab') as delta:
+            delta.write(key + b'\n')
+            delta.flush()
+            os.fsync(delta.fileno())  # The article is on disk before the user is told it has been added.
+        insort(self._added, key)
+
+        if len(self._added) >= FLUSH_BATCH:
+            self.flush()
+        return True
+
+    def add_many(self, articles: list) -> int:
+        """Add a list of articles to the registry with a single write of the delta file.
+
+        The articles already in the registry and the duplicates in the list are skipped.
+        If the added articles reach FLUSH_BATCH, they are written into the Excel file with a single flush.
+
+        Arg:
+            articles (list): list of articles as string.
+
+        Return:
+            int: number of articles added.
+
+        Example:
+            >>> obj = ArticlesRegistry()
+            >>> obj.add_many(['Z9035105', 'Z9035106', 'Z9035105'])
+            2
+        """
+
+        self._get_codes()
+        keys = sorted({art.encode('utf-8') for art in articles})
+        keys = [key for key in keys if not self._in_store(key) and not self._in_added(key)]
+        if not keys:
+            return 0
+
+        with open(self.delta_path, 'ab') as delta:
+            delta.write(b''.join(key + b'\n' for key in keys))
+            delta.flush()
+            os.fsync(delta.fileno())
+        self._added = list(heapq.merge(self._added, keys))
+
+        if len(self._added) >= FLUSH_BATCH:
+            self.flush()
+        return len(keys)
+
+    def _iter_articles(self):
+        """Return an iterator of all the articles (as bytes) in alphabetical order, merging the store and the delta."""
+
+        codes = self._get_codes()
+        stored = (codes[i].rstrip(b'\0') for i in range(len(codes)))  # Stripped codes keep the same order as the padded ones.
+        return heapq.merge(stored, self._added)
+
+    @metrics.timed('registry.flush')
+    def flush(self) -> bool:
+        """Write the added articles into the Excel file and into the store, then empty the delta file.
+
+        The Excel file is written in write only mode, streaming the articles in alphabetical order.
+
+        Return:
+            bool: False if there are no added articles to write, otherwise True.
+
+        Example:
+            >>> obj = ArticlesRegistry()
+            >>> obj.add('Z9035105')
+            >>> obj.flush()
+            True
+        """
+
+        if self._codes is None or not self._added:
+            return False
+
+        articles = list(self._iter_articles())
+
+        file_workbook = openpyxl.Workbook(write_only=True)  # A write only Workbook streams the rows to the Excel file.
+        file_worksheet = file_workbook.create_sheet()
+        file_worksheet.append(['ARTICOLO'])
+        for art in articles:
+            file_worksheet.append([art.decode('utf-8')])
+
+        root, extension = os.path.splitext(self.excel_path)
+        temp_path = root + '.tmp' + extension
+        file_workbook.save(temp_path)
+        os.replace(temp_path, self.excel_path)  # The old Excel file is replaced only when the new one is complete.
+
+        self._set_codes(articles)
+        self._write_store()  # The store is marked with the signature of the new Excel file.
+        self._added = []
+        os.remove(self.delta_path)
+        return True
+
+    def get_articles(self) -> list:
+        """Return the articles of the registry in alphabetical order.
+
+        Return:
+            (list): sorted list of articles as string.
+        """
+
+        return [art.decode('utf-8') for art in self._iter_articles()]
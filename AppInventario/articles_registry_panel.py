@@ -1,10 +1,10 @@
-"""This module contains the ArticlesRegistryPanel implementation, a class containing an entry and a button. 
+"""This module contains the ArticlesRegistryPanel implementation, a class containing an entry and two buttons. 
 
 Dependencies:
     tkinter 
     check_values: the module containing the implementation of functions that check the values of article, new article and quantity inserted by user.
-    pandas: library for manipulating data in Excel files. 
-    openpyxl: library with writing and reading functionalities of Excel files.
+    registry_import: the module containing the function that imports new articles from a spreadsheet.
+    spreadsheet_reader: the module containing the path of the report of the rejected rows and the message of the imports.
 
 Example:
     from articles_registry_panel import ArticlesRegistryPanel
@@ -17,15 +17,17 @@ Example:
 
 import tkinter as tk 
 from tkinter import messagebox
+from tkinter import filedialog
 from check_values import *
-import pandas as pd
-import openpyxl 
+from registry_import import import_articles
+from spreadsheet_reader import rejects_report_path, import_message
 
 class ArticlesRegistryPanel (tk.Frame): 
-    """ArticlesRegistryPanel is a frame containing an entry and a button.
+    """ArticlesRegistryPanel is a frame containing an entry and two buttons.
 
     Attributes: 
         button_add (tk.Button): button for adding a new article to the MP registry.
+        button_import (tk.Button): button for importing new articles from a spreadsheet to the MP registry.
     """
 
     def __init__(self, master_window: tk.Tk):
@@ -45,8 +47,8 @@ class ArticlesRegistryPanel (tk.Frame):
         self._padx = 35
         self._pady = 30 
         
-        self.rowconfigure(index=0, weight=1)
-        self.rowconfigure(index=1, weight=1)
+        for i in range(3):
+            self.rowconfigure(index=i, weight=1)
         self.columnconfigure(index=0, weight=1)
 
         self.entry_new_art = tk.Entry(master=self, relief=self.relief, borderwidth=self.borderwidth, font=self._frame_font)
@@ -54,37 +56,37 @@ class ArticlesRegistryPanel (tk.Frame):
         self.entry_new_art.bind('<Button-1>', show_keyboard)
         self.button_add = tk.Button(master=self, text='Aggiungi Articolo\nin Anagrafica', relief=self.relief, borderwidth=self.borderwidth, font=self._frame_font, command=self.add_article) 
         self.button_add.grid(row=1, column=0, sticky='nswe', padx=self._padx, pady=self._pady)
+        self.button_import = tk.Button(master=self, text='Importa Articoli\nda File', relief=self.relief, borderwidth=self.borderwidth, font=self._frame_font, command=self.import_articles) 
+        self.button_import.grid(row=2, column=0, sticky='nswe', padx=self._padx, pady=self._pady)
 
     def add_article(self):
-        """Add the article specified by the user in the entry to the MP registry (Excel file)."""       
+        """Add the article specified by the user in the entry to the MP registry."""       
         
         article_to_add = self.entry_new_art.get()
         ret = check_new_art(article_to_add)
 
         if ret == True:
-
-            # Read Excel file and get the 'ARTICOLO' column as a list of str.
-            articles_mp_list = pd.read_excel('C:\\Users\\lara_\\OneDrive\\Desktop\\AppInventario\\AppInventario\\anagrafica_articoli.xlsx')['ARTICOLO'].tolist() 
-            articles_mp_list.append(article_to_add)
-            articles_mp_list.sort()
-
-            file_workbook = openpyxl.Workbook() # A Workbook is created to allow writing to an Excel file.
-            file_worksheet = file_workbook.active # Select the active worksheet.
-
-            header = ['ARTICOLO']
-            file_worksheet.append(header)
-            for art in articles_mp_list:    
-                file_worksheet.append([art])
-            file_workbook.save('C:\\Users\\lara_\\OneDrive\\Desktop\\AppInventario\\AppInventario\\anagrafica_articoli.xlsx') 
-            
+            registry.add(article_to_add)  # The Excel file is updated in batches by the registry (see ArticlesRegistry.flush()).
             messagebox.showinfo(title='Successo!', message='Articolo aggiunto correttamente.')
         
         else:
             messagebox.showerror(title='Errore!', message='Articolo gia\' presente o invalido.')
 
+    def import_articles(self):
+        """Import the new articles of a spreadsheet (Excel or CSV file) chosen by the user to the MP registry.
 
+        The rejected rows are saved in a CSV report next to the spreadsheet (see spreadsheet_reader.rejects_report_path()).
+        """
 
+        file_path = filedialog.askopenfilename(title='Importa Articoli', filetypes=[('Excel o CSV', '*.xlsx *.xlsm *.csv'), ('Tutti i file', '*.*')])
+        if not file_path:
+            return
 
+        rejects_path = rejects_report_path(file_path)
+        added, rejected = import_articles(file_path, registry, rejects_path)
 
-
-
+        message = import_message('Articoli aggiunti', added, rejected, rejects_path)
+        if rejected:
+            messagebox.showwarning(title='Attenzione!', message=message)
+        else:
+            messagebox.showinfo(title='Successo!', message=message)
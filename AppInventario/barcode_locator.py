@@ -0,0 +1,230 @@
+"""This module contains the BarcodeDetector implementation, a class that decodes the barcodes of a frame in more stages,
+so the slow decoding of pyzbar works only on the small parts of the frame containing barcodes.
+
+Stages:
+- localization: the frame is downscaled (LOCATE_WIDTH pixels wide) and converted to grayscale, the regions with strong
+  gradients (bars and modules of the codes) are joined by a morphological closing and their bounding boxes are the candidate regions.
+- decoding: only the candidate regions are cut from the full resolution frame, converted to grayscale and decoded by pyzbar.
+- adaptive skip: when no candidate region is found for some frames (nothing in front of the camera),
+  the following frames are skipped, up to MAX_SKIP frames every decoded one.
+- fallback: every FULL_FRAME_EVERY decoded frames, the whole frame is decoded, so the codes missed by the localization are read anyway.
+
+Dependencies:
+    cv2 (OpenCV): open source computer vision and machine learning software library.
+    numpy
+    pyzbar: library that reads one-dimensional barcodes using the zbar library.
+    time
+
+Example:
+    from barcode_locator import BarcodeDetector
+
+    detector = BarcodeDetector()
+    decoded_info = detector.detect(frame)  # None if the frame is skipped.
+"""
+
+import time
+import cv2
+import numpy as np
+from pyzbar import pyzbar
+
+LOCATE_WIDTH = 320  # Width of the downscaled frame used for the localization.
+MAX_REGIONS = 6  # Maximum number of candidate regions decoded in a frame.
+MIN_GRADIENT = 40  # Minimum gradient of the pixels of a candidate region (0-255), so the noise of empty frames is ignored.
+MIN_AREA = 0.002  # Minimum area of a candidate region, as a fraction of the frame.
+PADDING = 0.15  # Margin added around a candidate region, as a fraction of its size.
+MAX_SKIP = 3  # Maximum number of frames skipped when nothing is in front of the camera.
+FULL_FRAME_EVERY = 10  # Number of decoded frames after which the whole frame is decoded.
+
+def locate_regions(frame, locate_width: int = LOCATE_WIDTH) -> list:
+    """Find the regions of a frame that can contain barcodes, working on a downscaled copy.
+
+    Args:
+        frame (np.ndarray): frame of the camera (BGR or grayscale).
+        locate_width (int): width of the downscaled frame.
+
+    Return:
+        (list): bounding boxes (x, y, w, h) of the regions in the coordinates of the full frame, the largest first.
+
+    Example:
+        >>> locate_regions(frame)
+        [(412, 220, 180, 96), (80, 300, 150, 150)]
+    """
+
+    height, width = frame.shape[:2]
+    scale = min(1.0, locate_width / width)
+    small = cv2.resize(frame, (int(width * scale), int(height * scale)), interpolation=cv2.INTER_AREA) if scale < 1 else frame
+    if small.ndim == 3:
+        small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+
+    # Bars and modules have strong gradients in at least one direction.
+    grad_x = cv2.Sobel(small, cv2.CV_16S, 1, 0, ksize=3)
+    grad_y = cv2.Sobel(small, cv2.CV_16S, 0, 1, ksize=3)
+    gradient = cv2.addWeighted(cv2.convertScaleAbs(grad_x), 0.5, cv2.convertScaleAbs(grad_y), 0.5, 0)
+    gradient = cv2.blur(gradient, (5, 5))
+    otsu_threshold, mask = cv2.threshold(gradient, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    if otsu_threshold < MIN_GRADIENT:
+        _, mask = cv2.threshold(gradient, MIN_GRADIENT, 255, cv2.THRESH_BINARY)
+
+    # The bars of a code are joined in a single region, the small details (text, noise) are removed.
+    mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, cv2.getStructuringElement(cv2.MORPH_RECT, (9, 9)))
+    mask = cv2.erode(mask, None, iterations=2)
+    mask = cv2.dilate(mask, None, iterations=3)
+
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    min_area = MIN_AREA * small.shape[0] * small.shape[1]
+
+    regions = []
+    for contour in sorted(contours, key=cv2.contourArea, reverse=True)[:MAX_REGIONS]:
+        if cv2.contourArea(contour) < min_area:
+            break
+        x, y, w, h = cv2.boundingRect(contour)
+        pad_x, pad_y = int(w * PADDING) + 2, int(h * PADDING) + 2
+        x0, y0 = max(0, int((x - pad_x) / scale)), max(0, int((y - pad_y) / scale))
+        x1, y1 = min(width, int((x + w + pad_x) / scale)), min(height, int((y + h + pad_y) / scale))
+        regions.append((x0, y0, x1 - x0, y1 - y0))
+
+    return regions
+
+def _to_gray(image):
+    """Convert an image to grayscale if needed."""
+
+    return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+
+def decode_regions(frame, regions: list) -> list:
+    """Decode the barcodes of the regions of a frame at full resolution.
+
+    Args:
+        frame (np.ndarray): frame of the camera (BGR or grayscale).
+        regions (list): bounding boxes (x, y, w, h) of the regions.
+
+    Return:
+        (list): barcodes decoded by pyzbar, with the bounding boxes in the coordinates of the full frame
+        (a code found in more regions is returned once).
+    """
+
+    decoded_info = []
+    decoded_data = set()
+    for x, y, w, h in regions:
+        crop = np.ascontiguousarray(_to_gray(frame[y:y + h, x:x + w]))
+        for code in pyzbar.decode(crop):
+            if code.data in decoded_data:
+                continue
+            decoded_data.add(code.data)
+            rect = code.rect._replace(left=code.rect.left + x, top=code.rect.top + y)
+            decoded_info.append(code._replace(rect=rect))
+    return decoded_info
+
+def decode_frame(frame, full_frame: bool = False, locate_width: int = LOCATE_WIDTH, timings: dict = None) -> tuple:
+    """Decode the barcodes of a frame, in the candidate regions or in the whole frame.
+
+    The function has no state, so it can be called by the processes of DecodePool.
+
+    Args:
+        frame (np.ndarray): frame of the camera (BGR or grayscale).
+        full_frame (bool): True to decode the whole frame, False to decode only the candidate regions.
+        locate_width (int): width of the downscaled frame used for the localization.
+        timings (dict): if not None, the seconds spent in the localization and in the decoding are written in
+            timings['locate'] and timings['decode'] (used by scan_benchmark).
+
+    Return:
+        tuple (decoded_info, found): decoded_info (list) contains the barcodes decoded by pyzbar,
+        found (bool) is False if no candidate region has been found (nothing in front of the camera).
+    """
+
+    start = time.perf_counter() if timings is not None else None
+
+    if full_frame:
+        regions, found = None, True
+    else:
+        regions = locate_regions(frame, locate_width)
+        found = bool(regions)
+    located = time.perf_counter() if timings is not None else None
+
+    if regions is None:
+        decoded_info = pyzbar.decode(_to_gray(frame))
+    else:
+        decoded_info = decode_regions(frame, regions) if found else []
+
+    if timings is not None:
+        timings['locate'] = located - start
+        timings['decode'] = time.perf_counter() - located
+    return decoded_info, found
+
+class BarcodeDetector:
+    """BarcodeDetector decodes the barcodes of the frames of the camera in more stages (localization, decoding of the regions,
+    adaptive skip and full frame fallback).
+
+    Attributes:
+        locate_width (int): width of the downscaled frame used for the localization.
+        max_skip (int): maximum number of frames skipped when nothing is in front of the camera.
+        full_frame_every (int): number of decoded frames after which the whole frame is decoded, 0 to never decode the whole frame.
+    """
+
+    def __init__(self, locate_width: int = LOCATE_WIDTH, max_skip: int = MAX_SKIP, full_frame_every: int = FULL_FRAME_EVERY):
+        """Initialize BarcodeDetector with locate_width, max_skip and full_frame_every.
+
+        Args:
+            locate_width (int): width of the downscaled frame used for the localization.
+            max_skip (int): maximum number of frames skipped when nothing is in front of the camera.
+            full_frame_every (int): number of decoded frames after which the whole frame is decoded, 0 to never decode the whole frame.
+        """
+
+        self.locate_width = locate_width
+        self.max_skip = max_skip
+        self.full_frame_every = full_frame_every
+
+        self._empty_frames = 0  # Consecutive frames without candidate regions.
+        self._to_skip = 0  # Frames still to skip.
+        self._decoded_frames = 0
+
+    def next_mode(self) -> str:
+        """Choose how the next frame is decoded.
+
+        Return:
+            (str): None if the frame is skipped, 'full' if the whole frame is decoded, 'regions' if only the candidate regions are decoded.
+        """
+
+        if self._to_skip:
+            self._to_skip -= 1
+            return None
+
+        self._decoded_frames += 1
+        if self.full_frame_every and self._decoded_frames % self.full_frame_every == 0:
+            return 'full'  # Fallback on the whole frame.
+        return 'regions'
+
+    def update(self, found: bool):
+        """Update the frames to skip with the result of a decoded frame.
+
+        Arg:
+            found (bool): False if no candidate region has been found in the frame.
+        """
+
+        if found:
+            self._empty_frames = 0
+        else:
+            # Nothing in front of the camera: more frames are skipped the longer it lasts.
+            self._empty_frames += 1
+            self._to_skip = min(self._empty_frames // 2, self.max_skip)
+
+    def detect(self, frame) -> list:
+        """Decode the barcodes of a frame.
+
+        Arg:
+            frame (np.ndarray): frame of the camera (BGR or grayscale).
+
+        Return:
+            (list): None if the frame is skipped, otherwise the barcodes decoded by pyzbar (bounding boxes in the coordinates of the frame).
+
+        Example:
+            >>> [code.data for code in detector.detect(frame)]
+            [b'90351051', b'1000']
+        """
+
+        mode = self.next_mode()
+        if mode is None:
+            return None
+
+        decoded_info, found = decode_frame(frame, mode == 'full', self.locate_width)
+        self.update(found)
+        return decoded_info
@@ -0,0 +1,212 @@
+"""This module contains the CameraSession implementation, a class that keeps the PC camera open between the detections.
+
+Opening and warming up a USB camera takes about a second, so the camera is opened only at the first detection
+and released when the App is closed. The settings (index, backend, resolution, fps and format of the frames) are read
+from the configuration file camera.ini, so the same code works with DirectShow on Windows and V4L2 on Linux.
+The orientation of the screen (tablet used in portrait mode) is given again by the App at each detection
+with refresh_orientation(), so turning the tablet does not need a restart.
+
+Dependencies:
+    cv2 (OpenCV): open source computer vision and machine learning software library.
+    configparser
+    threading
+    PIL (Python Imaging Library): library used for reading the size of the screen.
+
+Example:
+    from camera_session import CameraSession
+
+    camera = CameraSession.from_config()
+    camera.open()
+    ret, frame = camera.read()
+    camera.release()
+"""
+
+import configparser
+import threading
+import cv2
+
+try:
+    from PIL import ImageGrab
+except ImportError:  # PIL is used only for the orientation of the screen.
+    ImageGrab = None
+
+CONFIG_PATH = 'C:\\Users\\lara_\\OneDrive\\Desktop\\AppInventario\\AppInventario\\camera.ini'
+BACKENDS = {'dshow': cv2.CAP_DSHOW, 'msmf': cv2.CAP_MSMF, 'v4l2': cv2.CAP_V4L2, 'any': cv2.CAP_ANY}
+WARMUP_FRAMES = 5  # Frames read and discarded after opening the camera (exposure and white balance are still changing).
+
+def read_camera_settings(config_path: str = CONFIG_PATH) -> dict:
+    """Return the camera settings read from the configuration file (camera.ini).
+
+    The missing values have the defaults of the App (camera 1 with DirectShow, settings of the camera, orientation of the screen).
+
+    Arg:
+        config_path (str): path of the configuration file.
+
+    Return:
+        (dict): keys 'index', 'backend', 'width', 'height', 'fps', 'fourcc' and 'rotate' (None for automatic), see CameraSession.
+
+    Example:
+        >>> read_camera_settings()
+        {'index': 1, 'backend': 700, 'width': 1280, 'height': 720, 'fps': 30, 'fourcc': 'MJPG', 'rotate': None}
+    """
+
+    configuration_file = configparser.ConfigParser()
+    configuration_file.read(config_path)
+    section = configuration_file['CAMERA'] if configuration_file.has_section('CAMERA') else {}
+
+    backend = section.get('backend', 'dshow').strip().lower()
+    if backend not in BACKENDS:
+        raise ValueError('Backend della camera non valido: ' + backend + '.')
+
+    fourcc = section.get('fourcc', '').strip()
+    if fourcc and len(fourcc) != 4:
+        raise ValueError('Formato dei frame non valido: ' + fourcc + '.')
+
+    rotate = section.get('rotate', 'auto').strip().lower()
+    if rotate not in ('auto', 'yes', 'no'):
+        raise ValueError('Valore di rotate non valido: ' + rotate + '.')
+
+    return {
+        'index': int(section.get('index', 1)),
+        'backend': BACKENDS[backend],
+        'width': int(section.get('width', 0)),
+        'height': int(section.get('height', 0)),
+        'fps': int(section.get('fps', 0)),
+        'fourcc': fourcc,
+        'rotate': None if rotate == 'auto' else rotate == 'yes',
+    }
+
+def screen_is_portrait() -> bool:
+    """Return True if the screen is taller than wide (tablet used in portrait mode), False if its size cannot be read."""
+
+    if ImageGrab is None:
+        return False
+    try:
+        screen_width, screen_height = ImageGrab.grab().size  # Capture the screen's contents as an image.
+    except OSError:  # No screen to capture (e.g. Linux without X server).
+        return False
+    return screen_height > screen_width
+
+class CameraSession:
+    """CameraSession keeps the PC camera open and configured between the detections.
+
+    Attributes:
+        index (int): index of the camera for OpenCV.
+        backend (int): OpenCV backend used to open the camera.
+        width (int): width of the frames, 0 to keep the value of the camera.
+        height (int): height of the frames, 0 to keep the value of the camera.
+        fps (int): frames per second, 0 to keep the value of the camera.
+        fourcc (str): four characters code of the format of the frames (e.g. 'MJPG'), empty to keep the value of the camera.
+        is_open (bool): True while the camera is open.
+    """
+
+    def __init__(self, index: int = 1, backend: int = cv2.CAP_DSHOW, width: int = 0, height: int = 0, fps: int = 0,
+                 fourcc: str = '', rotate: bool = None):
+        """Initialize CameraSession with index, backend, width, height, fps, fourcc and rotate.
+
+        Args:
+            index (int): index of the camera for OpenCV.
+            backend (int): OpenCV backend used to open the camera.
+            width (int): width of the frames, 0 to keep the value of the camera.
+            height (int): height of the frames, 0 to keep the value of the camera.
+            fps (int): frames per second, 0 to keep the value of the camera.
+            fourcc (str): four characters code of the format of the frames, empty to keep the value of the camera.
+            rotate (bool): True if the frames are rotated by 90 degrees, None to follow the orientation of the screen.
+        """
+
+        self.index = index
+        self.backend = backend
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.fourcc = fourcc
+
+        self._rotate = rotate  # Value of camera.ini, None to follow the orientation of the screen.
+        self._portrait = None  # Orientation of the screen, None until it is read.
+        self._capture = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config_path: str = CONFIG_PATH) -> 'CameraSession':
+        """Return a CameraSession with the settings of the configuration file (camera.ini)."""
+
+        return cls(**read_camera_settings(config_path))
+
+    @property
+    def is_open(self) -> bool:
+        return self._capture is not None and self._capture.isOpened()
+
+    @property
+    def rotate(self) -> bool:
+        """True if the frames are rotated by 90 degrees: the value of camera.ini, or the orientation of the screen
+        (tablet used in portrait mode) given by refresh_orientation() or read with ImageGrab if it has not been given.
+        """
+
+        if self._rotate is not None:
+            return self._rotate
+        if self._portrait is None:
+            self._portrait = screen_is_portrait()
+        return self._portrait
+
+    def refresh_orientation(self, portrait: bool = None):
+        """Set the orientation of the screen, called at each detection because the tablet can be turned.
+
+        Arg:
+            portrait (bool): True if the screen is taller than wide (e.g. from the size of the screen read by tkinter),
+                None to read it again with ImageGrab at the next use of rotate.
+        """
+
+        self._portrait = portrait
+
+    def open(self) -> bool:
+        """Open and configure the camera, if it is not open yet.
+
+        Return:
+            (bool): False if the camera cannot be opened, otherwise True.
+        """
+
+        with self._lock:
+            if self.is_open:
+                return True
+
+            capture = cv2.VideoCapture(self.index, self.backend)  # Open the PC camera.
+            if not capture.isOpened():
+                capture.release()
+                return False
+
+            # The format is set before the resolution: some cameras give high resolutions only with MJPG.
+            if self.fourcc:
+                capture.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*self.fourcc))
+            if self.width:
+                capture.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+            if self.height:
+                capture.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+            if self.fps:
+                capture.set(cv2.CAP_PROP_FPS, self.fps)
+            capture.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # Only the last frame is kept by the driver, so the first frame read is not old.
+
+            for _ in range(WARMUP_FRAMES):
+                capture.read()
+
+            self._capture = capture
+            return True
+
+    def read(self) -> tuple:
+        """Read a frame from the camera.
+
+        Return:
+            tuple (ret, frame): ret (bool) is False if no frame has been read (or the camera is not open), frame (np.ndarray) is the frame read.
+        """
+
+        with self._lock:
+            if self._capture is None:
+                return False, None
+            return self._capture.read()  # Capture a frame from the camera.
+
+    def release(self):
+        """Release the camera, called when the App is closed."""
+
+        with self._lock:
+            if self._capture is not None:
+                self._capture.release()  # Release the camera.
+                self._capture = None
@@ -2,19 +2,34 @@
 
 There is also the function that shows touch keyboard.
 
+The MP registry is read once and kept in memory by the module-level ArticlesRegistry (registry),
+so the checks on articles do not read the Excel file at every call.
+
+The functions with the suffix '_batch' apply the same checks to many values at once (lists, arrays or Series)
+and return arrays of bool: the characters are checked with NumPy operations on the whole array, without Python loops.
+
 Dependencies:
-    pandas: library for manipulating data in Excel files.   
     subprocess: module that allows to generate new processes, connect to their input/output/error tubes and get their return codes.
+    numpy: library for the checks of many values at once.
+    articles_registry: ArticlesRegistry implementation.
+    articles_manager: the greatest quantity that can be stored (MAX_QTY).
+    metrics: the module containing the counters and the latency histograms of the App.
 """
 
-import pandas as pd
 import subprocess
+import numpy as np
+from articles_registry import ArticlesRegistry
+from articles_manager import MAX_QTY
+import metrics
+
+registry = ArticlesRegistry()  # MP registry shared by the whole application.
 
 def show_keyboard(event):
     """Show touch keyboard."""
 
     subprocess.Popen(['C:\\PROGRA~1\\COMMON~1\\MICROS~1\\ink\\TabTip.exe'], shell=True)
 
+@metrics.timed('check.art')
 def check_art(art: str) -> bool:
     """Check the value of the article inserted by user.
 
@@ -39,15 +54,50 @@ def check_art(art: str) -> bool:
         if a not in 'QWERTYUIOPASDFGHJKLZXCVBNM0123456789': 
             return False
 
-    excel_file = pd.read_excel('C:\\Users\\lara_\\OneDrive\\Desktop\\AppInventario\\AppInventario\\anagrafica_articoli.xlsx')
-    series_articles_mp = pd.Series(excel_file['ARTICOLO'])    
-    articles_mp = series_articles_mp.to_string(index=False)  # Represent the data of the Series as str.
+    if art not in registry:
+        return False
+
+    return True
 
-    if art not in articles_mp:
+def check_art_format(art: str) -> bool:
+    """Check only the format of the article: 8 characters, only capital letters and/or numbers (the MP registry is not read).
+
+    Arg:
+        art (str): article string.
+
+    Return:
+        False if the string length is not 8 or if there are no capital letters and/or numbers, otherwise True.
+
+    Example:
+        from check_values import check_art_format
+
+        print(check_art_format('Z9035105'))
+    """
+
+    if len(art) != 8:
         return False
 
+    for a in art:
+        if a not in 'QWERTYUIOPASDFGHJKLZXCVBNM0123456789':
+            return False
+
     return True
 
+def art_format_reason(art: str) -> str:
+    """Return the reason why the format of an article is not valid, written in the rejected rows of the imports.
+
+    An article of less than 8 digits is usually a code written as a number in Excel, which has lost its leading zeros
+    (10012 for 00010012): the reason tells to format the column as text.
+
+    Example:
+        >>> art_format_reason('10012')
+        "Articolo numerico senza zeri iniziali (formattare la colonna come testo)"
+    """
+
+    if art.isdigit() and len(art) < 8:
+        return 'Articolo numerico senza zeri iniziali (formattare la colonna come testo)'
+    return 'Formato articolo non valido'
+
 def check_qty(qty: str) -> bool:
     """Check the value of the quantity inserted by user.
 
@@ -55,7 +105,8 @@ def check_qty(qty: str) -> bool:
         qty (str): quantity string.
 
     Return:
-        False if the inserted value is null, a decimal or negative number, otherwise True.
+        False if the inserted value is null, a decimal or negative number or greater than MAX_QTY, otherwise True.
+        Leading zeros are accepted: the quantities are stored as integers, so '0050' is saved and exported as 50.
 
     Example:
         from check_values import check_qty
@@ -68,7 +119,29 @@ def check_qty(qty: str) -> bool:
     for q in qty:
         if not 48 <= ord(q) <= 57:  # 48 = '0', 57 = '9'.
             return False
-    return True
+    return int(qty) <= MAX_QTY
+
+def split_record(decoded_text_list: list, check_article=check_art) -> tuple:
+    """Given the two codes of a pair detected by the camera, find which one is the article and which one the quantity.
+
+    Args:
+        decoded_text_list (list): list containing the article and the quantity, in any order.
+        check_article (function): check of the article (default check_art, the article must be in MP registry).
+
+    Return:
+        (tuple): None if the codes are not a valid article and a valid quantity, otherwise tuple (article, quantity).
+
+    Example:
+        from check_values import split_record
+
+        print(split_record(['1000', '90351051']))
+    """
+
+    if check_article(decoded_text_list[0]) == True and check_qty(decoded_text_list[1]) == True:
+        return (decoded_text_list[0], decoded_text_list[1])
+    if check_article(decoded_text_list[1]) == True and check_qty(decoded_text_list[0]) == True:
+        return (decoded_text_list[1], decoded_text_list[0])
+    return None
 
 def check_new_art(new_art: str) -> bool:
     """Check the value of the new article inserted by user.
@@ -94,11 +167,100 @@ def check_new_art(new_art: str) -> bool:
         if a not in 'QWERTYUIOPASDFGHJKLZXCVBNM0123456789':
             return False
 
-    excel_file = pd.read_excel('C:\\Users\\lara_\\OneDrive\\Desktop\\AppInventario\\AppInventario\\anagrafica_articoli.xlsx')  
-    series_articles_mp = pd.Series(excel_file['ARTICOLO']) 
-    articles_mp = series_articles_mp.to_string(index=False)  
-
-    if new_art in articles_mp:
+    if new_art in registry:
         return False
 
     return True
+
+def _char_codes(values, width: int = None) -> np.ndarray:
+    """Return a 2D array with the Unicode code of every character of the values (one row for each value, 0 after the end of the string).
+
+    Values longer than width are cut to width characters, if width is None the width is the one of the longest value.
+    """
+
+    strings = np.array(values, dtype=str if width is None else 'U' + str(width)).reshape(-1)
+    width = strings.dtype.itemsize // 4  # Each character of a NumPy Unicode string takes 4 bytes.
+    return strings.view(np.uint32).reshape(strings.size, width)
+
+def check_art_format_batch(arts) -> np.ndarray:
+    """Check the format of many articles at once: 8 characters, only capital letters and/or numbers.
+
+    Arg:
+        arts (list, np.ndarray or pd.Series): articles as string.
+
+    Return:
+        (np.ndarray): array of bool, True where the article has a valid format.
+
+    Example:
+        from check_values import check_art_format_batch
+
+        print(check_art_format_batch(['90351051', 'h0351051', '9035105']))
+    """
+
+    chars = _char_codes(arts, width=9)  # The 9th character is enough to find articles longer than 8.
+    first_8 = chars[:, :8]
+    valid_chars = ((first_8 >= 48) & (first_8 <= 57)) | ((first_8 >= 65) & (first_8 <= 90))  # '0'-'9' and 'A'-'Z'.
+    return valid_chars.all(axis=1) & (chars[:, 8] == 0)
+
+def check_art_batch(arts) -> np.ndarray:
+    """Check many articles at once with the rules of check_art.
+
+    Arg:
+        arts (list, np.ndarray or pd.Series): articles as string.
+
+    Return:
+        (np.ndarray): array of bool, True where check_art would return True.
+
+    Example:
+        from check_values import check_art_batch
+
+        print(check_art_batch(['90351051', 'H0351051']))
+    """
+
+    return check_art_format_batch(arts) & registry.contains_batch(arts)
+
+def check_new_art_batch(new_arts) -> np.ndarray:
+    """Check many new articles at once with the rules of check_new_art.
+
+    Arg:
+        new_arts (list, np.ndarray or pd.Series): new articles as string.
+
+    Return:
+        (np.ndarray): array of bool, True where check_new_art would return True.
+
+    Example:
+        from check_values import check_new_art_batch
+
+        print(check_new_art_batch(['Z9035105', '01111111']))
+    """
+
+    return check_art_format_batch(new_arts) & ~registry.contains_batch(new_arts)
+
+def check_qty_batch(qtys) -> np.ndarray:
+    """Check many quantities at once with the rules of check_qty.
+
+    Arg:
+        qtys (list, np.ndarray or pd.Series): quantities as string.
+
+    Return:
+        (np.ndarray): array of bool, True where check_qty would return True.
+
+    Example:
+        from check_values import check_qty_batch
+
+        print(check_qty_batch(['1000', '', '-5', '2.5']))
+    """
+
+    chars = _char_codes(qtys)
+    if chars.shape[1] == 0:
+        return np.zeros(chars.shape[0], dtype=bool)
+
+    digits = ((chars >= 48) & (chars <= 57)) | (chars == 0)  # 48 = '0', 57 = '9', 0 = after the end of the string.
+    valid = digits.all(axis=1) & (chars[:, 0] != 0)  # An empty string is not valid.
+
+    # Only the quantities with as many digits as MAX_QTY or more can be greater than it: they are few and checked one by one.
+    max_digits = len(str(MAX_QTY))
+    if chars.shape[1] >= max_digits:
+        for i in np.flatnonzero(valid & (chars[:, max_digits - 1] != 0)):
+            valid[i] = int(''.join(map(chr, chars[i][chars[i] != 0]))) <= MAX_QTY
+    return valid
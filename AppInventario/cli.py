@@ -0,0 +1,287 @@
+"""This module contains the command line of the App, used without the user interface (e.g. by a nightly job).
+
+The commands work directly on FilesManager, on the saved data (FilesStore and FilesJournal) and on the MP registry,
+and never import tkinter, cv2 or pyzbar, so they can run on a PC without screen and without camera.
+The rows are read and written one block at a time, so the files can have any size, and '-' as path means
+the standard input or output, so the commands can be used in pipelines.
+
+Commands:
+- stats: records and pieces of each file (from the manifest, the files are not loaded).
+- validate: checks the rows of a spreadsheet (as the import) and writes the rejected rows, without changing the data.
+- import: inserts the valid rows of a spreadsheet in a file, one operation of the journal for each block of rows.
+- export: writes a file, all the files or the totals of each article in all the files (consolidation).
+
+The commands that change the data (import) must not run while the App is open: the App and the command would write the same journal.
+
+Example:
+    python cli.py stats
+    python cli.py validate area3.csv --rejects area3_scartati.csv
+    type area3.csv | python cli.py import inventario3 - --create
+    python cli.py export --file inventario3 - | findstr 90351051
+    python cli.py export --totals totali_stabilimento.parquet
+    python cli.py export --all C:/Users/Lara/Desktop/files --format csv
+
+Dependencies:
+    files_manager: FilesManager implementation.
+    files_store: FilesStore implementation.
+    files_journal: FilesJournal implementation.
+    articles_registry: ArticlesRegistry implementation.
+    inventory_import: the module containing the checks of the rows of a spreadsheet.
+    inventory_export: the module containing the functions that write the files.
+    inventory_consolidation: the module containing the totals of each article in all the files.
+    spreadsheet_reader: the module containing the functions that read the rows of a spreadsheet.
+    metrics: the module containing the counters and the latency histograms of the App.
+    argparse
+    csv
+    io
+    json
+    os
+    sys
+"""
+
+import os
+import io
+import sys
+import csv
+import json
+import argparse
+from files_manager import FilesManager
+from files_store import FilesStore
+from files_journal import FilesJournal
+from articles_registry import ArticlesRegistry, REGISTRY_PATH
+from inventory_import import iter_checked_rows, import_rows, REJECTS_HEADER
+from inventory_export import write_csv_stream, write_file, export_all, FORMATS, HEADER
+from inventory_consolidation import consolidation_rows
+from spreadsheet_reader import iter_rows, iter_csv_rows
+import metrics
+
+DATA_PATH = 'C:\\Users\\lara_\\OneDrive\\Desktop\\AppInventario\\AppInventario\\salvataggio_progressi'
+JOURNAL_NAME = 'giornale.log'
+
+class CommandError(Exception):
+    """Error of a command, printed without traceback."""
+
+def _stdin():
+    return io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8-sig', newline='')
+
+def _stdout():
+    return io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', newline='')
+
+def _read_rows(path: str):
+    """Return an iterator of the rows of a spreadsheet, or of the CSV rows of the standard input if path is '-'."""
+
+    if path == '-':
+        return iter_csv_rows(_stdin())
+    if not os.path.isfile(path):
+        raise CommandError('File non trovato: ' + path + '.')
+    return iter_rows(path)
+
+def _open_output(path: str):
+    """Open a CSV output, the standard output if path is '-'."""
+
+    if path == '-':
+        return _stdout()
+    return open(path, 'w', newline='', encoding='utf-8')
+
+def _split_output(path: str, export_format: str) -> tuple:
+    """Return the path without extension and the format of an output file (the format of the extension if export_format is None)."""
+
+    root, extension = os.path.splitext(path)
+    extension = extension.lower().lstrip('.')
+    if export_format is None:
+        export_format = extension if extension in FORMATS else 'csv'
+    return (root if extension == export_format else path), export_format
+
+def open_data(data_path: str, write: bool = False) -> tuple:
+    """Read the saved data into a FilesManager.
+
+    Args:
+        data_path (str): folder of the saved data (manifest, shards and journal).
+        write (bool): True to open the journal for writing (the changes are saved by journal.close()),
+            False to read the data without changing anything.
+
+    Return:
+        tuple (files_manager, journal): journal (FilesJournal) is None if write is False.
+    """
+
+    if not os.path.isdir(data_path):
+        raise CommandError('Cartella dei dati non trovata: ' + data_path + '.')
+
+    files_manager = FilesManager()
+    journal = FilesJournal(files_manager, FilesStore(data_path), os.path.join(data_path, JOURNAL_NAME))
+    if write:
+        journal.open()
+        return files_manager, journal
+
+    journal.load()
+    return files_manager, None
+
+def command_stats(args) -> int:
+    """Write the records and the pieces of each file and of the whole inventory, as CSV or JSON."""
+
+    files_manager, _ = open_data(args.data)
+    file_names = args.files or files_manager.get_files()
+    missing = [file_name for file_name in file_names if file_name not in files_manager.files]
+    if missing:
+        raise CommandError('File inesistenti: ' + ', '.join(missing) + '.')
+
+    totals = [(file_name, *files_manager.get_file_totals(file_name)) for file_name in file_names]
+    records = sum(file_records for _, file_records, _ in totals)
+    pieces = sum(file_pieces for _, _, file_pieces in totals)
+
+    output = _stdout()
+    if args.json:
+        json.dump({'files': {file_name: {'records': file_records, 'pieces': file_pieces} for file_name, file_records, file_pieces in totals},
+                   'records': records, 'pieces': pieces}, output, indent=2)
+        output.write('\n')
+    else:
+        writer = csv.writer(output)
+        writer.writerow(['File', 'Record', 'Pezzi'])
+        writer.writerows(totals)
+        writer.writerow(['Totale', records, pieces])
+    output.flush()
+    return 0
+
+def command_validate(args) -> int:
+    """Check the rows of a spreadsheet and write the rejected rows, return 1 if there are rejected rows."""
+
+    registry = ArticlesRegistry(args.registry)
+    valid = rejected = 0
+    report = _open_output(args.rejects)
+    try:
+        writer = csv.writer(report)
+        writer.writerow(REJECTS_HEADER)
+        for records, rejected_rows in iter_checked_rows(_read_rows(args.input), registry):
+            valid += len(records)
+            rejected += len(rejected_rows)
+            writer.writerows(rejected_rows)
+    finally:
+        report.flush()
+        if args.rejects != '-':
+            report.close()
+
+    print('Righe valide: {}, scartate: {}.'.format(valid, rejected), file=sys.stderr)
+    return 1 if rejected else 0
+
+def command_import(args) -> int:
+    """Insert the valid rows of a spreadsheet in a file, writing the rejected rows if requested."""
+
+    registry = ArticlesRegistry(args.registry)
+    files_manager, journal = open_data(args.data, write=True)
+    added = rejected = 0
+    report = None
+    try:
+        if args.file not in files_manager.files:
+            if not args.create:
+                raise CommandError('Il File ' + args.file + ' non esiste (usa --create per crearlo).')
+            files_manager.insert_file(args.file)
+
+        if args.rejects is not None:
+            report = _open_output(args.rejects)
+            writer = csv.writer(report)
+            writer.writerow(REJECTS_HEADER)
+
+        for block_added, rejected_rows in import_rows(_read_rows(args.input), files_manager, args.file, registry):  # One operation for each block.
+            added += block_added
+            rejected += len(rejected_rows)
+            if report is not None:
+                writer.writerows(rejected_rows)
+    finally:
+        if report is not None:
+            report.flush()
+            if args.rejects != '-':
+                report.close()
+        journal.close()  # The inserted records are saved also if the import stops.
+
+    print('Record inseriti in {}: {}, righe scartate: {}.'.format(args.file, added, rejected), file=sys.stderr)
+    return 0
+
+def command_export(args) -> int:
+    """Export a file, all the files or the totals of each article in all the files."""
+
+    files_manager, _ = open_data(args.data)
+
+    if args.all:
+        if args.output == '-':
+            raise CommandError("--all scrive un file per ogni File in una cartella, non sullo standard output.")
+        os.makedirs(args.output, exist_ok=True)
+        results = export_all(files_manager, os.path.join(args.output, ''), args.format or 'csv')
+        written = sum(results.values())
+        print('File esportati: {}, record: {}.'.format(len(results), written), file=sys.stderr)
+        return 0
+
+    if args.totals:
+        header, rows = consolidation_rows(files_manager)
+    else:
+        if args.file not in files_manager.files:
+            raise CommandError('Il File ' + args.file + ' non esiste.')
+        header, rows = HEADER, files_manager.files[args.file].iter_sorted_records()
+
+    if args.output == '-':
+        if args.format not in (None, 'csv'):
+            raise CommandError('Sullo standard output si puo\' scrivere solo in formato csv.')
+        output = _stdout()
+        written = write_csv_stream(rows, output, header)
+        output.flush()
+    else:
+        file_path, export_format = _split_output(args.output, args.format)
+        written = write_file(rows, file_path, export_format, header)
+
+    print('Righe esportate: {}.'.format(written), file=sys.stderr)
+    return 0
+
+def build_parser() -> argparse.ArgumentParser:
+    """Return the parser of the command line."""
+
+    parser = argparse.ArgumentParser(prog='cli.py', description='AppInventario da riga di comando.')
+    parser.add_argument('--data', default=DATA_PATH, help='cartella dei dati salvati (default: %(default)s)')
+    parser.add_argument('--registry', default=REGISTRY_PATH, help='file Excel dell\'anagrafica (default: %(default)s)')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    stats = commands.add_parser('stats', help='record e pezzi di ogni File')
+    stats.add_argument('files', nargs='*', help='File da considerare (default: tutti)')
+    stats.add_argument('--json', action='store_true', help='scrive in formato JSON')
+    stats.set_defaults(function=command_stats)
+
+    validate = commands.add_parser('validate', help='controlla le righe di un foglio senza importarle')
+    validate.add_argument('input', help="foglio Excel o CSV, '-' per lo standard input (CSV)")
+    validate.add_argument('--rejects', default='-', help="file CSV delle righe scartate, '-' per lo standard output (default)")
+    validate.set_defaults(function=command_validate)
+
+    import_command = commands.add_parser('import', help='importa le righe valide di un foglio in un File')
+    import_command.add_argument('file', help='nome del File')
+    import_command.add_argument('input', help="foglio Excel o CSV, '-' per lo standard input (CSV)")
+    import_command.add_argument('--create', action='store_true', help='crea il File se non esiste')
+    import_command.add_argument('--rejects', default=None, help="file CSV delle righe scartate, '-' per lo standard output")
+    import_command.set_defaults(function=command_import)
+
+    export = commands.add_parser('export', help='esporta un File, tutti i File o i totali dello stabilimento')
+    target = export.add_mutually_exclusive_group(required=True)
+    target.add_argument('--file', help='nome del File da esportare')
+    target.add_argument('--all', action='store_true', help='esporta tutti i File nella cartella output')
+    target.add_argument('--totals', action='store_true', help='esporta i totali di ogni articolo in tutti i File')
+    export.add_argument('output', nargs='?', default='-',
+                        help="file di output (il formato e' quello dell'estensione), cartella con --all, '-' per lo standard output (default)")
+    export.add_argument('--format', choices=FORMATS, default=None, help='formato di esportazione')
+    export.set_defaults(function=command_export)
+
+    return parser
+
+def main(argv: list = None) -> int:
+    """Run the command of the command line and return the exit code (0 success, 1 rows rejected by validate, 2 error)."""
+
+    args = build_parser().parse_args(argv)
+    try:
+        metrics.start()
+        return args.function(args)
+    except CommandError as error:
+        print('Errore: ' + str(error), file=sys.stderr)
+        return 2
+    except BrokenPipeError:  # The next command of the pipeline has stopped reading.
+        sys.stderr.close()
+        return 0
+    finally:
+        metrics.stop()
+
+if __name__ == '__main__':
+    sys.exit(main())
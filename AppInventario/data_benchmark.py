@@ -0,0 +1,259 @@
+"""This module contains benchmark_data, a function that measures how the data structures of the App behave as the inventories grow.
+
+For each size (number of records) a synthetic inventory is generated with a realistic skew (Zipf distribution):
+few articles have most of the records, and few quantities (the usual packages) are repeated much more than the others.
+FilesManager writes its operations in a FilesJournal, as in the App, so each operation pays for its append to the journal.
+Then these operations are measured:
+- insert_records_list: all the records inserted in FilesManager, in lists of CHUNK_RECORDS records (as the import does).
+- delete_qty and modify_record: SAMPLE_OPS records of the inventory, one by one.
+- export_file: FilesManager.export_file, the list of tuples of all the records.
+- save: FilesJournal.close(), the changed file written in a shard of FilesStore (the save of the App when it is closed).
+- load: the file read again from its shard (the first use of a file after the App is started).
+- export in xlsx, csv and parquet (inventory_export), parquet only if pyarrow is installed
+  and xlsx only up to XLSX_MAX_RECORDS records (the maximum rows of a sheet).
+
+The results of each run are appended to a JSON file, with the label of the run (e.g. the version of the App),
+so the results of different versions can be compared.
+    python data_benchmark.py --sizes 1000 10000 100000 1000000 --label v2.3 --json benchmark_dati.json
+
+Dependencies:
+    numpy: library used for generating the inventories.
+    files_manager: FilesManager implementation.
+    files_store: FilesStore implementation.
+    files_journal: FilesJournal implementation.
+    inventory_export: the module containing the functions that write the files.
+    argparse
+    json
+    platform
+    shutil
+    tempfile
+    time
+    os
+"""
+
+import os
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import numpy as np
+from files_manager import FilesManager
+from files_store import FilesStore
+from files_journal import FilesJournal
+from inventory_export import export_file, FORMATS, pyarrow
+
+SIZES = (10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6)  # Default sizes, 10 ** 7 can be added from the command line.
+RECORDS_PER_ARTICLE = 50  # Mean number of records of each article.
+PACKAGES = (1, 5, 10, 12, 20, 24, 25, 50, 100, 200, 250, 500, 1000, 2000, 2500, 5000)  # Usual quantities.
+SKEW = 1.2  # Exponent of the Zipf distribution of the articles and of the quantities.
+CHUNK_RECORDS = 100000  # Records generated and inserted together.
+SAMPLE_OPS = 1000  # Records deleted and modified one by one.
+XLSX_MAX_RECORDS = 1048575  # Rows of an Excel sheet, header excluded.
+FILE_NAME = 'benchmark'
+JOURNAL_NAME = 'giornale.log'
+
+def _zipf_weights(number: int, skew: float) -> np.ndarray:
+    """Return the probabilities of number elements with a Zipf distribution (the first element is the most frequent)."""
+
+    weights = 1.0 / np.arange(1, number + 1) ** skew
+    return weights / weights.sum()
+
+def generate_records(records: int, skew: float = SKEW, seed: int = 0, chunk_records: int = CHUNK_RECORDS):
+    """Return an iterator of lists of records (article, quantity) of a synthetic inventory.
+
+    Args:
+        records (int): number of records.
+        skew (float): exponent of the Zipf distribution of the articles and of the quantities, 0 for a uniform distribution.
+        seed (int): seed of the random generator, the same seed gives the same inventory.
+        chunk_records (int): records of each list, so the whole inventory is never kept in memory.
+
+    Return:
+        iterator of lists of tuples (article, quantity) as string, as inserted by the user.
+
+    Example:
+        >>> next(generate_records(3))
+        [('10000007', '1000'), ('10000000', '500'), ('10000007', '1000')]
+    """
+
+    rng = np.random.default_rng(seed)
+    number_articles = max(1, records // RECORDS_PER_ARTICLE)
+    articles = np.array([str(10 ** 7 + code) for code in rng.permutation(number_articles)])
+    article_weights = _zipf_weights(number_articles, skew)
+
+    # Each article has its own most frequent packages.
+    packages = np.array([str(qty) for qty in PACKAGES])
+    package_weights = _zipf_weights(len(PACKAGES), skew)
+
+    for start in range(0, records, chunk_records):
+        size = min(chunk_records, records - start)
+        art_index = rng.choice(number_articles, size=size, p=article_weights)
+        package_index = (rng.choice(len(PACKAGES), size=size, p=package_weights) + art_index) % len(PACKAGES)
+        yield list(zip(articles[art_index].tolist(), packages[package_index].tolist()))
+
+def _timed(function, *args) -> tuple:
+    """Call a function and return its result and the seconds it took."""
+
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+def _rate(count: int, seconds: float) -> float:
+    return round(count / seconds, 1) if seconds else None
+
+def benchmark_size(records: int, folder: str, formats: tuple = FORMATS, skew: float = SKEW, seed: int = 0) -> dict:
+    """Generate an inventory of records records and measure the operations on it.
+
+    Args:
+        records (int): number of records.
+        folder (str): folder where the saved data (journal and shards) and the exported files are written.
+        formats (tuple): export formats measured.
+        skew (float): exponent of the Zipf distribution of the articles and of the quantities.
+        seed (int): seed of the random generator.
+
+    Return:
+        (dict): for each operation 'seconds' and the operations (or records) per second, None for the operations skipped.
+    """
+
+    data_path = os.path.join(folder, 'dati_' + str(records))
+    os.makedirs(data_path, exist_ok=True)
+    store = FilesStore(data_path)
+    files_manager = FilesManager()
+    journal = FilesJournal(files_manager, store, os.path.join(data_path, JOURNAL_NAME))
+    journal.open()
+
+    files_manager.insert_file(FILE_NAME)
+    result = {'records': records}
+
+    insert_seconds = 0.0
+    for chunk in generate_records(records, skew, seed):
+        _, seconds = _timed(files_manager.insert_records_list, FILE_NAME, chunk)
+        insert_seconds += seconds
+    articles_manager = files_manager.files[FILE_NAME]
+    result['articles'] = len(articles_manager.dict_articoli)
+    result['insert_records_list'] = {'seconds': round(insert_seconds, 4), 'records_per_second': _rate(records, insert_seconds)}
+
+    exported, seconds = _timed(files_manager.export_file, FILE_NAME)
+    result['export_file'] = {'seconds': round(seconds, 4), 'records_per_second': _rate(records, seconds)}
+
+    # The same records are deleted, inserted again and modified, so the inventory does not change.
+    rng = np.random.default_rng(seed + 1)
+    sample = [exported[index] for index in rng.choice(len(exported), size=min(SAMPLE_OPS, len(exported)), replace=False)]
+    del exported
+
+    start = time.perf_counter()
+    for record in sample:
+        files_manager.delete_qty(FILE_NAME, record)
+    seconds = time.perf_counter() - start
+    result['delete_qty'] = {'seconds': round(seconds, 4), 'ops_per_second': _rate(len(sample), seconds)}
+    files_manager.insert_records_list(FILE_NAME, sample)
+
+    start = time.perf_counter()
+    for art, qty in sample:
+        files_manager.modify_record(FILE_NAME, (art, qty, qty))
+    seconds = time.perf_counter() - start
+    result['modify_record'] = {'seconds': round(seconds, 4), 'ops_per_second': _rate(len(sample), seconds)}
+
+    journal.sync()  # Done every second by the App.
+    journal_bytes = os.path.getsize(journal.journal_path)
+    _, save_seconds = _timed(journal.close)
+    entry = store.read_manifest()[1][FILE_NAME]
+    _, load_seconds = _timed(store.load_shard, entry)
+    result['save'] = {'seconds': round(save_seconds, 4), 'bytes': os.path.getsize(os.path.join(store.shards_path, entry['shard'])),
+                      'journal_bytes': journal_bytes}
+    result['load'] = {'seconds': round(load_seconds, 4)}
+    shutil.rmtree(data_path)
+
+    for export_format in formats:
+        if export_format == 'xlsx' and records > XLSX_MAX_RECORDS or export_format == 'parquet' and pyarrow is None:
+            result['export_' + export_format] = None
+            continue
+        file_path = os.path.join(folder, FILE_NAME)
+        _, seconds = _timed(export_file, articles_manager, file_path, export_format)
+        file_path += '.' + export_format
+        result['export_' + export_format] = {'seconds': round(seconds, 4), 'records_per_second': _rate(records, seconds),
+                                             'bytes': os.path.getsize(file_path)}
+        os.remove(file_path)
+
+    return result
+
+def benchmark_data(sizes: tuple = SIZES, formats: tuple = FORMATS, skew: float = SKEW, seed: int = 0, progress=None) -> list:
+    """Measure the operations on the data structures for each size of the inventory.
+
+    Args:
+        sizes (tuple): numbers of records of the inventories.
+        formats (tuple): export formats measured.
+        skew (float): exponent of the Zipf distribution of the articles and of the quantities.
+        seed (int): seed of the random generator.
+        progress (function): function called with the result of each size, None for no function.
+
+    Return:
+        (list): results of benchmark_size, one for each size.
+
+    Example:
+        >>> benchmark_data(sizes = (1000,))[0]['insert_records_list']
+        {'seconds': 0.0021, 'records_per_second': 476190.5}
+    """
+
+    results = []
+    with tempfile.TemporaryDirectory() as folder:
+        for records in sizes:
+            result = benchmark_size(records, folder, formats, skew, seed)
+            results.append(result)
+            if progress is not None:
+                progress(result)
+    return results
+
+def save_run(json_path: str, label: str, results: list, arguments: dict = None):
+    """Append the results of a run to a JSON file (a list of runs), creating it if it does not exist.
+
+    Args:
+        json_path (str): path of the JSON file.
+        label (str): label of the run (e.g. the version of the App).
+        results (list): results of benchmark_data.
+        arguments (dict): arguments of the run.
+    """
+
+    runs = []
+    if os.path.exists(json_path):
+        with open(json_path) as json_file:
+            runs = json.load(json_file)
+
+    runs.append({
+        'label': label,
+        'date': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'arguments': arguments or {},
+        'results': results,
+    })
+    with open(json_path, 'w') as json_file:
+        json.dump(runs, json_file, indent=2)
+
+def print_result(result: dict):
+    """Print the result of a size as a row of seconds."""
+
+    columns = ['insert_records_list', 'export_file', 'delete_qty', 'modify_record', 'save', 'load'] + \
+              [key for key in result if key.startswith('export_') and key != 'export_file']
+    print('Record: {} (articoli: {})'.format(result['records'], result['articles']))
+    for column in columns:
+        print('    {:<20}{}'.format(column, '-' if result[column] is None else str(result[column]['seconds']) + ' s'))
+
+def main(args: list = None):
+    """Run benchmark_data with the arguments of the command line and append the results to the JSON file."""
+
+    parser = argparse.ArgumentParser(description='Benchmark delle strutture dati al crescere degli inventari.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(SIZES), help='numeri di record degli inventari')
+    parser.add_argument('--formats', nargs='*', default=list(FORMATS), choices=FORMATS, help='formati di esportazione')
+    parser.add_argument('--skew', type=float, default=SKEW, help='esponente della distribuzione di Zipf')
+    parser.add_argument('--seed', type=int, default=0, help='seme dei numeri casuali')
+    parser.add_argument('--label', default='', help='etichetta della prova (es. versione)')
+    parser.add_argument('--json', default='benchmark_dati.json', help='file JSON a cui aggiungere i risultati')
+    args = parser.parse_args(args)
+
+    results = benchmark_data(args.sizes, tuple(args.formats), args.skew, args.seed, progress=print_result)
+    save_run(args.json, args.label, results, vars(args))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,219 @@
+"""This module contains the DecodePool implementation, a class that decodes the barcodes of the frames in a pool of processes,
+so the decoding uses all the cores of the tablet.
+
+The frames are not pickled: each frame is copied in a block of shared memory (slot), and the process receives only
+the name of the slot, the shape and the type of the frame. The slots are NUMBER_SLOTS for each process:
+when all the slots are in use, submit() waits (backpressure), so the frames are never queued without limit.
+The slots have the size of the first frame; if a larger frame arrives (e.g. images of different sizes in a folder),
+submit() waits for the frames being decoded and creates the slots again with the new size.
+Each set of slots has a generation number: the processes close the slots of the older generations at their next frame,
+so the blocks of shared memory deleted by the main process are really released (on Windows a block lives while it is open).
+The results are returned in the same order as the frames were submitted.
+The pool is used by one thread at a time (the decode thread of a ScanPipeline), which reserves it with acquire() and release().
+
+Dependencies:
+    barcode_locator: the module containing the function that decodes the barcodes of a frame.
+    concurrent.futures: module used for the pool of processes.
+    multiprocessing.shared_memory: module used for the blocks of shared memory.
+    numpy
+    collections
+    threading
+    queue
+    os
+
+Example:
+    from decode_pool import DecodePool
+
+    pool = DecodePool(workers = 3)
+    pool.submit(frame)
+    for frame, decoded_info, found in pool.get_results():
+        print(decoded_info)
+    pool.close()
+"""
+
+import os
+import queue
+import threading
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor, wait
+from multiprocessing import shared_memory
+import numpy as np
+from barcode_locator import decode_frame, LOCATE_WIDTH
+
+NUMBER_SLOTS = 2  # Slots of shared memory for each process: one frame decoded and one waiting.
+
+DecodedCode = namedtuple('DecodedCode', ['data', 'rect'])  # Barcode decoded by a process (data as bytes, rect as (x, y, w, h)).
+
+_attached = {}  # Slots of shared memory attached by a process, by name (only the ones of the last generation).
+_attached_generation = None
+
+def _attach(slot_name: str, generation: int) -> shared_memory.SharedMemory:
+    """Attach a slot of shared memory in a process of the pool, only the first time it is used.
+
+    The slots of the older generations (deleted by the main process when the slots are created again) are closed.
+    """
+
+    global _attached_generation
+    if generation != _attached_generation:
+        for slot in _attached.values():
+            slot.close()
+        _attached.clear()
+        _attached_generation = generation
+
+    if slot_name not in _attached:
+        _attached[slot_name] = shared_memory.SharedMemory(name=slot_name)  # Deleted by the main process in DecodePool.close().
+    return _attached[slot_name]
+
+def _decode_slot(slot_name: str, generation: int, shape: tuple, dtype: str, full_frame: bool, locate_width: int) -> tuple:
+    """Decode the frame in a slot of shared memory, called in the processes of the pool."""
+
+    frame = np.ndarray(shape, dtype=dtype, buffer=_attach(slot_name, generation).buf)
+    decoded_info, found = decode_frame(frame, full_frame, locate_width)
+    return [DecodedCode(code.data, tuple(code.rect)) for code in decoded_info], found
+
+class DecodePool:
+    """DecodePool decodes the barcodes of the frames in a pool of processes, passing the frames in shared memory.
+
+    Attributes:
+        workers (int): number of processes.
+        locate_width (int): width of the downscaled frame used for the localization.
+    """
+
+    def __init__(self, workers: int = None, locate_width: int = LOCATE_WIDTH):
+        """Initialize DecodePool with workers and locate_width.
+
+        Args:
+            workers (int): number of processes, None for the number of processors less one (used by the user interface and the camera).
+            locate_width (int): width of the downscaled frame used for the localization.
+        """
+
+        self.workers = workers or max(1, (os.cpu_count() or 2) - 1)
+        self.locate_width = locate_width
+
+        self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        self._slots = []  # Blocks of shared memory, created with the size of the first frame (and again for larger frames).
+        self._generation = 0  # Generation of the slots, increased every time they are created.
+        self._free_slots = queue.Queue()
+        self._pending = deque()  # Tuples (frame, future) in the order the frames were submitted.
+        self._lock = threading.Lock()
+        self._user_lock = threading.Lock()  # Held by the thread using the pool, see acquire().
+
+    def _create_slots(self, size: int):
+        """Create the slots of shared memory, each one of size bytes."""
+
+        self._generation += 1
+        for _ in range(self.workers * NUMBER_SLOTS):
+            slot = shared_memory.SharedMemory(create=True, size=size)
+            self._slots.append(slot)
+            self._free_slots.put(slot)
+
+    def _delete_slots(self):
+        """Close and delete the slots of shared memory."""
+
+        for slot in self._slots:
+            slot.close()
+            slot.unlink()
+        self._slots = []
+
+    def _resize_slots(self, size: int):
+        """Wait until every slot is free (the frames being decoded are finished), then create the slots again of size bytes.
+
+        The results of the frames already decoded stay in the pending ones, they do not use the slots.
+        """
+
+        for _ in range(len(self._slots)):
+            self._free_slots.get()
+        self._delete_slots()
+        self._create_slots(size)
+
+    def acquire(self, timeout: float = None) -> bool:
+        """Reserve the pool for the calling thread, waiting until the previous user has released it.
+
+        submit(), get_results() and discard() are not safe if called by more threads: the decode thread of a detection
+        reserves the pool, so the thread of the previous detection still finishing a frame never mixes its frames with the new ones.
+
+        Arg:
+            timeout (float): maximum seconds to wait, None to wait without limit.
+
+        Return:
+            (bool): False if the pool has not been released within the timeout, otherwise True.
+        """
+
+        return self._user_lock.acquire(timeout=-1 if timeout is None else timeout)
+
+    def release(self):
+        """Release the pool reserved by acquire()."""
+
+        self._user_lock.release()
+
+    def submit(self, frame, full_frame: bool = False, timeout: float = None) -> bool:
+        """Copy a frame in a free slot and submit its decoding to the pool.
+
+        If all the slots are in use, wait until one is free (backpressure).
+
+        Args:
+            frame (np.ndarray): frame of the camera (BGR or grayscale).
+            full_frame (bool): True to decode the whole frame, False to decode only the candidate regions.
+            timeout (float): maximum seconds to wait for a free slot, None to wait without limit.
+
+        Return:
+            (bool): False if no slot has been freed within the timeout (the frame is not submitted), otherwise True.
+        """
+
+        if not self._slots:
+            self._create_slots(frame.nbytes)
+        elif frame.nbytes > self._slots[0].size:  # Larger frame: the slots are created again.
+            self._resize_slots(frame.nbytes)
+
+        try:
+            slot = self._free_slots.get(timeout=timeout)
+        except queue.Empty:
+            return False
+
+        np.ndarray(frame.shape, dtype=frame.dtype, buffer=slot.buf)[...] = frame
+        future = self._executor.submit(_decode_slot, slot.name, self._generation, frame.shape, frame.dtype.str, full_frame,
+                                       self.locate_width)
+        future.add_done_callback(lambda _: self._free_slots.put(slot))  # The slot is free when the process has decoded the frame.
+
+        with self._lock:
+            self._pending.append((frame, future))
+        return True
+
+    def get_results(self) -> list:
+        """Return the results of the decoded frames without waiting, in the order the frames were submitted.
+
+        A frame decoded before the frames submitted before it is returned only when they are decoded too.
+
+        Return:
+            (list): tuples (frame, decoded_info, found), see barcode_locator.decode_frame().
+        """
+
+        results = []
+        with self._lock:
+            while self._pending and self._pending[0][1].done():
+                frame, future = self._pending.popleft()
+                decoded_info, found = future.result()
+                results.append((frame, decoded_info, found))
+        return results
+
+    def pending(self) -> int:
+        """Return the number of frames submitted and not returned yet by get_results()."""
+
+        with self._lock:
+            return len(self._pending)
+
+    def discard(self):
+        """Wait for the frames still being decoded and discard their results (used when the detection stops)."""
+
+        with self._lock:
+            futures = [future for _, future in self._pending]
+            self._pending.clear()
+        wait(futures)
+
+    def close(self):
+        """Stop the processes and delete the slots of shared memory."""
+
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        with self._lock:
+            self._pending.clear()
+        self._delete_slots()
@@ -1,9 +1,13 @@
-"""This module contains the FilesCommandPanel implementation, a class containing a Combobox, a label and three buttons. 
+"""This module contains the FilesCommandPanel implementation, a class containing a Combobox, a label and five buttons. 
 
 Dependencies:
     tkinter 
-    openpyxl: library with writing and reading functionalities of Excel files.
-    configparser: library with configuration file reading functionality for exporting Excel files.
+    inventory_export: the module containing the functions that export the inventory files to Excel, CSV or Parquet files.
+    concurrent.futures: module used for the pool of processes exporting all the files.
+    threading: module used for submitting the exports of all the files outside the thread of the user interface.
+    inventory_import: the module containing the function that imports the records of a spreadsheet into a file.
+    check_values: the module containing the MP registry (registry) and the function that shows the keyboard.
+    spreadsheet_reader: the module containing the path of the report of the rejected rows and the message of the imports.
 
 Example:
     from files_command_panel import FilesCommandPanel
@@ -17,12 +21,18 @@ Example:
 import tkinter as tk 
 from tkinter import ttk
 from tkinter import messagebox
-import openpyxl
-import configparser
-from check_values import show_keyboard 
+from tkinter import filedialog
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from inventory_export import export_file, submit_all, read_settings
+from inventory_import import import_inventory
+from spreadsheet_reader import rejects_report_path, import_message
+from check_values import show_keyboard, registry
+
+POLL_MS = 200  # Milliseconds between two checks of the exports of all the files.
 
 class FilesCommandPanel (tk.Frame): 
-    """FilesCommandPanel is a frame containing a Combobox, a label and three buttons.
+    """FilesCommandPanel is a frame containing a Combobox, a label and five buttons.
 
     Each method related to the FilesManager data structure is associated with a button.
 
@@ -31,6 +41,8 @@ class FilesCommandPanel (tk.Frame):
         button_add (tk.Button): button for adding files.
         button_delete (tk.Button): button for deleting files.
         button_export (tk.Button): button for exporting files.
+        button_export_all (tk.Button): button for exporting all the files.
+        button_import (tk.Button): button for importing the records of a spreadsheet into a file.
     """
 
     def __init__(self, master_window: tk.Tk):
@@ -48,14 +60,14 @@ class FilesCommandPanel (tk.Frame):
         self.relief = 'solid'
         self.borderwidth = 1
         self._padx = 30
-        self._pady = 30 
+        self._pady = 15  # The panel contains five buttons.
 
         # Combobox border.
         self.style_combobox = ttk.Style()
         self.style_combobox.theme_use('default')
         self.style_combobox.configure('Custom.TCombobox', relief='solid', borderwidth=3)
 
-        for i in range(5):
+        for i in range(7):
             self.rowconfigure(index=i, weight=1)
              
         self.columnconfigure(index=0, weight=1)
@@ -66,6 +78,7 @@ class FilesCommandPanel (tk.Frame):
         self.files_choice = ttk.Combobox(master=self, style='Custom.TCombobox', values=[], font=self._frame_font)
         self.files_choice.grid(row=1, column=0) 
         self.files_choice.bind('<Button-1>', show_keyboard)
+        self.files_choice.bind('<<ComboboxSelected>>', self.load_selected_file)
 
         self.button_add = tk.Button(master=self, text='Aggiungi File', relief=self.relief, borderwidth=self.borderwidth, font=self._frame_font, command=self.create_file) 
         self.button_add.grid(row=2, column=0, sticky='nswe', padx=self._padx, pady=self._pady)
@@ -73,6 +86,20 @@ class FilesCommandPanel (tk.Frame):
         self.button_delete.grid(row=3, column=0, sticky='nswe', padx=self._padx, pady=self._pady)
         self.button_export = tk.Button(master=self, text='Esporta File', relief=self.relief, borderwidth=self.borderwidth, font=self._frame_font, command=self.export_file) 
         self.button_export.grid(row=4, column=0, sticky='nswe', padx=self._padx, pady=self._pady)
+        self.button_export_all = tk.Button(master=self, text='Esporta Tutti', relief=self.relief, borderwidth=self.borderwidth, font=self._frame_font, command=self.export_all_files) 
+        self.button_export_all.grid(row=5, column=0, sticky='nswe', padx=self._padx, pady=self._pady)
+        self.button_import = tk.Button(master=self, text='Importa File', relief=self.relief, borderwidth=self.borderwidth, font=self._frame_font, command=self.import_file) 
+        self.button_import.grid(row=6, column=0, sticky='nswe', padx=self._padx, pady=self._pady)
+
+        self._executor = None  # Pool of processes of the running export of all the files.
+        self._export_futures = {}
+        self._submit_thread = None  # Thread submitting the exports of all the files to the pool.
+        self._submit_error = None
+
+    def load_selected_file(self, event=None):
+        """Load the content of the file selected in the Combobox, the files are saved separately and loaded only when used."""
+
+        self.master.files_manager.load_file(self.files_choice.get())
 
     def create_file(self):
         """Create and add the file specified by the user in the Combobox."""       
@@ -103,50 +130,120 @@ class FilesCommandPanel (tk.Frame):
                  messagebox.showerror(title='Errore!', message='File inesistente.')
 
     def export_file(self):
-        """Export a file specified by the user in the Combobox to an Excel file.
+        """Export a file specified by the user in the Combobox to an Excel, CSV or Parquet file (option 'format' of export.ini).
         
-        In the Excel file, the articles are listed in alphabetical order and the respective quantities in ascending order. 
+        In the exported file, the articles are listed in alphabetical order and the respective quantities in ascending order. 
         
-        Use of the openpyxl library for inserting codes as strings in the Excel sheet.
+        The rows are streamed to the file by inventory_export, and the codes are written as strings.
         Example:
             article code: '00010012' 
-            if openpyxl is used: '00010012' (str) in Excel
-            if openpyxl is not used: '10012' (int) in Excel
+            written as string: '00010012' (str) in Excel
+            written as number: '10012' (int) in Excel
         """
 
-        configuration_file = configparser.ConfigParser()
-        configuration_file.read('C:\\Users\\lara_\\OneDrive\\Desktop\\AppInventario\\AppInventario\\export.ini')
-        dest_path = configuration_file['EXPORT']['destination'] 
-
         file_to_export = self.files_choice.get()
 
         if file_to_export not in self.master.files_manager.files:
             messagebox.showerror(title='Errore!', message='File inesistente.')
 
         else:
-            sorted_art = sorted(self.master.files_manager.files[file_to_export].dict_articoli.keys())  # The articles are sorted in alphabetical order.
+            try:
+                dest_path, export_format = read_settings()  # Destination folder and format in export.ini.
+                export_file(self.master.files_manager.files[file_to_export], dest_path + file_to_export, export_format)  # Save the file in the specified path. 
+            except (ImportError, ValueError) as error:
+                messagebox.showerror(title='Errore!', message=str(error))
+            else:
+                messagebox.showinfo(title='Successo!', message='File esportato con successo.')
 
-            sorted_file = {}  # New dictionary where sorted articles are inserted.
-            for art in sorted_art:
-                sorted_file[art] = self.master.files_manager.files[file_to_export].dict_articoli[art]  # Path indicating the qty list of art in the file_to_export.
+    def export_all_files(self):
+        """Export all the files in the format of export.ini, each one in a different process.
 
-            sorted_file = {art: sorted(map(int,qty)) for art, qty in sorted_file.items()}  # Qty are also sorted in ascending order by map() function for conversion to int.
+        The interface is not blocked: the exports are submitted to the pool by a background thread (the files already loaded
+        are serialized, see submit_all), then they are checked every POLL_MS milliseconds by check_export_all(),
+        and the button shows how many files have been exported.
+        """
 
-            file_workbook = openpyxl.Workbook()  # A Workbook is created to allow writing to an Excel file.
-        
-            file_worksheet = file_workbook.active  # Select the active worksheet.
+        if self._executor is not None:  # An export of all the files is already running.
+            return
+
+        if not self.master.files_manager.get_files():
+            messagebox.showerror(title='Errore!', message='Nessun file da esportare.')
+            return
+
+        try:
+            dest_path, export_format = read_settings()  # Destination folder and format in export.ini.
+        except ValueError as error:
+            messagebox.showerror(title='Errore!', message=str(error))
+            return
+
+        self._executor = ProcessPoolExecutor()
+        self._export_futures = {}
+        self._submit_error = None
+        self._submit_thread = threading.Thread(target=self._submit_exports, args=(dest_path, export_format), daemon=True)
+        self._submit_thread.start()
+        self.button_export_all.config(state='disabled')
+        self.after(POLL_MS, self.check_export_all)
+
+    def _submit_exports(self, dest_path: str, export_format: str):
+        """Submit the exports of all the files to the pool, called in the background thread."""
+
+        try:
+            self._export_futures = submit_all(self.master.files_manager, dest_path, export_format, self._executor)
+        except Exception as error:
+            self._submit_error = error
+
+    def check_export_all(self):
+        """Show the progress of the export of all the files, then schedule the next check until every file is exported."""
+
+        if self._submit_thread.is_alive():  # The exports are still being submitted.
+            self.after(POLL_MS, self.check_export_all)
+            return
+
+        done = [file_name for file_name, future in self._export_futures.items() if future.done()]
+        self.button_export_all.config(text='Esportati ' + str(len(done)) + '/' + str(len(self._export_futures)) + ' file')
+
+        if len(done) < len(self._export_futures):
+            self.after(POLL_MS, self.check_export_all)
+            return
+
+        self._executor.shutdown()
+        self._executor = None
+        self._submit_thread = None
+        failed = [file_name for file_name, future in self._export_futures.items() if future.exception() is not None]
+        self._export_futures = {}
+        self.button_export_all.config(text='Esporta Tutti', state='normal')
+
+        if self._submit_error is not None:
+            messagebox.showerror(title='Errore!', message='Esportazione non riuscita: ' + str(self._submit_error))
+        elif failed:
+            messagebox.showerror(title='Errore!', message='File non esportati: ' + ', '.join(failed) + '.')
+        else:
+            messagebox.showinfo(title='Successo!', message='File esportati con successo.')
 
-            header = ['Articolo', 'Quantita\'']
-            file_worksheet.append(header)
+    def import_file(self):
+        """Import the records of a spreadsheet (Excel or CSV file) chosen by the user into the file selected in the Combobox.
 
-            for art in sorted_file:
-                for qty in sorted_file[art]:
-                    record = [art, qty]
-                    file_worksheet.append(record)
+        The rejected rows are saved in a CSV report next to the spreadsheet (see spreadsheet_reader.rejects_report_path()).
+        """
 
-            file_workbook.save(dest_path + file_to_export + '.xlsx')  # Save the Excel file in the specified path. 
-        
-            messagebox.showinfo(title='Successo!', message='File esportato con successo.')
+        file_to_import = self.files_choice.get()
+
+        if file_to_import not in self.master.files_manager.files:
+            messagebox.showerror(title='Errore!', message='File inesistente.')
+            return
+
+        file_path = filedialog.askopenfilename(title='Importa File', filetypes=[('Excel o CSV', '*.xlsx *.xlsm *.csv'), ('Tutti i file', '*.*')])
+        if not file_path:
+            return
+
+        rejects_path = rejects_report_path(file_path)
+        added, rejected = import_inventory(file_path, self.master.files_manager, file_to_import, registry, rejects_path)
+
+        message = import_message('Record importati', added, rejected, rejects_path)
+        if rejected:
+            messagebox.showwarning(title='Attenzione!', message=message)
+        else:
+            messagebox.showinfo(title='Successo!', message=message)
 
 
 
@@ -0,0 +1,289 @@
+"""This module contains the FilesJournal implementation, a class that saves the changes of FilesManager in an append-only journal.
+
+Every operation on FilesManager (file created or deleted, record inserted, deleted or modified) is appended to the journal
+as a JSON line with a sequence number. The writes are synchronized with the disk (fsync) in groups:
+every SYNC_OPS operations, when sync() is called (the App calls it every second) and when the journal is closed.
+
+At startup the manifest of the saved files (see files_store.FilesStore) is read, without loading the files,
+and the journal is replayed on it: only the files touched by the operations of the journal are loaded.
+When the journal reaches COMPACT_OPS operations (each record of an 'insert_list' operation counts as one),
+and when the journal is closed, the files changed since they were last saved (dirty files) are written in new shards,
+the manifest is updated and the journal is emptied: the journal is renamed (suffix '.old') and a new one is started, so the operations are never stopped for long.
+The manifest contains the sequence number of its last operation, so the operations already contained in the shards are skipped
+if the application stops during the compaction.
+
+Dependencies:
+    files_manager: FilesManager implementation.
+    files_store: FilesStore implementation.
+    pickle
+    json
+    threading
+    os
+    metrics: the module containing the counters and the latency histograms of the App.
+
+Example:
+    from files_manager import FilesManager
+    from files_store import FilesStore
+    from files_journal import FilesJournal
+
+    files_manager = FilesManager()
+    journal = FilesJournal(files_manager, FilesStore('salvataggio_progressi'), 'giornale.log')
+    journal.open()
+
+    files_manager.insert_file('inventario1')
+    files_manager.insert_record('inventario1', ('90515689', '1000'))
+
+    journal.close()
+"""
+
+import os
+import json
+import pickle
+import threading
+from files_manager import FilesManager
+from files_store import FilesStore
+import metrics
+
+SYNC_OPS = 50  # Number of operations after which the journal is synchronized with the disk.
+COMPACT_OPS = 5000  # Number of operations (records for 'insert_list') after which the dirty files are saved and the journal is emptied.
+
+def _op_size(operation: str, args: list) -> int:
+    """Return how much an operation counts towards COMPACT_OPS: the number of records for 'insert_list', otherwise 1."""
+
+    return len(args[0]) if operation == 'insert_list' else 1
+
+class FilesJournal:
+    """FilesJournal is the append-only journal of the operations on FilesManager.
+
+    Attributes:
+        files_manager (FilesManager): data structure whose operations are written in the journal.
+        store (FilesStore): folder where the files are saved, one shard for each file.
+        journal_path (str): path of the journal.
+    """
+
+    def __init__(self, files_manager: FilesManager, store: FilesStore, journal_path: str):
+        """Initialize FilesJournal with files_manager, store and journal_path.
+
+        Args:
+            files_manager (FilesManager): data structure whose operations are written in the journal.
+            store (FilesStore): folder where the files are saved, one shard for each file.
+            journal_path (str): path of the journal.
+        """
+
+        self.files_manager = files_manager
+        self.store = store
+        self.journal_path = journal_path
+
+        self._journal_file = None
+        self._lock = threading.Lock()  # Lock held while the journal file is written, synchronized or renamed.
+        self._seq = 0  # Sequence number of the last operation.
+        self._unsynced_ops = 0
+        self._journal_ops = 0  # Operations in the journal since the last compaction.
+        self._compaction = None  # Thread of the running compaction.
+        self._entries = {}  # Entries of the files in the manifest.
+
+    @metrics.timed('journal.open')
+    def open(self):
+        """Read the manifest into FilesManager (the files are loaded when used), replay the journal and start writing the new operations.
+
+        The files saved by the previous versions (dati_salvati.pkl) are read only if the manifest does not exist,
+        and are saved in the shards before starting.
+        """
+
+        has_manifest = self.load(truncate=True)
+
+        self._journal_file = open(self.journal_path, 'a', encoding='utf-8')
+        self.files_manager.journal = self
+
+        if not has_manifest or os.path.exists(self.journal_path + '.old'):
+            # The migration or the interrupted compaction is completed before the App starts.
+            self.compact()
+
+    def load(self, truncate: bool = False) -> bool:
+        """Read the manifest into FilesManager (the files are loaded when used) and replay the journal, without writing anything.
+
+        Called by open(), or alone to read the saved data without changing them (e.g. by the command line, see cli).
+
+        Arg:
+            truncate (bool): True to remove the incomplete last line of the journal (the application stopped while writing it).
+
+        Return:
+            (bool): False if the manifest does not exist (the files are read from dati_salvati.pkl), otherwise True.
+        """
+
+        files_manager = self.files_manager
+        files_manager.files.loader = self.store.load_shard
+
+        manifest = self.store.read_manifest()
+        if manifest is not None:
+            snapshot_seq, self._entries = manifest
+            for file_name, entry in self._entries.items():
+                files_manager.set_unloaded_file(file_name, entry, self.store.load_shard)
+        else:
+            snapshot_seq, loading_data = self.store.read_legacy() or (0, {})
+            files_manager.files.update(loading_data)
+            files_manager.dirty.update(loading_data)
+
+        self._seq = snapshot_seq
+        for path in (self.journal_path + '.old', self.journal_path):  # The old journal exists if a compaction was interrupted.
+            self._replay(path, snapshot_seq, truncate)
+
+        return manifest is not None
+
+    def _replay(self, path: str, snapshot_seq: int, truncate: bool = True):
+        """Apply the operations of a journal with sequence number greater than the one of the manifest.
+
+        An incomplete last line (the application stopped while writing it) is removed from the journal if truncate is True.
+        """
+
+        if not os.path.exists(path):
+            return
+
+        files_manager = self.files_manager
+        valid_size = 0
+        with open(path, 'rb') as journal:
+            for line in journal:
+                try:
+                    if not line.endswith(b'\n'):
+                        raise ValueError
+                    seq, operation, file_name, *args = json.loads(line)
+                except ValueError:
+                    break
+                valid_size += len(line)
+
+                if seq <= snapshot_seq:
+                    continue
+
+                if operation == 'insert_file':
+                    files_manager.insert_file(file_name)
+                elif operation == 'delete_file':
+                    files_manager.delete_file(file_name)
+                elif operation == 'insert':
+                    files_manager.insert_record(file_name, tuple(args))
+                elif operation == 'delete':
+                    files_manager.delete_qty(file_name, tuple(args))
+                elif operation == 'modify':
+                    files_manager.modify_record(file_name, tuple(args))
+                elif operation == 'insert_list':
+                    files_manager.insert_records_list(file_name, [tuple(record) for record in args[0]])
+
+                self._seq = seq
+                self._journal_ops += _op_size(operation, args)
+
+        if truncate and valid_size < os.path.getsize(path):
+            os.truncate(path, valid_size)
+
+    def append(self, operation: tuple):
+        """Append an operation to the journal, called by FilesManager while holding its lock.
+
+        Arg:
+            operation (tuple): tuple (operation name, filename, arguments...).
+        """
+
+        with self._lock:
+            self._seq += 1
+            self._journal_file.write(json.dumps([self._seq, *operation]) + '\n')
+            self._unsynced_ops += 1
+            self._journal_ops += _op_size(operation[0], operation[2:])
+
+            if self._unsynced_ops >= SYNC_OPS:
+                self._sync()
+
+        if self._journal_ops >= COMPACT_OPS and self._compaction is None:
+            self._compaction = threading.Thread(target=self.compact, daemon=True)
+            self._compaction.start()
+
+    def _sync(self):
+        """Write the buffered operations to the disk, called while holding the lock of the journal."""
+
+        if self._unsynced_ops:
+            self._journal_file.flush()
+            os.fsync(self._journal_file.fileno())
+            self._unsynced_ops = 0
+
+    def sync(self):
+        """Write the buffered operations to the disk (group commit)."""
+
+        with self._lock:
+            if self._journal_file is not None:
+                self._sync()
+
+    def _rotate(self):
+        """Move the operations of the journal into the old journal and start a new one, called while holding the lock of the journal."""
+
+        old_path = self.journal_path + '.old'
+        self._sync()
+        self._journal_file.close()
+        if os.path.exists(old_path):  # The old journal of an interrupted compaction keeps its operations too.
+            with open(self.journal_path, 'rb') as journal, open(old_path, 'ab') as old_journal:
+                old_journal.write(journal.read())
+                old_journal.flush()
+                os.fsync(old_journal.fileno())
+            os.remove(self.journal_path)
+        else:
+            os.replace(self.journal_path, old_path)
+        self._journal_file = open(self.journal_path, 'a', encoding='utf-8')
+        self._journal_ops = 0
+
+    @metrics.timed('journal.compact')
+    def compact(self):
+        """Write the dirty files in new shards and update the manifest, then delete the old journal.
+
+        The files not changed since they were last saved keep their shard and are not loaded.
+        Only the renaming of the journal and the serialization of the dirty files are done holding the lock of FilesManager,
+        the shards are written to the disk while the operations continue in the new journal.
+        """
+
+        files_manager = self.files_manager
+        dirty_files = {}
+        try:
+            with files_manager.lock:
+                with self._lock:
+                    self._rotate()
+                    snapshot_seq = self._seq
+                for file_name in files_manager.dirty:
+                    articles_manager = files_manager.files[file_name]
+                    dirty_files[file_name] = (pickle.dumps(articles_manager), articles_manager.get_totals())
+                file_names = list(files_manager.files)
+                files_manager.dirty.clear()
+
+            entries = {}
+            for file_name in file_names:
+                if file_name in dirty_files:
+                    data, (records, pieces) = dirty_files[file_name]
+                    entries[file_name] = {'shard': self.store.write_shard(data), 'records': records, 'pieces': pieces}
+                else:
+                    entries[file_name] = self._entries[file_name]
+            self.store.write_manifest(snapshot_seq, entries)
+
+            # Shards of the rewritten and deleted files.
+            used_shards = {entry['shard'] for entry in entries.values()}
+            self.store.remove_shards([entry['shard'] for entry in self._entries.values() if entry['shard'] not in used_shards])
+            self._entries = entries
+            os.remove(self.journal_path + '.old')
+        except BaseException:
+            with files_manager.lock:  # The files not saved are written by the next compaction.
+                files_manager.dirty.update(file_name for file_name in dirty_files if file_name in files_manager.files)
+            raise
+        finally:
+            self._compaction = None
+
+    @metrics.timed('journal.close')
+    def close(self):
+        """Save the dirty files, then synchronize the journal with the disk and close it.
+
+        A running compaction is waited for, then only the files changed since they were last saved are written.
+        """
+
+        compaction = self._compaction
+        if compaction is not None:
+            compaction.join()
+
+        if self._journal_ops or self.files_manager.dirty:
+            self.compact()
+
+        with self._lock:
+            self._sync()
+            self._journal_file.close()
+            self._journal_file = None
+        self.files_manager.journal = None
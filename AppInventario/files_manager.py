@@ -2,6 +2,10 @@
 
 Dependencies:
     articles_manager: ArticlesManager implementation.  
+    threading: module used for the lock that protects the data structure during the compaction of the journal.
+
+The files can be loaded lazily: a file saved in its own shard (see files_store.FilesStore) is represented by a placeholder
+with its totals, and its content is loaded the first time the file is used.
 
 Example:
     from files_manager import FilesManager
@@ -11,12 +15,50 @@ Example:
 
     obj.delete_file('inventario1')
 
-    obj.files['inventario1'].insert_records_list([('12567345','500'), ('67241568', '1000')])
+    obj.insert_records_list('inventario1', [('12567345','500'), ('67241568', '1000')])
     ret = obj.export_file('inventario1')
 """
 
+import threading
 from articles_manager import ArticlesManager
 
+LOG_CHUNK_RECORDS = 10000  # Maximum number of records of an 'insert_list' operation written in the journal.
+
+class _NotLoaded:
+    """Placeholder of a file not loaded yet, with its entry in the manifest (shard and totals)."""
+
+    __slots__ = ('entry',)
+
+    def __init__(self, entry: dict):
+        self.entry = entry
+
+    def get_totals(self) -> tuple:
+        return (self.entry['records'], self.entry['pieces'])
+
+class _LazyFiles(dict):
+    """Dictionary of the files that loads the content of a file (calling loader with its entry) the first time it is read."""
+
+    def __init__(self):
+        dict.__init__(self)
+        self.loader = None
+
+    def __getitem__(self, file_name: str):
+        value = dict.__getitem__(self, file_name)
+        if isinstance(value, _NotLoaded):
+            value = self.loader(value.entry)
+            dict.__setitem__(self, file_name, value)
+        return value
+
+    def peek(self, file_name: str):
+        """Return the content of a file without loading it (ArticlesManager or placeholder)."""
+
+        return dict.__getitem__(self, file_name)
+
+    def is_loaded(self, file_name: str) -> bool:
+        """Return True if the content of the file has been loaded."""
+
+        return not isinstance(dict.__getitem__(self, file_name), _NotLoaded)
+
 class FilesManager:
     """FilesManager is the data structure representing the inventories of different areas in MP.
 
@@ -24,14 +66,58 @@ class FilesManager:
     - key (str): filename
     - value (ArticlesManager): ArticlesManager object representing the content of an inventory file.
 
+    The methods that modify the files (insert_file, delete_file, insert_record, delete_qty, modify_record, insert_records_list)
+    write each operation in the journal, if one is attached (see files_journal.FilesJournal),
+    and mark the file as dirty (changed since it was last saved).
+
     Attributes:
-        files (dict): dictionary containing the different inventory files.
+        files (dict): dictionary containing the different inventory files, loaded the first time they are read.
+        journal (FilesJournal): journal where the operations are written, None if the operations are not written.
+        lock (threading.RLock): lock held while a file is modified.
+        dirty (set): filenames changed since they were last saved.
     """
 
     def __init__(self):
         """Initialize FilesManager."""
 
-        self.files = {}
+        self.files = _LazyFiles()
+        self.journal = None
+        self.lock = threading.RLock()
+        self.dirty = set()
+
+    def set_unloaded_file(self, file_name: str, entry: dict, loader):
+        """Add a file whose content is loaded only when it is used.
+
+        Args:
+            file_name (str): filename.
+            entry (dict): entry of the file in the manifest, with keys 'shard', 'records' and 'pieces'.
+            loader (callable): function that returns the ArticlesManager of the file, given its entry.
+        """
+
+        self.files.loader = loader
+        dict.__setitem__(self.files, file_name, _NotLoaded(entry))
+
+    def load_file(self, file_name: str) -> bool:
+        """Load the content of an existing file, if it has not been loaded yet.
+
+        Arg:
+            file_name (str): filename.
+
+        Return:
+            bool: False if the file doesn't exist, otherwise True.
+        """
+
+        if file_name not in self.files:
+            return False
+
+        self.files[file_name]
+        return True
+
+    def _log(self, *operation):
+        """Write an operation in the journal, if one is attached."""
+
+        if self.journal is not None:
+            self.journal.append(operation)
 
     def insert_file(self, file_name: str) -> bool:
         """Inserted a filename, create a new key in FilesManager.
@@ -51,7 +137,10 @@ class FilesManager:
         if file_name in self.files:
             return False
         
-        self.files[file_name] = ArticlesManager()
+        with self.lock:
+            self.files[file_name] = ArticlesManager()
+            self.dirty.add(file_name)
+            self._log('insert_file', file_name)
         return True
 
     def delete_file (self, file_name: str) -> bool:
@@ -73,7 +162,127 @@ class FilesManager:
         if file_name not in self.files:
             return False
    
-        del self.files[file_name]
+        with self.lock:
+            del self.files[file_name]
+            self.dirty.discard(file_name)
+            self._log('delete_file', file_name)
+        return True
+
+    def insert_record(self, file_name: str, record: tuple) -> bool:
+        """Given a tuple, insert the record into an existing file.
+
+        Args:
+            file_name (str): filename.
+            record (tuple): tuple (article, quantity) to insert.
+
+        Return:
+            bool: False if the file doesn't exist, otherwise True.
+
+        Example:
+            >>> obj = FilesManager()
+            >>> obj.insert_file('inventario1')
+            >>> obj.insert_record('inventario1', ('90515689','1000'))
+            True
+        """
+
+        if file_name not in self.files:
+            return False
+
+        with self.lock:
+            self.files[file_name].insert_record(record)
+            self.dirty.add(file_name)
+            self._log('insert', file_name, *record)
+        return True
+
+    def delete_qty(self, file_name: str, record: tuple) -> bool:
+        """Given a tuple, delete the quantity of record from an existing file.
+
+        Args:
+            file_name (str): filename.
+            record (tuple): tuple (article, quantity) with quantity to delete.
+
+        Return:
+            bool: False if the file doesn't exist, if the article is not in the file or if the quantity is not present in the article,
+            otherwise True.
+
+        Example:
+            >>> obj = FilesManager()
+            >>> obj.insert_file('inventario1')
+            >>> obj.insert_record('inventario1', ('90515689','1000'))
+            >>> obj.delete_qty('inventario1', ('90515689','1000'))
+            True
+        """
+
+        if file_name not in self.files:
+            return False
+
+        with self.lock:
+            ret = self.files[file_name].delete_qty(record)
+            if ret:
+                self.dirty.add(file_name)
+                self._log('delete', file_name, *record)
+        return ret
+
+    def modify_record(self, file_name: str, record: tuple) -> bool:
+        """Given a tuple, modify a quantity of an article in an existing file.
+
+        Args:
+            file_name (str): filename.
+            record (tuple): tuple (article, old_quantity, new_quantity).
+
+        Return:
+            bool: False if the file doesn't exist, if the article is not in the file or if the old_quantity is not present in the article,
+            otherwise True.
+
+        Example:
+            >>> obj = FilesManager()
+            >>> obj.insert_file('inventario1')
+            >>> obj.insert_record('inventario1', ('90515689','1000'))
+            >>> obj.modify_record('inventario1', ('90515689','1000','500'))
+            True
+        """
+
+        if file_name not in self.files:
+            return False
+
+        with self.lock:
+            ret = self.files[file_name].modify_record(record)
+            if ret:
+                self.dirty.add(file_name)
+                self._log('modify', file_name, *record)
+        return ret
+
+    def insert_records_list(self, file_name: str, lista_val: list) -> bool:
+        """Given a list of tuples, insert all records into an existing file.
+
+        The list is written in the journal as operations of LOG_CHUNK_RECORDS records at most, so each line of the journal stays short.
+
+        Args:
+            file_name (str): filename.
+            lista_val (list): list of tuples (article, quantity) to insert.
+
+        Return:
+            bool: False if the file doesn't exist or if the list is empty, otherwise True.
+
+        Raise:
+            ValueError: if a quantity cannot be stored (see ArticlesManager.insert_records_list):
+            no record of the list is inserted and nothing is written in the journal.
+
+        Example:
+            >>> obj = FilesManager()
+            >>> obj.insert_file('inventario1')
+            >>> obj.insert_records_list('inventario1', [('12567345','500'), ('67241568', '1000')])
+            True
+        """
+
+        if file_name not in self.files or not lista_val:
+            return False
+
+        with self.lock:
+            self.files[file_name].insert_records_list(lista_val)
+            self.dirty.add(file_name)
+            for start in range(0, len(lista_val), LOG_CHUNK_RECORDS):
+                self._log('insert_list', file_name, [list(record) for record in lista_val[start:start + LOG_CHUNK_RECORDS]])
         return True
 
     def export_file(self, file_name: str) -> list:
@@ -88,7 +297,7 @@ class FilesManager:
         Example:
             >>> obj = FilesManager()
             >>> obj.insert_file('inventario1')
-            >>> obj.files['inventario1'].insert_records_list([('12567345','500'), ('67241568', '1000')])
+            >>> obj.insert_records_list('inventario1', [('12567345','500'), ('67241568', '1000')])
             >>> obj.export_file('inventario1')
             [('12567345','500'), ('67241568', '1000')]
         """
@@ -96,10 +305,8 @@ class FilesManager:
         if file_name not in self.files:
             return []
         
-        lista_articoli = []
-        for articolo in self.files[file_name].dict_articoli:  # Path indicating ArticlesManager of the file to export.
-            for qty in self.files[file_name].dict_articoli[articolo]:  # Path indicating qty list of an article in the file to export.
-                lista_articoli.append((articolo,qty))
+        # Each quantity is repeated as many times as its records, and converted to string as inserted by the user.
+        lista_articoli = [(articolo, str(qty)) for articolo, qty in self.files[file_name].iter_records()]
 
         return lista_articoli 
 
@@ -117,3 +324,47 @@ class FilesManager:
 
         return list(self.files.keys())
 
+    def get_file_totals(self, file_name: str) -> tuple:
+        """Return the number of records and the number of pieces of an existing file.
+
+        Arg:
+            file_name (str): filename.
+
+        Return:
+            tuple (records, pieces): (0, 0) if the file doesn't exist.
+
+        Example:
+            >>> obj = FilesManager()
+            >>> obj.insert_file('inventario1')
+            >>> obj.insert_records_list('inventario1', [('12567345','500'), ('67241568', '1000')])
+            >>> obj.get_file_totals('inventario1')
+            (2, 1500)
+        """
+
+        if file_name not in self.files:
+            return (0, 0)
+
+        return self.files.peek(file_name).get_totals()  # The totals of a file not loaded are in the manifest.
+
+    def get_totals(self) -> tuple:
+        """Return the number of records and the number of pieces of all the files (all the areas).
+
+        The totals of each file are kept updated by ArticlesManager (or saved in the manifest for the files not loaded),
+        so the cost depends only on the number of files and no file is loaded.
+
+        Return:
+            tuple (records, pieces).
+
+        Example:
+            >>> obj = FilesManager()
+            >>> obj.get_totals()
+            (2, 1500)
+        """
+
+        records = 0
+        pieces = 0
+        for articles_manager in self.files.values():
+            file_records, file_pieces = articles_manager.get_totals()
+            records += file_records
+            pieces += file_pieces
+        return (records, pieces)
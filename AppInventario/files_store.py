@@ -0,0 +1,146 @@
+"""This module contains the FilesStore implementation, a class that saves each inventory file in its own pickle binary file (shard).
+
+The folder of the saved data contains:
+- manifest.json: sequence number of the last operation of the journal contained in the shards and, for each file,
+  the name of its shard and its totals (records and pieces), so the totals are known without loading the file.
+- archivi: folder of the shards, one for each file.
+
+A shard is never overwritten: a changed file is written in a new shard and the manifest, replaced at the end,
+points to the new shards. So an interruption while saving leaves the previous manifest and shards valid.
+
+The data saved by the previous versions (dati_salvati.pkl, with all the files) are read only if the manifest does not exist.
+
+Dependencies:
+    pickle
+    json
+    uuid: module used for the names of the shards.
+    os
+    metrics: the module containing the counters and the latency histograms of the App.
+
+Example:
+    from files_store import FilesStore
+
+    obj = FilesStore('salvataggio_progressi')
+    seq, entries = obj.read_manifest()
+    articles_manager = obj.load_shard(entries['inventario1'])
+"""
+
+import os
+import json
+import uuid
+import pickle
+import metrics
+
+class FilesStore:
+    """FilesStore is the folder where the inventory files are saved, one pickle binary file (shard) for each file.
+
+    Attributes:
+        folder_path (str): path of the folder of the saved data.
+        manifest_path (str): path of the manifest.
+        shards_path (str): path of the folder of the shards.
+        legacy_path (str): path of the pickle binary file saved by the previous versions.
+    """
+
+    def __init__(self, folder_path: str):
+        """Initialize FilesStore with folder_path.
+
+        Arg:
+            folder_path (str): path of the folder of the saved data.
+        """
+
+        self.folder_path = folder_path
+        self.manifest_path = os.path.join(folder_path, 'manifest.json')
+        self.shards_path = os.path.join(folder_path, 'archivi')
+        self.legacy_path = os.path.join(folder_path, 'dati_salvati.pkl')
+
+    def read_manifest(self) -> tuple:
+        """Read the manifest.
+
+        Return:
+            tuple (seq, entries): None if the manifest does not exist.
+            entries (dict) is organized as follows: key (str) filename, value (dict) with keys 'shard', 'records' and 'pieces'.
+        """
+
+        if not os.path.exists(self.manifest_path):
+            return None
+
+        with open(self.manifest_path, encoding='utf-8') as manifest:
+            data = json.load(manifest)
+        return (data['seq'], data['files'])
+
+    def read_legacy(self) -> tuple:
+        """Read the pickle binary file saved by the previous versions.
+
+        Return:
+            tuple (seq, files): None if the file does not exist, files (dict) contains the ArticlesManager of each filename.
+        """
+
+        if not os.path.exists(self.legacy_path):
+            return None
+
+        with open(self.legacy_path, 'rb') as saved_data:
+            loading_data = pickle.load(saved_data)
+        if isinstance(loading_data, tuple):  # Snapshot with the sequence number of the journal.
+            return loading_data
+        return (0, loading_data)
+
+    @metrics.timed('store.load_shard')
+    def load_shard(self, entry: dict):
+        """Load a file from its shard.
+
+        Arg:
+            entry (dict): entry of the file in the manifest.
+
+        Return:
+            (ArticlesManager): content of the file.
+        """
+
+        with open(os.path.join(self.shards_path, entry['shard']), 'rb') as shard:
+            return pickle.load(shard)
+
+    @metrics.timed('store.write_shard')
+    def write_shard(self, data: bytes) -> str:
+        """Write a new shard with the data (ArticlesManager serialized by pickle).
+
+        Arg:
+            data (bytes): content of the file serialized by pickle.
+
+        Return:
+            (str): name of the new shard.
+        """
+
+        os.makedirs(self.shards_path, exist_ok=True)
+        shard_name = uuid.uuid4().hex + '.pkl'
+        with open(os.path.join(self.shards_path, shard_name), 'wb') as shard:
+            shard.write(data)
+            shard.flush()
+            os.fsync(shard.fileno())
+        return shard_name
+
+    def write_manifest(self, seq: int, entries: dict):
+        """Write the manifest, replacing the old one only when the new one is complete.
+
+        Args:
+            seq (int): sequence number of the last operation of the journal contained in the shards.
+            entries (dict): entries of the files (see read_manifest()).
+        """
+
+        temp_path = self.manifest_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as manifest:
+            json.dump({'seq': seq, 'files': entries}, manifest)
+            manifest.flush()
+            os.fsync(manifest.fileno())
+        os.replace(temp_path, self.manifest_path)
+
+    def remove_shards(self, shard_names: list):
+        """Delete shards no longer referenced by the manifest.
+
+        Arg:
+            shard_names (list): names of the shards to delete.
+        """
+
+        for shard_name in shard_names:
+            try:
+                os.remove(os.path.join(self.shards_path, shard_name))
+            except OSError:
+                pass
@@ -0,0 +1,362 @@
+"""This module contains the frame sources that replace the PC camera, so the detection can be repeated without a person
+in front of the camera (e.g. for benchmark_scan on a Linux PC without camera).
+
+- VideoFileSource: frames of a recorded video.
+- ImageFolderSource: images of a folder, in alphabetical order.
+- SyntheticSource: generated frames with the QR codes of an article and a quantity (labels), each label shown for some frames.
+  The pair of codes of each frame is known, so the codes read can be compared with the right ones.
+
+The sources have the same methods as CameraSession (open(), read(), release(), rotate), so they can be used by ScanPipeline.
+With realtime=True the frames are returned at the fps of the source, as a camera would do.
+source_from_config() returns the source written in camera.ini ('source'), or the CameraSession if it is empty.
+The random articles of SyntheticSource are not in the MP registry, so in the App they are always rejected by check_art:
+source_from_config() draws the articles of the labels from the registry (registry_labels()) when it is given.
+
+Dependencies:
+    cv2 (OpenCV): open source computer vision and machine learning software library.
+    numpy
+    camera_session: CameraSession implementation and camera settings.
+    configparser
+    os
+    random
+    time
+
+Example:
+    from frame_sources import SyntheticSource
+
+    source = SyntheticSource(labels = 20)
+    source.open()
+    ret, frame = source.read()
+    print(source.expected)  # Pair of codes of the frame, None if there is no label.
+"""
+
+import os
+import random
+import time
+import configparser
+import cv2
+import numpy as np
+from camera_session import CameraSession, CONFIG_PATH, read_camera_settings
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff')
+NOISE_FRAMES = 8  # Frames of noise generated once and added in turn, so the generation of the frames is fast as a camera.
+
+class _FileSource:
+    """Base class of the sources read from files, with the methods of CameraSession.
+
+    Attributes:
+        fps (float): frames per second of the source.
+        realtime (bool): True if read() waits so the frames are returned at fps, as a camera would do.
+        loop (bool): True if the source starts again from the first frame at the end.
+        rotate (bool): True if the frames are rotated by 90 degrees by ScanPipeline.
+        expected (frozenset): pair of codes of the last frame read, None if it is not known.
+    """
+
+    def __init__(self, fps: float = 30, realtime: bool = False, loop: bool = False, rotate: bool = False):
+        self.fps = fps
+        self.realtime = realtime
+        self.loop = loop
+        self.rotate = rotate
+        self.expected = None
+        self.is_open = False
+        self._next_time = 0.0
+
+    def open(self) -> bool:
+        """Open the source, return False if it cannot be opened."""
+
+        self.is_open = True
+        self._next_time = time.monotonic()
+        return True
+
+    def _read_frame(self) -> tuple:
+        """Return the next frame of the source as tuple (ret, frame), implemented by the subclasses."""
+
+        raise NotImplementedError
+
+    def read(self) -> tuple:
+        """Return the next frame, (False, None) at the end of the source.
+
+        Return:
+            tuple (ret, frame): ret (bool) is False if no frame has been read, frame (np.ndarray) is the frame read.
+        """
+
+        if not self.is_open:
+            return False, None
+
+        if self.realtime:
+            delay = self._next_time - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            self._next_time = max(self._next_time, time.monotonic() - 1 / self.fps) + 1 / self.fps
+
+        ret, frame = self._read_frame()
+        if not ret and self.loop:
+            self._restart()
+            ret, frame = self._read_frame()
+        return ret, frame
+
+    def _restart(self):
+        """Start again from the first frame, implemented by the subclasses."""
+
+        raise NotImplementedError
+
+    def release(self):
+        """Close the source."""
+
+        self.is_open = False
+
+class VideoFileSource(_FileSource):
+    """VideoFileSource returns the frames of a recorded video.
+
+    Attributes:
+        path (str): path of the video.
+    """
+
+    def __init__(self, path: str, realtime: bool = False, loop: bool = False, rotate: bool = False):
+        """Initialize VideoFileSource with path, realtime, loop and rotate.
+
+        Args:
+            path (str): path of the video.
+            realtime (bool): True if the frames are returned at the fps of the video.
+            loop (bool): True if the video starts again at the end.
+            rotate (bool): True if the frames are rotated by 90 degrees by ScanPipeline.
+        """
+
+        super().__init__(realtime=realtime, loop=loop, rotate=rotate)
+        self.path = path
+        self._capture = None
+
+    def open(self) -> bool:
+        if self._capture is None:
+            self._capture = cv2.VideoCapture(self.path)
+            if not self._capture.isOpened():
+                self._capture = None
+                return False
+            self.fps = self._capture.get(cv2.CAP_PROP_FPS) or self.fps
+        return super().open()
+
+    def _read_frame(self) -> tuple:
+        return self._capture.read()
+
+    def _restart(self):
+        self._capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+
+    def release(self):
+        super().release()
+        if self._capture is not None:
+            self._capture.release()
+            self._capture = None
+
+class ImageFolderSource(_FileSource):
+    """ImageFolderSource returns the images of a folder, in alphabetical order.
+
+    Attributes:
+        folder (str): path of the folder.
+        paths (list): paths of the images.
+    """
+
+    def __init__(self, folder: str, fps: float = 30, realtime: bool = False, loop: bool = False, rotate: bool = False):
+        """Initialize ImageFolderSource with folder, fps, realtime, loop and rotate.
+
+        Args:
+            folder (str): path of the folder.
+            fps (float): images per second returned with realtime.
+            realtime (bool): True if the images are returned at fps.
+            loop (bool): True if the images start again at the end.
+            rotate (bool): True if the frames are rotated by 90 degrees by ScanPipeline.
+        """
+
+        super().__init__(fps=fps, realtime=realtime, loop=loop, rotate=rotate)
+        self.folder = folder
+        self.paths = []
+        self._position = 0
+
+    def open(self) -> bool:
+        if not os.path.isdir(self.folder):
+            return False
+        self.paths = sorted(os.path.join(self.folder, name) for name in os.listdir(self.folder)
+                            if name.lower().endswith(IMAGE_EXTENSIONS))
+        self._position = 0
+        return bool(self.paths) and super().open()
+
+    def _read_frame(self) -> tuple:
+        while self._position < len(self.paths):
+            frame = cv2.imread(self.paths[self._position])
+            self._position += 1
+            if frame is not None:  # Files that are not images are skipped.
+                return True, frame
+        return False, None
+
+    def _restart(self):
+        self._position = 0
+
+class SyntheticSource(_FileSource):
+    """SyntheticSource returns generated frames with the QR codes of an article and a quantity.
+
+    Each label (article and quantity) is shown for frames_per_label frames in a random position, then gap_frames empty frames follow.
+    The frames can be blurred and have noise, so the decoding is not always successful.
+
+    Attributes:
+        labels (list): tuples (article, quantity) shown, in order.
+        width (int): width of the frames.
+        height (int): height of the frames.
+        frames_per_label (int): frames containing each label.
+        gap_frames (int): empty frames after each label.
+    """
+
+    def __init__(self, labels=20, width: int = 1280, height: int = 720, frames_per_label: int = 15, gap_frames: int = 5,
+                 module_size: int = 4, noise: float = 4.0, blur: int = 0, seed: int = 0, fps: float = 30, realtime: bool = False,
+                 loop: bool = False):
+        """Initialize SyntheticSource.
+
+        Args:
+            labels (int or list): number of random labels, or list of tuples (article, quantity).
+            width (int): width of the frames.
+            height (int): height of the frames.
+            frames_per_label (int): frames containing each label.
+            gap_frames (int): empty frames after each label.
+            module_size (int): pixels of each module of the QR codes.
+            noise (float): standard deviation of the gaussian noise added to the frames.
+            blur (int): size of the gaussian blur (odd number), 0 for no blur.
+            seed (int): seed of the random generator, the same seed gives the same frames.
+            fps (float): frames per second returned with realtime.
+            realtime (bool): True if the frames are returned at fps.
+            loop (bool): True if the labels start again at the end.
+        """
+
+        super().__init__(fps=fps, realtime=realtime, loop=loop)
+        self._random = random.Random(seed)
+        self._noise = np.random.default_rng(seed)
+        if isinstance(labels, int):
+            labels = [(str(self._random.randrange(10 ** 7, 10 ** 8)), str(self._random.randrange(1, 10000))) for _ in range(labels)]
+        self.labels = list(labels)
+        self.width = width
+        self.height = height
+        self.frames_per_label = frames_per_label
+        self.gap_frames = gap_frames
+        self.module_size = module_size
+        self.noise = noise
+        self.blur = blur
+        self._encoder = cv2.QRCodeEncoder.create()
+        self._frame_index = 0
+        self._label_image = None
+        self._noise_frames = [np.round(self._noise.normal(0, noise, (height, width))).astype(np.int16)
+                              for _ in range(NOISE_FRAMES)] if noise else []
+
+    def _qr_code(self, text: str):
+        """Return the image of the QR code of a text, module_size pixels for each module."""
+
+        code = self._encoder.encode(text)
+        size = code.shape[0] * self.module_size
+        return cv2.resize(code, (size, size), interpolation=cv2.INTER_NEAREST)
+
+    def _label(self, art: str, qty: str):
+        """Return the frame with the label of an article and a quantity in a random position, without noise."""
+
+        frame = np.full((self.height, self.width), 200, dtype=np.uint8)
+        code_art, code_qty = self._qr_code(art), self._qr_code(qty)
+        label_width = code_art.shape[1] + code_qty.shape[1] + 60
+        label_height = max(code_art.shape[0], code_qty.shape[0]) + 40
+        x = self._random.randrange(0, max(1, self.width - label_width))
+        y = self._random.randrange(0, max(1, self.height - label_height))
+
+        frame[y:y + label_height, x:x + label_width] = 255
+        frame[y + 20:y + 20 + code_art.shape[0], x + 20:x + 20 + code_art.shape[1]] = code_art
+        x_qty = x + 40 + code_art.shape[1]
+        frame[y + 20:y + 20 + code_qty.shape[0], x_qty:x_qty + code_qty.shape[1]] = code_qty
+        return frame
+
+    def open(self) -> bool:
+        self._frame_index = 0
+        return super().open()
+
+    def _read_frame(self) -> tuple:
+        period = self.frames_per_label + self.gap_frames
+        label_index, position = divmod(self._frame_index, period)
+        if label_index >= len(self.labels):
+            return False, None
+        self._frame_index += 1
+
+        if position < self.frames_per_label:
+            if position == 0:
+                self._label_image = self._label(*self.labels[label_index])
+            frame = self._label_image.copy()
+            self.expected = frozenset(self.labels[label_index])
+        else:
+            frame = np.full((self.height, self.width), 200, dtype=np.uint8)
+            self.expected = None
+
+        if self.blur:
+            frame = cv2.GaussianBlur(frame, (self.blur, self.blur), 0)
+        if self._noise_frames:
+            noise = self._noise_frames[self._random.randrange(NOISE_FRAMES)]
+            frame = np.clip(frame + noise, 0, 255).astype(np.uint8)
+        return True, cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
+
+    def _restart(self):
+        self._frame_index = 0
+
+    def label_index(self) -> int:
+        """Return the index of the label of the last frame read, None if the frame has no label."""
+
+        if self.expected is None:
+            return None
+        return (self._frame_index - 1) // (self.frames_per_label + self.gap_frames)
+
+def registry_labels(registry, number: int, seed: int = 0) -> list:
+    """Return labels of SyntheticSource with articles drawn from the MP registry and random quantities.
+
+    Args:
+        registry (ArticlesRegistry): MP registry.
+        number (int): number of labels (the same article can be drawn more times).
+        seed (int): seed of the random generator, the same seed gives the same labels.
+
+    Return:
+        (list): tuples (article, quantity), empty if the registry has no articles.
+
+    Example:
+        >>> registry_labels(registry, 2)
+        [('Z9035105', '4721'), ('90351051', '87')]
+    """
+
+    articles = registry.get_articles()
+    if not articles:
+        return []
+    generator = random.Random(seed)
+    return [(generator.choice(articles), str(generator.randrange(1, 10000))) for _ in range(number)]
+
+def source_from_config(config_path: str = CONFIG_PATH, registry=None):
+    """Return the source of the frames written in the configuration file (camera.ini).
+
+    If 'source' in the section 'CAMERA' is empty, the source is the PC camera (CameraSession), otherwise it is
+    'synthetic', the path of a folder of images or the path of a video, returned at their fps and repeated at the end.
+    The articles of 'synthetic' are drawn from the registry, so the confirmed labels can be inserted as records;
+    without registry (or with an empty one) they are random and the source only exercises the decoding.
+
+    Args:
+        config_path (str): path of the configuration file.
+        registry (ArticlesRegistry): MP registry of the articles of 'synthetic', None for random articles.
+
+    Return:
+        CameraSession, SyntheticSource, ImageFolderSource or VideoFileSource.
+
+    Example:
+        >>> source_from_config()
+        <camera_session.CameraSession object at 0x000001C5A2B3F9D0>
+    """
+
+    settings = read_camera_settings(config_path)
+    configuration_file = configparser.ConfigParser()
+    configuration_file.read(config_path)
+    source = configuration_file.get('CAMERA', 'source', fallback='').strip()
+
+    if not source:
+        return CameraSession(**settings)
+    if source.lower() == 'synthetic':
+        labels = registry_labels(registry, 1000) if registry is not None else []
+        return SyntheticSource(labels=labels or 1000, realtime=True, loop=True)
+
+    rotate = bool(settings['rotate'])  # Recorded frames: no orientation of the screen.
+    if os.path.isdir(source):
+        return ImageFolderSource(source, fps=settings['fps'] or 30, realtime=True, loop=True, rotate=rotate)
+    return VideoFileSource(source, realtime=True, loop=True, rotate=rotate)
@@ -2,11 +2,15 @@
 
 Dependencies:
     tkinter 
-    pickle
-    FilesCommandPanel: frame containing a Combobox, three buttons and four labels.
+    FilesCommandPanel: frame containing a Combobox, five buttons and four labels.
     ArticlesCommandPanel: frame containing four buttons, three labels and three entries.
     FilesManager: data structure representing the inventories of different areas in MP.
-    ArticlesRegistryPanel: frame containing an entry and a button.
+    FilesJournal: journal where the operations on FilesManager are saved.
+    FilesStore: folder where the inventory files are saved, one shard for each file.
+    ArticlesRegistryPanel: frame containing an entry and two buttons.
+    SummaryPanel: frame containing three labels with the totals of the inventory.
+    check_values: the module containing the MP registry (registry) shared by the application.
+    metrics: the module containing the counters and the latency histograms of the App, and the profiler of the session.
 
 Example:
     from graphical_interface import App
@@ -16,34 +20,45 @@ Example:
 """
 
 import tkinter as tk 
-import pickle
 from files_command_panel import FilesCommandPanel
 from articles_command_panel import ArticlesCommandPanel
 from files_manager import FilesManager
+from files_journal import FilesJournal
+from files_store import FilesStore
 from articles_registry_panel import ArticlesRegistryPanel
+from summary_panel import SummaryPanel
+from check_values import registry
+import metrics
+
+SYNC_MS = 1000  # Milliseconds between two synchronizations of the journal with the disk.
 
 class App(tk.Tk): 
     """App is a graphical interface for an inventory management application.
 
     Attributes:
         articles_command_panel (ArticlesCommandPanel): frame containing four buttons, three labels and three entries.
-        files_command_panel (FilesCommandPanel): frame containing a Combobox, three buttons and four labels.
-        articles_registry_panel (ArticlesRegistryPanel): frame containing an entry and a button. 
+        files_command_panel (FilesCommandPanel): frame containing a Combobox, five buttons and four labels.
+        articles_registry_panel (ArticlesRegistryPanel): frame containing an entry and two buttons. 
+        summary_panel (SummaryPanel): frame containing three labels with the totals of the inventory.
+        journal (FilesJournal): journal where the operations on FilesManager are saved.
     """
 
     def __init__(self):
         """Initialize App."""
 
         tk.Tk.__init__(self) 
+
+        metrics.start()  # Metrics and profiler, only if turned on by the environment variables (see metrics).
         
         self.files_manager = FilesManager()
 
         self.title('Barcode Detector') 
-        self.geometry('800x770+0+0')  # 0+0 the App window appears at the top left of the display.
+        self.geometry('800x870+0+0')  # 0+0 the App window appears at the top left of the display.
         self.resizable(False, False)  # Popup size cannot be changed by the user.
 
         self.rowconfigure(index=0, weight=1)
         self.rowconfigure(index=1, weight=1)
+        self.rowconfigure(index=2, weight=0)
         self.columnconfigure(index=0, weight=1)
         self.columnconfigure(index=1, weight=1)
 
@@ -56,27 +71,43 @@ class App(tk.Tk):
         self.articles_registry_panel = ArticlesRegistryPanel(master_window=self)
         self.articles_registry_panel.grid(row=1, column=1, sticky='nswe')
 
-        # Load of the changes made since the last data save, using the pickle binary file.
-        saved_data = open('C:\\Users\\lara_\\OneDrive\\Desktop\\AppInventario\\AppInventario\\salvataggio_progressi\\dati_salvati.pkl', 'rb') 
-        loading_data = pickle.load(saved_data)
-        self.files_manager.files.update(loading_data)
-        saved_data.close()
+        self.summary_panel = SummaryPanel(master_window=self)
+        self.summary_panel.grid(row=2, column=0, columnspan=2, sticky='nswe')
+
+        # Read of the manifest of the saved files (loaded when used) and of the operations saved in the journal since then.
+        self.journal = FilesJournal(self.files_manager,
+                                    FilesStore('C:\\Users\\lara_\\OneDrive\\Desktop\\AppInventario\\AppInventario\\salvataggio_progressi'),
+                                    'C:\\Users\\lara_\\OneDrive\\Desktop\\AppInventario\\AppInventario\\salvataggio_progressi\\giornale.log')
+        self.journal.open()
+        self.after(SYNC_MS, self.sync_journal)
 
-        self.files_command_panel.files_choice['values'] = [inventario for inventario in loading_data.keys()] #visually refresh the Combobox. 
+        self.files_command_panel.files_choice['values'] = self.files_manager.get_files()  # Visually refresh the Combobox.
+
+        registry.load()  # Load the MP registry from its binary store (rebuilt only if the Excel file has changed).
 
         self.protocol("WM_DELETE_WINDOW", self.save_on_close)  # When user clicks on the 'X' at the top right of the interface, the save_on_close() function is called.
 
+    def sync_journal(self):
+        """Write the last operations of the journal to the disk, then schedule the next synchronization."""
+
+        self.journal.sync()
+        self.after(SYNC_MS, self.sync_journal)
+
     def save_on_close(self):
         """Save the changes made since opening the application.
 
         This function is called when you click on the 'X' at the top right of the interface.
         
-        The FilesManager data structure is saved in a pickle binary file.
+        The changes to FilesManager are already in the journal, so only the files changed since they were last saved
+        are written to the disk, and the articles added to the MP registry are written into its Excel file.
         """
 
-        saved_data = open('C:\\Users\\lara_\\OneDrive\\Desktop\\AppInventario\\AppInventario\\salvataggio_progressi\\dati_salvati.pkl', 'wb')
-        pickle.dump(self.files_manager.files, saved_data)
-        saved_data.close()
+        try:
+            self.articles_command_panel.video_detection.close()  # Stop the camera and the processes decoding the frames.
+            self.journal.close()
+            registry.flush()
+        finally:
+            metrics.stop()  # Last metrics and results of the profiler, saved also if the files cannot be saved.
         self.destroy() 
 
 
@@ -0,0 +1,139 @@
+"""This module contains the functions that consolidate all the files of FilesManager, giving the totals of each article in the whole plant.
+
+For each article the consolidation gives the number of records and of pieces in all the files (areas) and the pieces in each area.
+The articles of each file are sorted, then the sorted streams of all the files are merged (k-way merge with heapq.merge),
+so the articles of the same code arrive together. The totals of each article are already kept by ArticlesManager,
+so the cost depends on the number of different articles of each file, not on the number of records.
+
+The totals of the articles of each file are copied holding the lock of FilesManager, then the report is written
+without the lock, so the App is not blocked. The files not loaded by the App are read from their shards
+and not kept in memory (they stay not loaded, see files_manager).
+
+Dependencies:
+    heapq: module used for merging the sorted articles of the files.
+    itertools
+    files_manager: FilesManager implementation.
+    inventory_export: the module containing the function that writes the report in the format of export.ini.
+    metrics: the module containing the counters and the latency histograms of the App.
+
+Example:
+    from inventory_consolidation import iter_consolidated, export_consolidation
+
+    for art, records, pieces, areas in iter_consolidated(files_manager):
+        print(art, records, pieces, areas)
+
+    export_consolidation(files_manager, 'C:/Users/Lara/Desktop/files/totali', 'xlsx')
+"""
+
+import heapq
+from itertools import groupby
+from files_manager import FilesManager
+from inventory_export import write_file
+import metrics
+
+REPORT_NAME = 'totali_stabilimento'  # Name of the report file, without extension.
+FILE_COLUMN = 'Pezzi '  # Prefix of the columns with the pieces of each file.
+
+def _file_totals(file_name: str, articles_manager) -> list:
+    """Return the list of tuples (article, filename, records, pieces) with the articles of a file in alphabetical order."""
+
+    return [(art, file_name, *articles_manager.get_article_totals(art)) for art in sorted(articles_manager.dict_articoli)]
+
+def _snapshot(files_manager: FilesManager, file_names: list = None) -> tuple:
+    """Copy the totals of the articles of the files, holding the lock of FilesManager only for the loaded files.
+
+    The files not loaded are read from their shards after the lock is released, and their content is not kept.
+
+    Return:
+        tuple (file_names, totals): totals (list) contains the result of _file_totals() for each file, in the order of file_names.
+    """
+
+    files = files_manager.files
+    totals = {}
+    entries = {}
+    with files_manager.lock:
+        if file_names is None:
+            file_names = files_manager.get_files()
+        for file_name in file_names:
+            if files.is_loaded(file_name):
+                totals[file_name] = _file_totals(file_name, files[file_name])
+            else:
+                entries[file_name] = files.peek(file_name).entry
+        loader = files.loader
+
+    for file_name, entry in entries.items():
+        totals[file_name] = _file_totals(file_name, loader(entry))
+    return file_names, [totals[file_name] for file_name in file_names]
+
+def _merge(totals: list):
+    """Merge the totals of the files (see _snapshot()) and return an iterator of the totals of each article, as iter_consolidated()."""
+
+    for art, group in groupby(heapq.merge(*totals), key=lambda item: item[0]):
+        areas = {file_name: (records, pieces) for _, file_name, records, pieces in group}
+        yield (art, sum(records for records, _ in areas.values()), sum(pieces for _, pieces in areas.values()), areas)
+
+def iter_consolidated(files_manager: FilesManager, file_names: list = None):
+    """Return an iterator of the totals of each article in all the files, with the articles in alphabetical order.
+
+    Args:
+        files_manager (FilesManager): data structure containing the files.
+        file_names (list): files to consolidate, None for all the files.
+
+    Return:
+        iterator of tuples (article, records, pieces, areas): records (int) and pieces (int) are the totals in all the files,
+        areas (dict) is organized as follows: key (str) filename, value (tuple) records and pieces of the article in the file
+        (only the files containing the article).
+
+    Example:
+        >>> list(iter_consolidated(files_manager))
+        [('00010012', 3, 1500, {'inventario1': (1, 500), 'inventario2': (2, 1000)}), ('90515689', 1, 300, {'inventario2': (1, 300)})]
+    """
+
+    _, totals = _snapshot(files_manager, file_names)
+    yield from _merge(totals)
+
+@metrics.timed('export.consolidation')
+def export_consolidation(files_manager: FilesManager, file_path: str, export_format: str = 'xlsx') -> int:
+    """Write the report of the totals of each article in all the files.
+
+    The report has a row for each article with the total records, the total pieces and a column with the pieces of each file.
+
+    Args:
+        files_manager (FilesManager): data structure containing the files.
+        file_path (str): path of the report without extension, the extension is the format.
+        export_format (str): 'xlsx', 'csv' or 'parquet'.
+
+    Return:
+        (int): number of articles written.
+
+    Example:
+        >>> export_consolidation(files_manager, 'C:/Users/Lara/Desktop/files/totali_stabilimento', 'csv')
+        2
+    """
+
+    header, rows = consolidation_rows(files_manager)  # The totals are copied here, the report is written without the lock.
+    return write_file(rows, file_path, export_format, header)
+
+def consolidation_rows(files_manager: FilesManager) -> tuple:
+    """Return the header and the rows of the report of the totals of each article in all the files.
+
+    Arg:
+        files_manager (FilesManager): data structure containing the files.
+
+    Return:
+        tuple (header, rows): header (list) contains the names of the columns ('Articolo', 'Record', 'Pezzi' and 'Pezzi <filename>'
+        for each file, so a file named as a column does not give two columns with the same name),
+        rows is an iterator of tuples (article, records, pieces, pieces of each file), with the articles in alphabetical order.
+        The totals of the files are copied when the function is called.
+
+    Example:
+        >>> header, rows = consolidation_rows(files_manager)
+        >>> header, list(rows)
+        (['Articolo', 'Record', 'Pezzi', 'Pezzi inventario1', 'Pezzi inventario2'], [('00010012', 3, 1500, 500, 1000), ('90515689', 1, 300, 0, 300)])
+    """
+
+    file_names, totals = _snapshot(files_manager)
+    header = ['Articolo', 'Record', 'Pezzi'] + [FILE_COLUMN + file_name for file_name in file_names]
+    rows = ((art, records, pieces, *(areas[file_name][1] if file_name in areas else 0 for file_name in file_names))
+            for art, records, pieces, areas in _merge(totals))
+    return header, rows
@@ -0,0 +1,332 @@
+"""This module contains the functions that export the records of the inventory files to Excel, CSV or Parquet files.
+
+The format is chosen with the option 'format' of export.ini (xlsx, csv or parquet, xlsx if missing):
+- xlsx: the rows are written one at a time in a write only workbook, so the sheet is never kept in memory.
+- csv: the rows are written one at a time, the articles between quotes and the quantities without.
+- parquet: the rows are written in blocks of PARQUET_ROWS as columns (article as string, quantity as integer),
+  requires the pyarrow library.
+Export time grows linearly with the number of records and memory stays bounded even for files with millions of records.
+
+The articles are always written as strings, so the codes keep their leading zeros.
+Example:
+    article code: '00010012'
+    written as string: '00010012' (str) in Excel
+    written as number: '10012' (int) in Excel
+
+All the files can be exported together: each file is exported by a different process (ProcessPoolExecutor),
+so the time is about the one of the largest file instead of the sum of all the files.
+The processes import only this module, not the user interface. The files not loaded by the App are read by the processes
+from their shard, so they are not loaded in the App; only the files already loaded are serialized by pickle and sent to the processes.
+
+Dependencies:
+    openpyxl: library with writing and reading functionalities of Excel files.
+    csv: module for reading and writing CSV files.
+    pyarrow: optional library for writing Parquet files.
+    configparser: library with configuration file reading functionality for exporting Excel files.
+    concurrent.futures: module used for the pool of processes exporting all the files.
+    pickle
+    articles_manager: ArticlesManager implementation.
+    files_manager: FilesManager implementation.
+    metrics: the module containing the counters and the latency histograms of the App.
+
+Example:
+    from inventory_export import export_file, export_all, read_settings
+
+    dest_path, export_format = read_settings()
+    export_file(files_manager.files['inventario1'], dest_path + 'inventario1', export_format)
+    export_all(files_manager, dest_path, export_format)
+"""
+
+import csv
+import pickle
+import configparser
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import openpyxl
+from articles_manager import ArticlesManager
+from files_manager import FilesManager
+import metrics
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # Only the Parquet export is not available.
+    pyarrow = None
+
+CONFIG_PATH = 'C:\\Users\\lara_\\OneDrive\\Desktop\\AppInventario\\AppInventario\\export.ini'
+
+HEADER = ['Articolo', 'Quantita\'']
+FORMATS = ('xlsx', 'csv', 'parquet')
+PARQUET_ROWS = 65536  # Number of rows written together in a Parquet file.
+
+def write_xlsx(records, file_path: str, header: list = HEADER) -> int:
+    """Write the records in an Excel file, after the header.
+
+    Args:
+        records (iterable): tuples (article, quantity) in the order they are written, or rows with the columns of the header.
+        file_path (str): path of the Excel file.
+        header (list): names of the columns.
+
+    Return:
+        (int): number of records written.
+
+    Example:
+        >>> write_xlsx([('00010012', 5), ('90515689', 1000)], 'inventario1.xlsx')
+        2
+    """
+
+    file_workbook = openpyxl.Workbook(write_only=True)  # Write only mode streams the rows to the file.
+    file_worksheet = file_workbook.create_sheet()
+
+    file_worksheet.append(header)
+    written = 0
+    for record in records:
+        file_worksheet.append(record)
+        written += 1
+
+    file_workbook.save(file_path)
+    return written
+
+def export_xlsx(articles_manager: ArticlesManager, file_path: str) -> int:
+    """Export the content of an inventory file to an Excel file,
+    with the articles in alphabetical order and the respective quantities in ascending order.
+
+    Args:
+        articles_manager (ArticlesManager): content of the file.
+        file_path (str): path of the Excel file.
+
+    Return:
+        (int): number of records exported.
+
+    Example:
+        >>> obj = ArticlesManager()
+        >>> obj.insert_records_list([('90515689','1000'),('00010012','5')])
+        >>> export_xlsx(obj, 'inventario1.xlsx')
+        2
+    """
+
+    return write_xlsx(articles_manager.iter_sorted_records(), file_path)
+
+def write_csv(records, file_path: str, header: list = HEADER) -> int:
+    """Write the records in a CSV file, after the header.
+
+    The articles are written between quotes, so the programs reading the file keep them as strings.
+
+    Args:
+        records (iterable): tuples (article, quantity) in the order they are written, or rows with the columns of the header.
+        file_path (str): path of the CSV file.
+        header (list): names of the columns.
+
+    Return:
+        (int): number of records written.
+
+    Example:
+        >>> write_csv([('00010012', 5), ('90515689', 1000)], 'inventario1.csv')
+        2
+    """
+
+    with open(file_path, 'w', newline='', encoding='utf-8') as csv_file:
+        return write_csv_stream(records, csv_file, header)
+
+def write_csv_stream(records, stream, header: list = HEADER) -> int:
+    """Write the records in CSV format in a text stream already open (e.g. sys.stdout), after the header.
+
+    Args:
+        records (iterable): tuples (article, quantity) in the order they are written, or rows with the columns of the header.
+        stream (file object): text stream, opened with newline=''.
+        header (list): names of the columns.
+
+    Return:
+        (int): number of records written.
+
+    Example:
+        >>> write_csv_stream([('00010012', 5)], sys.stdout)
+        "Articolo","Quantita'"
+        "00010012",5
+        1
+    """
+
+    writer = csv.writer(stream, quoting=csv.QUOTE_NONNUMERIC)
+    writer.writerow(header)
+    written = 0
+    for record in records:
+        writer.writerow(record)
+        written += 1
+
+    return written
+
+def write_parquet(records, file_path: str, header: list = HEADER) -> int:
+    """Write the records in a Parquet file, with a string column for the articles and integer columns for the others (quantities).
+
+    Args:
+        records (iterable): tuples (article, quantity) in the order they are written, or rows with the columns of the header.
+        file_path (str): path of the Parquet file.
+        header (list): names of the columns.
+
+    Return:
+        (int): number of records written.
+
+    Example:
+        >>> write_parquet([('00010012', 5), ('90515689', 1000)], 'inventario1.parquet')
+        2
+    """
+
+    if pyarrow is None:
+        raise ImportError('La libreria pyarrow e\' necessaria per esportare in formato parquet.')
+
+    schema = pyarrow.schema([(header[0], pyarrow.string())] + [(name, pyarrow.int64()) for name in header[1:]])
+    written = 0
+    with pyarrow.parquet.ParquetWriter(file_path, schema) as writer:
+        columns = [[] for _ in header]
+        for record in records:
+            for column, value in zip(columns, record):
+                column.append(value)
+            if len(columns[0]) == PARQUET_ROWS:
+                writer.write_table(pyarrow.table(columns, schema=schema))
+                written += PARQUET_ROWS
+                columns = [[] for _ in header]
+
+        if columns[0] or not written:  # A file without records still contains the columns.
+            writer.write_table(pyarrow.table(columns, schema=schema))
+            written += len(columns[0])
+
+    return written
+
+_WRITERS = {'xlsx': write_xlsx, 'csv': write_csv, 'parquet': write_parquet}
+
+def write_file(records, file_path: str, export_format: str = 'xlsx', header: list = HEADER) -> int:
+    """Write the records in a file of the chosen format, after the header.
+
+    Args:
+        records (iterable): rows with the columns of the header, the first one as string and the others as integers.
+        file_path (str): path of the file without extension, the extension is the format.
+        export_format (str): 'xlsx', 'csv' or 'parquet'.
+        header (list): names of the columns.
+
+    Return:
+        (int): number of records written.
+
+    Example:
+        >>> write_file([('00010012', 5)], 'C:/Users/Lara/Desktop/files/prova', 'csv')
+        1
+    """
+
+    return _WRITERS[export_format](records, file_path + '.' + export_format, header)
+
+@metrics.timed('export.file')
+def export_file(articles_manager: ArticlesManager, file_path: str, export_format: str = 'xlsx') -> int:
+    """Export the content of an inventory file in the chosen format,
+    with the articles in alphabetical order and the respective quantities in ascending order.
+
+    Args:
+        articles_manager (ArticlesManager): content of the file.
+        file_path (str): path of the exported file without extension, the extension is the format.
+        export_format (str): 'xlsx', 'csv' or 'parquet'.
+
+    Return:
+        (int): number of records exported.
+
+    Example:
+        >>> export_file(obj, 'C:/Users/Lara/Desktop/files/inventario1', 'csv')
+        2
+    """
+
+    return write_file(articles_manager.iter_sorted_records(), file_path, export_format)
+
+def read_settings(config_path: str = CONFIG_PATH) -> tuple:
+    """Return the export settings read from the configuration file (export.ini).
+
+    Arg:
+        config_path (str): path of the configuration file.
+
+    Return:
+        tuple (dest_path, export_format): values of 'destination' and 'format' in the section 'EXPORT'
+        (export_format is 'xlsx' if 'format' is missing).
+
+    Example:
+        >>> read_settings()
+        ('C:/Users/Lara/Desktop/files/', 'csv')
+    """
+
+    configuration_file = configparser.ConfigParser()
+    configuration_file.read(config_path)
+    export_format = configuration_file['EXPORT'].get('format', 'xlsx').strip().lower()
+    if export_format not in FORMATS:
+        raise ValueError('Formato di esportazione non valido: ' + export_format + '.')
+    return configuration_file['EXPORT']['destination'], export_format
+
+def _export_data(data: bytes, file_path: str, export_format: str) -> int:
+    """Export a file serialized by pickle, called in the processes of the pool."""
+
+    return export_file(pickle.loads(data), file_path, export_format)
+
+def _export_shard(loader, entry: dict, file_path: str, export_format: str) -> int:
+    """Export a file not loaded by the App, reading it from its shard (loader is FilesStore.load_shard), called in the processes of the pool."""
+
+    return export_file(loader(entry), file_path, export_format)
+
+def submit_all(files_manager: FilesManager, dest_path: str, export_format: str, executor: ProcessPoolExecutor) -> dict:
+    """Submit the export of every file of FilesManager to a pool of processes.
+
+    The largest files are submitted first, so they do not remain alone at the end.
+    The files not loaded (and so not changed) are read from their shard by the processes, without loading them in FilesManager.
+    The files already loaded are serialized while holding the lock of FilesManager, so it is better to call this function
+    outside the thread of the user interface.
+
+    Args:
+        files_manager (FilesManager): data structure containing the files.
+        dest_path (str): path of the folder where the files are saved.
+        export_format (str): 'xlsx', 'csv' or 'parquet'.
+        executor (ProcessPoolExecutor): pool of processes.
+
+    Return:
+        (dict): dictionary organized as follows: key (str) filename, value (Future) with the number of records exported as result.
+    """
+
+    file_names = sorted(files_manager.get_files(), key=lambda file_name: files_manager.get_file_totals(file_name)[0], reverse=True)
+
+    files = files_manager.files
+    futures = {}
+    for file_name in file_names:
+        with files_manager.lock:  # The file is copied as it is now, the operations can continue during the export.
+            if file_name not in files:  # Deleted in the meantime.
+                continue
+            if not files.is_loaded(file_name) and file_name not in files_manager.dirty:
+                futures[file_name] = executor.submit(_export_shard, files.loader, files.peek(file_name).entry,
+                                                     dest_path + file_name, export_format)
+                continue
+            data = pickle.dumps(files[file_name])
+        futures[file_name] = executor.submit(_export_data, data, dest_path + file_name, export_format)
+    return futures
+
+@metrics.timed('export.all')
+def export_all(files_manager: FilesManager, dest_path: str, export_format: str = 'xlsx', max_workers: int = None, progress=None) -> dict:
+    """Export every file of FilesManager in the chosen format, each one in a different process.
+
+    Args:
+        files_manager (FilesManager): data structure containing the files.
+        dest_path (str): path of the folder where the files are saved.
+        export_format (str): 'xlsx', 'csv' or 'parquet'.
+        max_workers (int): number of processes, None for the number of processors.
+        progress (callable): function called when a file is exported, with the filename, the number of files exported and the number of files.
+
+    Return:
+        (dict): dictionary organized as follows: key (str) filename, value (int) number of records exported.
+
+    Example:
+        >>> export_all(files_manager, 'C:/Users/Lara/Desktop/files/', progress=print)
+        inventario1 1 2
+        inventario2 2 2
+        {'inventario1': 225, 'inventario2': 157}
+    """
+
+    results = {}
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = submit_all(files_manager, dest_path, export_format, executor)
+        file_names = {future: file_name for file_name, future in futures.items()}
+
+        for future in as_completed(file_names):
+            results[file_names[future]] = future.result()
+            if progress is not None:
+                progress(file_names[future], len(results), len(futures))
+
+    return results
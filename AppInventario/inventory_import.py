@@ -0,0 +1,168 @@
+"""This module contains the function that imports the records of an inventory spreadsheet (Excel or CSV file) into a file of FilesManager.
+
+The rows are read one at a time and checked in blocks of rows with the batch checks
+(same rules of check_art and check_qty: article of 8 characters present in the MP registry, quantity as positive integer).
+The valid records of each block are inserted in the file with a single operation (import_rows()),
+the rejected rows are returned (and saved in a CSV report).
+
+Dependencies:
+    spreadsheet_reader: the module containing the functions that read the rows of a spreadsheet in blocks and write the rejected rows.
+    articles_registry: ArticlesRegistry implementation.
+    files_manager: FilesManager implementation.
+    check_values: the module containing the batch checks of the articles and of the quantities.
+    metrics: the module containing the counters and the latency histograms of the App.
+
+Example:
+    from inventory_import import import_inventory
+    from check_values import registry
+
+    added, rejected = import_inventory('area3.xlsx', files_manager, 'inventario3', registry, 'area3_scartati.csv')
+"""
+
+from spreadsheet_reader import iter_rows, iter_row_chunks, write_rejects, CHUNK_ROWS
+from articles_registry import ArticlesRegistry
+from files_manager import FilesManager
+from check_values import check_art_format_batch, check_qty_batch, check_qty, art_format_reason
+import metrics
+
+REJECTS_HEADER = ['Riga', 'Articolo', 'Quantita\'', 'Motivo']  # Columns of the CSV report of the rejected rows.
+
+def _find_columns(header: tuple) -> tuple:
+    """Return the positions of the columns of the articles and of the quantities if the row is a header, otherwise None."""
+
+    names = [value.lower() if value is not None else '' for value in header]
+    if 'articolo' not in names:
+        return None
+
+    art_column = names.index('articolo')
+    qty_column = next((i for i, name in enumerate(names) if name.startswith('quantit')), art_column + 1)
+    return (art_column, qty_column)
+
+def _check_chunk(chunk: list, registry: ArticlesRegistry, records: list, rejected: list):
+    """Check a block of rows (row_number, article, quantity), adding the valid rows to records and the others to rejected."""
+
+    if not chunk:
+        return
+
+    arts = [art for _, art, _ in chunk]
+    valid_format = check_art_format_batch(arts)
+    in_registry = registry.contains_batch(arts)
+    valid_qty = check_qty_batch([qty for _, _, qty in chunk])
+
+    for (row_number, art, qty), valid, present, valid_q in zip(chunk, valid_format, in_registry, valid_qty):
+        if not valid:
+            rejected.append((row_number, art, qty, art_format_reason(art)))
+        elif not present:
+            rejected.append((row_number, art, qty, 'Articolo non presente in anagrafica'))
+        elif not valid_q:
+            rejected.append((row_number, art, qty, 'Quantita\' non valida'))
+        else:
+            records.append((row_number, art, qty))
+
+def iter_checked_rows(rows, registry: ArticlesRegistry, chunk_rows: int = CHUNK_ROWS):
+    """Check the rows of a spreadsheet in blocks and return an iterator of the valid records and of the rejected rows of each block.
+
+    The records are read from the 'Articolo' and 'Quantita'' columns if the first row is a header containing them
+    (as in the exported files), otherwise from the first two columns.
+    Only one block is kept in memory, so the rows can come from a file of any size or from a stream.
+
+    Args:
+        rows (iterable): tuples (row_number, row), see spreadsheet_reader.iter_rows().
+        registry (ArticlesRegistry): MP registry used to check the articles.
+        chunk_rows (int): rows checked together.
+
+    Return:
+        iterator of tuples (records, rejected): records (list) contains the valid tuples (article, quantity) of the block,
+        rejected (list) contains the tuples (row_number, article, quantity, reason) of the block in the order of the rows.
+
+    Example:
+        >>> list(iter_checked_rows(iter_rows('area3.csv'), registry))
+        [([('90351051', '1000'), ('90351052', '500')], [(4, '90351051', '2.5', "Quantita' non valida")])]
+    """
+
+    for chunk, rejected in iter_row_chunks(rows, _find_columns, (0, 1), 'Riga incompleta', chunk_rows):
+        valid_rows = []
+        _check_chunk(chunk, registry, valid_rows, rejected)
+        rejected.sort()  # Incomplete rows are rejected before the block they belong to is checked.
+        yield [(art, qty) for _, art, qty in valid_rows], rejected
+
+def _insert_rows(files_manager: FilesManager, file_name: str, valid_rows: list, rejected: list) -> int:
+    """Insert the valid rows (row_number, article, quantity) of a block in a file with a single operation, return the records inserted.
+
+    If FilesManager refuses the block (ValueError, nothing is inserted), the rows whose quantity cannot be stored are rejected
+    and the others are inserted, so a single bad row never stops the import.
+    """
+
+    if not valid_rows:
+        return 0
+
+    try:
+        files_manager.insert_records_list(file_name, [(art, qty) for _, art, qty in valid_rows])
+    except ValueError:
+        rejected.extend((row_number, art, qty, 'Quantita\' non valida') for row_number, art, qty in valid_rows if not check_qty(qty))
+        valid_rows = [row for row in valid_rows if check_qty(row[2])]
+        if valid_rows:
+            files_manager.insert_records_list(file_name, [(art, qty) for _, art, qty in valid_rows])
+    return len(valid_rows)
+
+def import_rows(rows, files_manager: FilesManager, file_name: str, registry: ArticlesRegistry, chunk_rows: int = CHUNK_ROWS):
+    """Check the rows of a spreadsheet in blocks and insert the valid records of each block in an existing file of FilesManager.
+
+    Each block is inserted with a single operation of the journal, so the records of the blocks already returned are saved
+    also if the import stops.
+
+    Args:
+        rows (iterable): tuples (row_number, row), see spreadsheet_reader.iter_rows().
+        files_manager (FilesManager): data structure containing the file.
+        file_name (str): name of the file where the records are inserted.
+        registry (ArticlesRegistry): MP registry used to check the articles.
+        chunk_rows (int): rows checked and inserted together.
+
+    Return:
+        iterator of tuples (added, rejected): added (int) is the number of records of the block inserted in the file,
+        rejected (list) contains the tuples (row_number, article, quantity, reason) of the block in the order of the rows.
+
+    Example:
+        >>> list(import_rows(iter_rows('area3.csv'), files_manager, 'inventario3', registry))
+        [(2, [(4, '90351051', '2.5', "Quantita' non valida")])]
+    """
+
+    for chunk, rejected in iter_row_chunks(rows, _find_columns, (0, 1), 'Riga incompleta', chunk_rows):
+        valid_rows = []
+        _check_chunk(chunk, registry, valid_rows, rejected)
+        added = _insert_rows(files_manager, file_name, valid_rows, rejected)
+        rejected.sort()
+        yield added, rejected
+
+@metrics.timed('import.inventory')
+def import_inventory(file_path: str, files_manager: FilesManager, file_name: str, registry: ArticlesRegistry, rejects_path: str = None) -> tuple:
+    """Import the records of a spreadsheet into an existing file of FilesManager.
+
+    The records are read from the 'Articolo' and 'Quantita'' columns if the first row is a header containing them
+    (as in the exported files), otherwise from the first two columns.
+
+    Args:
+        file_path (str): path of the spreadsheet (Excel or CSV file).
+        files_manager (FilesManager): data structure containing the file.
+        file_name (str): name of the file where the records are inserted.
+        registry (ArticlesRegistry): MP registry used to check the articles.
+        rejects_path (str): path of the CSV report of the rejected rows, not written if None or if there are no rejected rows.
+
+    Return:
+        tuple (added, rejected): added (int) is the number of records inserted in the file,
+        rejected (list) is a list of tuples (row_number, article, quantity, reason).
+
+    Example:
+        >>> import_inventory('area3.csv', files_manager, 'inventario3', registry)
+        (2, [(4, '90351051', '2.5', "Quantita' non valida")])
+    """
+
+    added = 0
+    rejected = []
+    for chunk_added, chunk_rejected in import_rows(iter_rows(file_path), files_manager, file_name, registry):
+        added += chunk_added
+        rejected.extend(chunk_rejected)
+
+    write_rejects(rejects_path, REJECTS_HEADER, rejected)
+
+    return added, rejected
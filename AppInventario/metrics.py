@@ -0,0 +1,392 @@
+"""This module contains the metrics of the App: counters and latency histograms around the slow parts
+(read of the MP registry, checks, saving of the files, export, import and decoding of the frames), and the profiling of a session.
+
+The metrics are turned on by the environment variable APPINVENTARIO_METRICS=1. When they are off, timed() returns the function
+without changes, timer() returns always the same empty context and count() and observe() return immediately,
+so the cost is only the call of an empty function.
+
+When they are on, every FLUSH_SECONDS seconds (and when the App is closed) the counters and the histograms of the last period
+are written as a JSON line in metriche.jsonl, in the folder METRICS_DIR (or APPINVENTARIO_METRICS_DIR).
+The file is rotated when it reaches MAX_BYTES bytes, keeping BACKUP_COUNT old files.
+Only the metrics of the App process are written, not the ones of the processes of the pools.
+
+The environment variable APPINVENTARIO_PROFILE runs the session under a profiler, the results are saved in the same folder
+when the App is closed (an unknown profiler or a folder that cannot be written only logs a warning, the App starts anyway):
+- 'cprofile': cProfile on the main thread (user interface), saved in profilo_<date>.prof (for pstats or snakeviz)
+  and as text in profilo_<date>.txt.
+- 'sample': the stacks of all the threads are sampled every SAMPLE_MS milliseconds, saved in campioni_<date>.txt
+  in the collapsed format of the flame graphs (one stack for each line, followed by the number of samples).
+
+Dependencies:
+    logging: module used for the rotating file of the metrics.
+    cProfile, pstats: modules used for profiling.
+    bisect
+    collections
+    contextlib
+    functools
+    json
+    threading
+    time
+    sys
+    os
+
+Example:
+    import metrics
+
+    @metrics.timed('export.file')
+    def export_file(...):
+        ...
+
+    with metrics.timer('scan.decode'):
+        decode_frame(frame)
+    metrics.count('scan.confirmed')
+
+    metrics.start()
+    metrics.stop()
+"""
+
+import os
+import sys
+import json
+import time
+import bisect
+import pstats
+import cProfile
+import logging
+import functools
+import threading
+from collections import Counter
+from contextlib import nullcontext
+from logging.handlers import RotatingFileHandler
+
+ENABLED = os.environ.get('APPINVENTARIO_METRICS', '').strip() not in ('', '0')
+PROFILER = os.environ.get('APPINVENTARIO_PROFILE', '').strip().lower()  # '', 'cprofile' or 'sample'.
+METRICS_DIR = os.environ.get('APPINVENTARIO_METRICS_DIR', 'C:\\Users\\lara_\\OneDrive\\Desktop\\AppInventario\\AppInventario\\metriche')
+FLUSH_SECONDS = 60  # Seconds between two writes of the metrics.
+MAX_BYTES = 5 * 1024 * 1024  # Size of the file of the metrics after which it is rotated.
+BACKUP_COUNT = 5  # Old files of the metrics kept.
+SAMPLE_MS = 10  # Milliseconds between two samples of the sampling profiler.
+BUCKETS = tuple(0.000001 * 2 ** (index / 2) for index in range(48))  # Upper bounds (seconds) of the histograms, from 1 microsecond to about 12 s.
+
+_NULL_TIMER = nullcontext()
+
+class Histogram:
+    """Histogram of latencies with fixed buckets growing by a factor of sqrt(2), so the percentiles have an error of at most 41%
+    without keeping the single values.
+
+    Attributes:
+        count (int): number of values.
+        total (float): sum of the values (seconds).
+        maximum (float): greatest value (seconds).
+        buckets (list): number of values of each bucket, the last one for the values greater than BUCKETS[-1].
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)
+
+    def add(self, seconds: float):
+        """Add a value (seconds) to the histogram."""
+
+        self.count += 1
+        self.total += seconds
+        self.maximum = max(self.maximum, seconds)
+        self.buckets[bisect.bisect_left(BUCKETS, seconds)] += 1
+
+    def percentile(self, percent: float) -> float:
+        """Return the upper bound (seconds) of the bucket containing the percentile, the maximum for the last bucket."""
+
+        rank = percent / 100 * self.count
+        seen = 0
+        for index, number in enumerate(self.buckets):
+            seen += number
+            if seen >= rank and number:
+                return min(BUCKETS[index], self.maximum) if index < len(BUCKETS) else self.maximum
+        return self.maximum
+
+    def summary(self) -> dict:
+        """Return count, mean, 50th, 90th and 99th percentile and maximum of the histogram, in milliseconds."""
+
+        return {
+            'count': self.count,
+            'mean_ms': round(self.total / self.count * 1000, 3),
+            'p50_ms': round(self.percentile(50) * 1000, 3),
+            'p90_ms': round(self.percentile(90) * 1000, 3),
+            'p99_ms': round(self.percentile(99) * 1000, 3),
+            'max_ms': round(self.maximum * 1000, 3),
+        }
+
+class _Timer:
+    """Context that adds the seconds spent inside it to a histogram."""
+
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        observe(self.name, time.perf_counter() - self.start)
+        return False
+
+_lock = threading.Lock()
+_counters = Counter()
+_histograms = {}
+_logger = None
+_flush_thread = None
+_stop_event = threading.Event()
+_profiler = None
+
+def count(name: str, number: int = 1):
+    """Add number to the counter name.
+
+    Args:
+        name (str): name of the counter (e.g. 'scan.confirmed').
+        number (int): value added.
+    """
+
+    if not ENABLED:
+        return
+    with _lock:
+        _counters[name] += number
+
+def observe(name: str, seconds: float):
+    """Add a latency to the histogram name.
+
+    Args:
+        name (str): name of the histogram (e.g. 'export.file').
+        seconds (float): latency in seconds.
+    """
+
+    if not ENABLED:
+        return
+    with _lock:
+        histogram = _histograms.get(name)
+        if histogram is None:
+            histogram = _histograms[name] = Histogram()
+        histogram.add(seconds)
+
+def timer(name: str):
+    """Return a context that measures the seconds spent inside it in the histogram name (an empty context if the metrics are off).
+
+    Example:
+        >>> with metrics.timer('scan.decode'):
+        ...     decode_frame(frame)
+    """
+
+    return _Timer(name) if ENABLED else _NULL_TIMER
+
+def timed(name: str):
+    """Decorator that measures each call of a function in the histogram name.
+
+    If the metrics are off the function is returned without changes, so it has no cost.
+
+    Arg:
+        name (str): name of the histogram.
+    """
+
+    def decorator(function):
+        if not ENABLED:
+            return function
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                observe(name, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+def snapshot(reset: bool = False) -> dict:
+    """Return the counters and the summaries of the histograms.
+
+    Arg:
+        reset (bool): True to empty the counters and the histograms, so the next snapshot contains only the new values.
+
+    Return:
+        (dict): keys 'counters' (dict name -> value) and 'histograms' (dict name -> summary, see Histogram.summary()).
+    """
+
+    global _histograms
+    with _lock:
+        result = {'counters': dict(_counters),
+                  'histograms': {name: histogram.summary() for name, histogram in _histograms.items()}}
+        if reset:
+            _counters.clear()
+            _histograms = {}
+    return result
+
+def flush():
+    """Write the metrics of the last period as a JSON line, if there are new values."""
+
+    if _logger is None:
+        return
+    values = snapshot(reset=True)
+    if values['counters'] or values['histograms']:
+        _logger.info(json.dumps({'time': time.strftime('%Y-%m-%d %H:%M:%S'), 'pid': os.getpid(), **values}))
+
+def _flush_loop():
+    while not _stop_event.wait(FLUSH_SECONDS):
+        flush()
+
+def start():
+    """Start writing the metrics every FLUSH_SECONDS seconds and the profiler, according to the environment variables.
+
+    Called when the App starts, it does nothing if the metrics and the profiler are off.
+    The errors of the environment variables and of METRICS_DIR are logged as warnings and never raised,
+    so the App starts anyway, without metrics or without profiler.
+    """
+
+    global _logger, _flush_thread
+    handler = None
+    if ENABLED and _logger is None:
+        try:
+            os.makedirs(METRICS_DIR, exist_ok=True)
+            handler = RotatingFileHandler(os.path.join(METRICS_DIR, 'metriche.jsonl'), maxBytes=MAX_BYTES, backupCount=BACKUP_COUNT,
+                                          encoding='utf-8')
+        except OSError as error:
+            logging.getLogger('appinventario').warning('Metriche disattivate, cartella non scrivibile: %s', error)
+
+    if handler is not None:
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        _logger = logging.getLogger('appinventario.metrics')
+        _logger.setLevel(logging.INFO)
+        _logger.propagate = False
+        _logger.addHandler(handler)
+
+        _stop_event.clear()
+        _flush_thread = threading.Thread(target=_flush_loop, daemon=True)
+        _flush_thread.start()
+
+    if PROFILER:
+        try:
+            start_profiling(PROFILER)
+        except ValueError as error:  # e.g. a typo in APPINVENTARIO_PROFILE.
+            logging.getLogger('appinventario').warning("%s La sessione continua senza profiler ('cprofile' o 'sample').", error)
+
+def stop():
+    """Stop the profiler and save its results, then write the last metrics and close the file. Called when the App is closed."""
+
+    global _logger, _flush_thread
+    try:
+        stop_profiling()
+    except OSError as error:
+        logging.getLogger('appinventario').warning('Risultati del profiler non salvati: %s', error)
+    if _logger is None:
+        return
+
+    _stop_event.set()
+    _flush_thread.join(timeout=1)
+    _flush_thread = None
+    flush()
+    for handler in list(_logger.handlers):
+        handler.close()
+        _logger.removeHandler(handler)
+    _logger = None
+
+class SamplingProfiler:
+    """SamplingProfiler samples the stacks of all the threads every interval seconds in a background thread.
+
+    Its cost does not depend on the number of calls of the functions, so it can run during a whole session.
+
+    Attributes:
+        interval (float): seconds between two samples.
+        stacks (Counter): number of samples of each stack (tuple of 'file:function' from the outermost call).
+    """
+
+    def __init__(self, interval: float = SAMPLE_MS / 1000):
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        own_id = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_id:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(os.path.basename(frame.f_code.co_filename) + ':' + frame.f_code.co_name)
+                frame = frame.f_back
+            stack.append(names.get(thread_id, str(thread_id)))
+            self.stacks[tuple(reversed(stack))] += 1
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            self._sample()
+
+    def enable(self):
+        """Start sampling."""
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def disable(self):
+        """Stop sampling."""
+
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def save(self, path: str):
+        """Save the stacks in the collapsed format of the flame graphs ('thread;file:function;... samples')."""
+
+        with open(path, 'w', encoding='utf-8') as output:
+            for stack, samples in self.stacks.most_common():
+                output.write(';'.join(stack) + ' ' + str(samples) + '\n')
+
+def start_profiling(kind: str = 'cprofile'):
+    """Start a profiler for the session.
+
+    Arg:
+        kind (str): 'cprofile' (cProfile on the thread calling this function) or 'sample' (sampling of all the threads).
+    """
+
+    global _profiler
+    if _profiler is not None:
+        return
+    if kind == 'cprofile':
+        _profiler = cProfile.Profile()
+    elif kind == 'sample':
+        _profiler = SamplingProfiler()
+    else:
+        raise ValueError('Profiler non valido: ' + kind + '.')
+    _profiler.enable()
+
+def stop_profiling() -> str:
+    """Stop the profiler and save its results in METRICS_DIR.
+
+    Return:
+        (str): path of the saved results, None if no profiler was running.
+    """
+
+    global _profiler
+    if _profiler is None:
+        return None
+
+    profiler, _profiler = _profiler, None
+    profiler.disable()
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    date = time.strftime('%Y%m%d_%H%M%S')
+
+    if isinstance(profiler, SamplingProfiler):
+        path = os.path.join(METRICS_DIR, 'campioni_' + date + '.txt')
+        profiler.save(path)
+        return path
+
+    path = os.path.join(METRICS_DIR, 'profilo_' + date + '.prof')
+    profiler.dump_stats(path)
+    with open(os.path.join(METRICS_DIR, 'profilo_' + date + '.txt'), 'w', encoding='utf-8') as output:
+        pstats.Stats(path, stream=output).sort_stats('cumulative').print_stats(50)
+    return path
@@ -0,0 +1,80 @@
+"""This module contains the function that imports new articles into the MP registry from a spreadsheet (Excel or CSV file).
+
+The rows are read one at a time and the articles are checked in blocks of rows with the batch checks
+(same rules of check_new_art: 8 characters, only capital letters and numbers, not already in the MP registry, not repeated in the file).
+The valid articles are added to the registry with a single write, the rejected rows are returned (and saved in a CSV report).
+
+Dependencies:
+    spreadsheet_reader: the module containing the functions that read the rows of a spreadsheet in blocks and write the rejected rows.
+    articles_registry: ArticlesRegistry implementation.
+    check_values: the module containing the batch check of the format of the articles.
+
+Example:
+    from registry_import import import_articles
+    from check_values import registry
+
+    added, rejected = import_articles('nuovi_articoli.xlsx', registry, 'nuovi_articoli_scartati.csv')
+"""
+
+from spreadsheet_reader import iter_rows, iter_row_chunks, write_rejects
+from articles_registry import ArticlesRegistry
+from check_values import check_art_format_batch, art_format_reason
+
+REJECTS_HEADER = ['Riga', 'Articolo', 'Motivo']  # Columns of the CSV report of the rejected rows.
+
+def _find_column(header: tuple) -> tuple:
+    """Return the position of the column of the articles if the row is a header, otherwise None."""
+
+    return (header.index('ARTICOLO'),) if 'ARTICOLO' in header else None
+
+def _check_chunk(chunk: list, registry: ArticlesRegistry, new_articles: set, rejected: list):
+    """Check a block of rows (row_number, article), adding the valid articles to new_articles and the others to rejected."""
+
+    if not chunk:
+        return
+
+    arts = [art for _, art in chunk]
+    valid_format = check_art_format_batch(arts)
+    in_registry = registry.contains_batch(arts)
+
+    for (row_number, art), valid, present in zip(chunk, valid_format, in_registry):
+        if not valid:
+            rejected.append((row_number, art, art_format_reason(art)))
+        elif art in new_articles:
+            rejected.append((row_number, art, 'Duplicato nel file'))
+        elif present:
+            rejected.append((row_number, art, 'Gia\' presente in anagrafica'))
+        else:
+            new_articles.add(art)
+
+def import_articles(file_path: str, registry: ArticlesRegistry, rejects_path: str = None) -> tuple:
+    """Import the articles of a spreadsheet into the MP registry.
+
+    The articles are read from the 'ARTICOLO' column if the first row is a header containing it, otherwise from the first column.
+
+    Args:
+        file_path (str): path of the spreadsheet (Excel or CSV file).
+        registry (ArticlesRegistry): MP registry where the articles are added.
+        rejects_path (str): path of the CSV report of the rejected rows, not written if None or if there are no rejected rows.
+
+    Return:
+        tuple (added, rejected): added (int) is the number of articles added to the registry,
+        rejected (list) is a list of tuples (row_number, article, reason).
+
+    Example:
+        >>> import_articles('nuovi_articoli.csv', registry)
+        (2, [(4, 'Z903510', 'Formato non valido'), (5, 'Z9035105', 'Duplicato nel file')])
+    """
+
+    new_articles = set()
+    rejected = []
+
+    for chunk, chunk_rejected in iter_row_chunks(iter_rows(file_path), _find_column, (0,), 'Articolo mancante'):
+        _check_chunk(chunk, registry, new_articles, chunk_rejected)
+        chunk_rejected.sort()  # Rows without article are rejected before the block they belong to is checked.
+        rejected.extend(chunk_rejected)
+
+    added = registry.add_many(list(new_articles))
+    write_rejects(rejects_path, REJECTS_HEADER, rejected)
+
+    return added, rejected
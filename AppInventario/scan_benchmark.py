@@ -0,0 +1,344 @@
+"""This module contains benchmark_scan and benchmark_pipeline, two functions that measure the detection of the barcodes
+without camera and without user interface.
+
+benchmark_scan: the frames of a source (see frame_sources) go through the stages of the detection one by one in the same thread,
+each stage measured: capture (read of the frame), locate (candidate regions) and decode (pyzbar on the regions or on the whole frame),
+both measured inside barcode_locator.decode_frame, the same function used by the App, and validate
+(voting of ConsensusBuffer and check of article and quantity).
+The frames skipped by the adaptive skip of BarcodeDetector go through the capture stage only.
+
+benchmark_pipeline: the frames of the source are read and decoded by ScanPipeline, as in the App, with the decoding
+in the decode thread or in a DecodePool (workers), so the two can be compared. The source should return the frames
+at its fps (realtime, as a camera): the frames not decoded in time are dropped as in the App.
+
+The results are:
+- fps: frames processed per second.
+- latency of each stage in milliseconds (50th, 90th and 99th percentile and mean).
+- read rate: labels confirmed with the right pair of codes on the labels shown (only for SyntheticSource),
+  frame read rate: decoded frames with the right pair (any valid pair if the right one is not known).
+- false pair rate: confirmed pairs different from the label shown (or not valid if it is not known) on all the confirmed pairs.
+With benchmark_pipeline the latency of the stages is not measured, but the frames decoded, skipped and dropped are counted.
+
+The benchmark can be started from the command line, the results are printed and can be written in a JSON file:
+    python scan_benchmark.py --source synthetic --labels 50 --json risultati.json
+    python scan_benchmark.py --source C:/Users/Lara/Desktop/video.mp4
+    python scan_benchmark.py --pipeline --workers 0
+    python scan_benchmark.py --pipeline --workers 3
+
+Dependencies:
+    numpy
+    barcode_locator: the module containing decode_frame and BarcodeDetector.
+    scan_consensus: ConsensusBuffer and RecentRecords implementations.
+    scan_pipeline: ScanPipeline implementation.
+    decode_pool: DecodePool implementation.
+    frame_sources: the sources of the frames.
+    check_values: the module containing the checks of article and quantity.
+    argparse
+    json
+    os
+    threading
+    time
+"""
+
+import os
+import json
+import time
+import argparse
+import threading
+import numpy as np
+from barcode_locator import BarcodeDetector, decode_frame, LOCATE_WIDTH, MAX_SKIP, FULL_FRAME_EVERY
+from scan_consensus import ConsensusBuffer, RecentRecords, CONSENSUS_WINDOW, CONSENSUS_VOTES
+from scan_pipeline import ScanPipeline
+from decode_pool import DecodePool
+from frame_sources import SyntheticSource, VideoFileSource, ImageFolderSource
+from check_values import check_art, check_art_format, split_record
+
+STAGES = ('capture', 'locate', 'decode', 'validate')
+DRAIN_SECONDS = 0.5  # Seconds waited at the end of the source for the frames still being decoded by the pipeline.
+
+def _percentiles(values: list) -> dict:
+    """Return the 50th, 90th and 99th percentile and the mean of a list of seconds, in milliseconds."""
+
+    if not values:
+        return {'p50': None, 'p90': None, 'p99': None, 'mean': None}
+    milliseconds = np.array(values) * 1000
+    p50, p90, p99 = np.percentile(milliseconds, [50, 90, 99])
+    return {'p50': round(float(p50), 3), 'p90': round(float(p90), 3), 'p99': round(float(p99), 3),
+            'mean': round(float(milliseconds.mean()), 3)}
+
+def benchmark_scan(source, max_frames: int = None, detector: BarcodeDetector = None, consensus: ConsensusBuffer = None,
+                   check_article=check_art_format) -> dict:
+    """Process the frames of a source with the stages of the detection and return the measures.
+
+    Args:
+        source (SyntheticSource, VideoFileSource or ImageFolderSource): source of the frames, not repeated at the end (loop=False).
+        max_frames (int): maximum number of frames processed, None for all the frames of the source.
+        detector (BarcodeDetector): detector choosing how each frame is decoded, None for the one of the App.
+        consensus (ConsensusBuffer): voting of the pairs of codes, None for the one of the App.
+        check_article (function): check of the articles of the confirmed pairs (default only the format, check_art for the MP registry).
+
+    Return:
+        (dict): keys 'frames', 'decoded_frames', 'seconds', 'fps', 'stages' (latency of each stage), 'labels', 'labels_read',
+        'read_rate', 'frame_read_rate', 'confirmed_pairs', 'false_pairs' and 'false_pair_rate'.
+
+    Example:
+        >>> benchmark_scan(SyntheticSource(labels = 20))['read_rate']
+        1.0
+    """
+
+    detector = detector or BarcodeDetector()
+    consensus = consensus or ConsensusBuffer()
+    times = {stage: [] for stage in STAGES}
+    timings = {}  # Seconds of the stages of decode_frame for the last frame.
+    known = isinstance(source, SyntheticSource)  # The right pair of codes of each frame is known.
+
+    frames = decoded_frames = frames_read = confirmed_pairs = false_pairs = 0
+    labels_read = set()
+
+    if not source.open():
+        raise ValueError('Impossibile aprire la sorgente dei frame.')
+    start = time.perf_counter()
+    try:
+        while max_frames is None or frames < max_frames:
+            t0 = time.perf_counter()
+            ret, frame = source.read()
+            t1 = time.perf_counter()
+            if not ret:
+                break
+            frames += 1
+            times['capture'].append(t1 - t0)
+
+            mode = detector.next_mode()
+            if mode is None:
+                continue  # Frame skipped, as in ScanPipeline.
+            decoded_frames += 1
+
+            decoded_info, found = decode_frame(frame, mode == 'full', detector.locate_width, timings)
+            detector.update(found)
+            times['locate'].append(timings['locate'])
+            times['decode'].append(timings['decode'])
+            t4 = time.perf_counter()
+
+            decoded_text = {code.data.decode('utf-8') for code in decoded_info}
+            pair = frozenset(decoded_text) if len(decoded_text) == 2 else None
+            confirmed = consensus.add(decoded_text)
+            record = split_record(list(confirmed), check_article) if confirmed is not None else None
+            times['validate'].append(time.perf_counter() - t4)
+
+            expected = source.expected if known else None
+            if pair is not None and (pair == expected if known else split_record(list(pair), check_article) is not None):
+                frames_read += 1
+
+            if confirmed is not None:
+                confirmed_pairs += 1
+                if known:
+                    if confirmed == expected and record is not None:
+                        labels_read.add(source.label_index())
+                    else:
+                        false_pairs += 1
+                elif record is None:
+                    false_pairs += 1
+    finally:
+        source.release()
+
+    seconds = time.perf_counter() - start
+    labels = len(source.labels) if known else None
+    return {
+        'frames': frames,
+        'decoded_frames': decoded_frames,
+        'seconds': round(seconds, 3),
+        'fps': round(frames / seconds, 1) if seconds else None,
+        'stages': {stage: _percentiles(times[stage]) for stage in STAGES},
+        'labels': labels,
+        'labels_read': len(labels_read) if known else None,
+        'read_rate': round(len(labels_read) / labels, 4) if labels else None,
+        'frame_read_rate': round(frames_read / decoded_frames, 4) if decoded_frames else None,
+        'confirmed_pairs': confirmed_pairs,
+        'false_pairs': false_pairs,
+        'false_pair_rate': round(false_pairs / confirmed_pairs, 4) if confirmed_pairs else 0.0,
+    }
+
+class _CountedSource:
+    """Source of the frames given to ScanPipeline in place of the camera: it counts the frames read and
+    tells when the source has ended (or max_frames frames have been read).
+    """
+
+    def __init__(self, source, max_frames: int = None):
+        self.source = source
+        self.max_frames = max_frames
+        self.frames = 0
+        self.finished = threading.Event()
+
+    @property
+    def rotate(self) -> bool:
+        return self.source.rotate
+
+    def open(self) -> bool:
+        return self.source.open()
+
+    def read(self) -> tuple:
+        if self.finished.is_set() or self.max_frames is not None and self.frames >= self.max_frames:
+            self.finished.set()
+            return False, None
+        ret, frame = self.source.read()
+        if not ret:
+            self.finished.set()
+            return False, None
+        self.frames += 1
+        return ret, frame
+
+    def release(self):
+        self.source.release()
+
+def benchmark_pipeline(source, max_frames: int = None, workers: int = 0, detector: BarcodeDetector = None,
+                       consensus: ConsensusBuffer = None, check_article=check_art_format) -> dict:
+    """Read and decode the frames of a source with ScanPipeline in continuous mode, as the App does, and return the measures.
+
+    Args:
+        source (SyntheticSource, VideoFileSource or ImageFolderSource): source of the frames, not repeated at the end (loop=False),
+            with realtime=True so the frames are returned at the fps of the source as a camera would do.
+        max_frames (int): maximum number of frames read, None for all the frames of the source.
+        workers (int): processes of the DecodePool decoding the frames, 0 to decode them in the decode thread.
+        detector (BarcodeDetector): detector choosing how each frame is decoded, None for the one of the App.
+        consensus (ConsensusBuffer): voting of the pairs of codes, None for the one of the App.
+        check_article (function): check of the articles of the confirmed pairs (default only the format, check_art for the MP registry).
+
+    Return:
+        (dict): keys 'workers', 'frames' (read), 'decoded_frames', 'skipped_frames', 'dropped_frames' (read but replaced
+        by a newer frame before being decoded), 'seconds', 'fps', 'decoded_fps', 'labels', 'labels_read', 'read_rate',
+        'confirmed_pairs', 'false_pairs' and 'false_pair_rate'.
+
+    Example:
+        >>> benchmark_pipeline(SyntheticSource(labels = 20, realtime = True), workers = 3)['read_rate']
+        1.0
+    """
+
+    counted = _CountedSource(source, max_frames)
+    pool = DecodePool(workers=workers) if workers else None
+    pipeline = ScanPipeline(counted, pool=pool, recent_records=RecentRecords(), continuous=True)
+    if detector is not None:
+        pipeline.detector = detector
+    if consensus is not None:
+        pipeline.consensus = consensus
+
+    confirmed = []
+    try:
+        if not pipeline.start():
+            raise ValueError('Impossibile aprire la sorgente dei frame.')
+        start = time.perf_counter()
+        while not counted.finished.wait(0.05):
+            confirmed.extend(pipeline.get_confirmed())
+        seconds = time.perf_counter() - start
+        time.sleep(DRAIN_SECONDS)  # The last frames are still being decoded.
+    finally:
+        pipeline.stop()
+        counted.release()
+        if pool is not None:
+            pool.close()
+    confirmed.extend(pipeline.get_confirmed())
+
+    known = isinstance(source, SyntheticSource)
+    label_pairs = {frozenset(label) for label in source.labels} if known else set()
+    labels_read = set()
+    false_pairs = 0
+    for pair in confirmed:
+        record = split_record(list(pair), check_article)
+        if known and pair in label_pairs and record is not None:
+            labels_read.add(pair)
+        elif known or record is None:
+            false_pairs += 1
+
+    frames = counted.frames
+    labels = len(label_pairs) if known else None
+    return {
+        'workers': workers,
+        'frames': frames,
+        'decoded_frames': pipeline.decoded_frames,
+        'skipped_frames': pipeline.skipped_frames,
+        'dropped_frames': max(0, frames - pipeline.decoded_frames - pipeline.skipped_frames),
+        'seconds': round(seconds, 3),
+        'fps': round(frames / seconds, 1) if seconds else None,
+        'decoded_fps': round(pipeline.decoded_frames / seconds, 1) if seconds else None,
+        'labels': labels,
+        'labels_read': len(labels_read) if known else None,
+        'read_rate': round(len(labels_read) / labels, 4) if labels else None,
+        'confirmed_pairs': len(confirmed),
+        'false_pairs': false_pairs,
+        'false_pair_rate': round(false_pairs / len(confirmed), 4) if confirmed else 0.0,
+    }
+
+def print_results(results: dict):
+    """Print the results of benchmark_scan or benchmark_pipeline as a table."""
+
+    if 'workers' in results:
+        print('Pipeline ({}): frame {} in {} s, {} fps'.format('processi: ' + str(results['workers']) if results['workers'] else 'thread',
+                                                              results['frames'], results['seconds'], results['fps']))
+        print('Frame decodificati: {} ({} fps), saltati: {}, persi: {}'.format(results['decoded_frames'], results['decoded_fps'],
+                                                                              results['skipped_frames'], results['dropped_frames']))
+        if results['labels'] is not None:
+            print('Etichette lette: {}/{} (read rate {})'.format(results['labels_read'], results['labels'], results['read_rate']))
+        print('Coppie confermate: {}, errate: {} (false pair rate {})'.format(results['confirmed_pairs'], results['false_pairs'],
+                                                                              results['false_pair_rate']))
+        return
+
+    print('Frame: {} ({} decodificati) in {} s, {} fps'.format(results['frames'], results['decoded_frames'], results['seconds'], results['fps']))
+    print('{:<10}{:>10}{:>10}{:>10}{:>10}'.format('Fase', 'p50 ms', 'p90 ms', 'p99 ms', 'media ms'))
+    for stage, latency in results['stages'].items():
+        print('{:<10}{:>10}{:>10}{:>10}{:>10}'.format(stage, *(str(latency[key]) for key in ('p50', 'p90', 'p99', 'mean'))))
+    if results['labels'] is not None:
+        print('Etichette lette: {}/{} (read rate {})'.format(results['labels_read'], results['labels'], results['read_rate']))
+    print('Frame letti: {}'.format(results['frame_read_rate']))
+    print('Coppie confermate: {}, errate: {} (false pair rate {})'.format(results['confirmed_pairs'], results['false_pairs'],
+                                                                          results['false_pair_rate']))
+
+def _parse_args(args: list = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Benchmark della lettura dei codici senza camera.')
+    parser.add_argument('--source', default='synthetic', help="'synthetic', percorso di un video o di una cartella di immagini")
+    parser.add_argument('--max-frames', type=int, default=None, help='numero massimo di frame')
+    parser.add_argument('--labels', type=int, default=20, help='etichette generate (synthetic)')
+    parser.add_argument('--frames-per-label', type=int, default=15, help='frame per etichetta (synthetic)')
+    parser.add_argument('--width', type=int, default=1280, help='larghezza dei frame (synthetic)')
+    parser.add_argument('--height', type=int, default=720, help='altezza dei frame (synthetic)')
+    parser.add_argument('--noise', type=float, default=4.0, help='rumore gaussiano (synthetic)')
+    parser.add_argument('--blur', type=int, default=0, help='sfocatura gaussiana, numero dispari (synthetic)')
+    parser.add_argument('--seed', type=int, default=0, help='seme dei numeri casuali (synthetic)')
+    parser.add_argument('--locate-width', type=int, default=LOCATE_WIDTH)
+    parser.add_argument('--max-skip', type=int, default=MAX_SKIP)
+    parser.add_argument('--full-frame-every', type=int, default=FULL_FRAME_EVERY)
+    parser.add_argument('--window', type=int, default=CONSENSUS_WINDOW)
+    parser.add_argument('--votes', type=int, default=CONSENSUS_VOTES)
+    parser.add_argument('--registry', action='store_true', help="controlla gli articoli anche sull'anagrafica")
+    parser.add_argument('--pipeline', action='store_true', help='usa ScanPipeline come la App, con i frame alla velocita\' della sorgente')
+    parser.add_argument('--workers', type=int, default=0, help='processi di DecodePool con --pipeline, 0 per il thread di decodifica')
+    parser.add_argument('--json', default=None, help='file JSON in cui scrivere i risultati')
+    return parser.parse_args(args)
+
+def main(args: list = None):
+    """Run benchmark_scan with the arguments of the command line."""
+
+    args = _parse_args(args)
+    realtime = args.pipeline  # The pipeline reads the frames at the fps of the source, as from a camera.
+    if args.source == 'synthetic':
+        source = SyntheticSource(labels=args.labels, width=args.width, height=args.height, frames_per_label=args.frames_per_label,
+                                 noise=args.noise, blur=args.blur, seed=args.seed, realtime=realtime)
+    elif os.path.isdir(args.source):
+        source = ImageFolderSource(args.source, realtime=realtime)
+    else:
+        source = VideoFileSource(args.source, realtime=realtime)
+
+    detector = BarcodeDetector(args.locate_width, args.max_skip, args.full_frame_every)
+    consensus = ConsensusBuffer(args.window, args.votes)
+    check_article = check_art if args.registry else check_art_format
+    if args.pipeline:
+        results = benchmark_pipeline(source, args.max_frames, args.workers, detector, consensus, check_article)
+    else:
+        results = benchmark_scan(source, args.max_frames, detector, consensus, check_article)
+    print_results(results)
+
+    if args.json:
+        results['arguments'] = vars(args)
+        with open(args.json, 'w') as json_file:
+            json.dump(results, json_file, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+"""This module contains the ConsensusBuffer and RecentRecords implementations, two classes that decide when the barcodes
+decoded from the frames of the camera are a reliable record (article, quantity).
+
+- ConsensusBuffer: sliding window of the last CONSENSUS_WINDOW decoded frames. A pair of codes is confirmed
+  when it is decoded in at least CONSENSUS_VOTES frames of the window, so a wrong reading of a single frame
+  (or a frame with the codes of two different labels) does not open the popup.
+- RecentRecords: pairs inserted in the last RECENT_TTL seconds. A confirmed pair already inserted is ignored,
+  so the same label in front of the camera is not inserted again.
+
+Dependencies:
+    collections
+    threading
+    time
+
+Example:
+    from scan_consensus import ConsensusBuffer, RecentRecords
+
+    consensus = ConsensusBuffer()
+    recent_records = RecentRecords()
+
+    pair = consensus.add({'90351051', '1000'})  # None until the pair is confirmed.
+    if pair is not None and pair not in recent_records:
+        recent_records.add(pair)
+"""
+
+import time
+import threading
+from collections import deque
+
+CONSENSUS_WINDOW = 5  # Number of the last decoded frames used for the voting.
+CONSENSUS_VOTES = 3  # Number of frames of the window that must contain the same pair of codes.
+RECENT_TTL = 30  # Seconds after which a record inserted can be inserted again.
+
+class ConsensusBuffer:
+    """ConsensusBuffer confirms a pair of codes when it is decoded in enough frames of a sliding window.
+
+    Attributes:
+        window (int): number of the last decoded frames used for the voting.
+        votes (int): number of frames of the window that must contain the same pair of codes.
+    """
+
+    def __init__(self, window: int = CONSENSUS_WINDOW, votes: int = CONSENSUS_VOTES):
+        """Initialize ConsensusBuffer with window and votes.
+
+        Args:
+            window (int): number of the last decoded frames used for the voting.
+            votes (int): number of frames of the window that must contain the same pair of codes.
+        """
+
+        self.window = window
+        self.votes = votes
+        self._frames = deque(maxlen=window)  # Pair of codes of each frame, None for the frames without exactly two codes.
+
+    def add(self, decoded_text: set) -> frozenset:
+        """Add the codes decoded from a frame to the window.
+
+        Arg:
+            decoded_text (set): decoded texts of the barcodes of the frame.
+
+        Return:
+            (frozenset): the pair of codes if it is confirmed by this frame, otherwise None.
+            After a confirmation the window is emptied, so the same pair is confirmed again only by new frames.
+
+        Example:
+            >>> consensus = ConsensusBuffer(window = 5, votes = 3)
+            >>> [consensus.add({'90351051', '1000'}) for _ in range(3)]
+            [None, None, frozenset({'90351051', '1000'})]
+        """
+
+        pair = frozenset(decoded_text) if len(decoded_text) == 2 else None
+        self._frames.append(pair)
+        if pair is None:
+            return None
+
+        if sum(1 for frame_pair in self._frames if frame_pair == pair) < self.votes:
+            return None
+
+        self._frames.clear()
+        return pair
+
+    def clear(self):
+        """Empty the window."""
+
+        self._frames.clear()
+
+class RecentRecords:
+    """RecentRecords contains the pairs of codes inserted in the last seconds, each one until its time to live expires.
+
+    The pairs can be added and checked by different threads.
+
+    Attributes:
+        ttl (float): seconds after which a pair is removed.
+    """
+
+    def __init__(self, ttl: float = RECENT_TTL):
+        """Initialize RecentRecords with ttl.
+
+        Arg:
+            ttl (float): seconds after which a pair is removed.
+        """
+
+        self.ttl = ttl
+        self._expiry = {}  # Pair of codes -> time when it is removed.
+        self._lock = threading.Lock()
+
+    def add(self, pair):
+        """Add a pair of codes (article and quantity), or renew it if it is already contained.
+
+        Arg:
+            pair (set or frozenset): codes of the record inserted.
+        """
+
+        with self._lock:
+            self._expiry[frozenset(pair)] = time.monotonic() + self.ttl
+
+    def discard(self, pair):
+        """Remove a pair of codes, if contained (the record has been cancelled, so it can be inserted again).
+
+        Arg:
+            pair (set or frozenset): codes of the record.
+        """
+
+        with self._lock:
+            self._expiry.pop(frozenset(pair), None)
+
+    def __contains__(self, pair) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            for expired in [key for key, expiry in self._expiry.items() if expiry <= now]:
+                del self._expiry[expired]
+            return frozenset(pair) in self._expiry
@@ -0,0 +1,295 @@
+"""This module contains the ScanPipeline implementation, a class that reads the frames of the PC camera and decodes their barcodes
+in background threads, so the user interface is never blocked.
+
+The pipeline is a producer/consumer chain of two threads connected by bounded queues:
+- capture thread: reads the frames from the camera (CameraSession, kept open after the pipeline stops) and puts them in a queue of one frame.
+  If the frame has not been taken yet, it is replaced by the new one (stale frames are dropped), so the decoding works always
+  on the last frame and the latency does not grow during a long session.
+- decode thread: decodes the barcodes of the frame (only the regions containing codes are decoded, see barcode_locator)
+  and draws them on the frame, then puts the result (frame, decoded texts) in the queue of the results.
+  With a DecodePool, the frames are sent to a pool of processes and the thread collects their results in order.
+  The pool is reserved by the decode thread, so the decode thread of the previous detection, if it is still finishing a frame
+  after stop(), releases the pool (discarding its own frames) before the new one uses it.
+  The pairs of codes are voted by a ConsensusBuffer: when a pair (article and quantity) is confirmed by more frames,
+  and it has not been inserted recently (RecentRecords), it is put in the queue of the confirmed pairs and the pipeline stops.
+  In continuous mode the pipeline does not stop: the confirmed pair is added to RecentRecords and the reading goes on.
+The user interface takes the results with get_result() and get_confirmed() (VideoDetection calls them with after()).
+
+Dependencies:
+    cv2 (OpenCV): open source computer vision and machine learning software library.
+    camera_session: CameraSession implementation.
+    barcode_locator: BarcodeDetector implementation.
+    decode_pool: DecodePool implementation.
+    scan_consensus: ConsensusBuffer and RecentRecords implementations.
+    metrics: the module containing the counters and the latency histograms of the App.
+    threading
+    queue
+
+Example:
+    from scan_pipeline import ScanPipeline
+
+    camera = CameraSession.from_config()
+    camera.open()
+    pipeline = ScanPipeline(camera)
+    pipeline.start()
+    result = pipeline.get_result()  # None if there are no new results.
+    confirmed_pairs = pipeline.get_confirmed()
+    pipeline.stop()
+"""
+
+import queue
+import threading
+import cv2
+from camera_session import CameraSession
+from barcode_locator import BarcodeDetector, decode_frame
+from decode_pool import DecodePool
+from scan_consensus import ConsensusBuffer, RecentRecords
+import metrics
+
+POOL_WAIT = 0.01  # Seconds waited for a frame or a free slot while the pool is decoding, before collecting its results.
+
+def _put_latest(target: queue.Queue, item):
+    """Put an item in a queue of one element, replacing the item not taken yet."""
+
+    try:
+        target.get_nowait()
+    except queue.Empty:
+        pass
+    target.put_nowait(item)
+
+def draw_codes(frame, decoded_info: list) -> set:
+    """Draw the bounding box and the decoded text of each barcode on the frame.
+
+    Args:
+        frame (np.ndarray): frame of the camera.
+        decoded_info (list): barcodes decoded by pyzbar.
+
+    Return:
+        decoded_text (set): decoded texts of the barcodes.
+    """
+
+    decoded_text = set()
+    for code in decoded_info:
+        # Extract the bounding box coordinates and barcodes data.
+        (x, y, w, h) = code.rect
+        data = code.data.decode("utf-8")
+        decoded_text.add(data)
+
+        # Put the decoded text on the frame.
+        font = cv2.FONT_HERSHEY_SIMPLEX
+        font_scale = 0.5
+        thickness = 1
+        text_size, _ = cv2.getTextSize(text=data, fontFace=font, fontScale=font_scale, thickness=thickness)
+        cv2.putText(
+             img=frame,
+             text=data,
+             org=(x, y - text_size[1]),
+             fontFace=font,
+             fontScale=font_scale,
+             color=(0, 0, 255),
+             thickness=thickness,
+             lineType=cv2.LINE_AA,
+        )
+
+        cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 0), 2)  # Draw the bounding box around the barcode on the frame.
+
+    return decoded_text
+
+class ScanPipeline:
+    """ScanPipeline reads the frames of the PC camera and decodes their barcodes in two background threads.
+
+    Attributes:
+        camera (CameraSession): open camera, not released by the pipeline.
+        rotate (bool): True if the frames are rotated by 90 degrees (tablet used in portrait mode).
+        detector (BarcodeDetector): detector choosing how each frame is decoded (skipped, candidate regions or whole frame).
+        pool (DecodePool): pool of processes decoding the frames, None to decode them in the decode thread.
+        consensus (ConsensusBuffer): voting of the pairs of codes of the last frames.
+        recent_records (RecentRecords): pairs inserted recently, ignored when confirmed again.
+        continuous (bool): True if the pipeline goes on after a pair is confirmed.
+        running (bool): True while the pipeline is running.
+        decoded_frames (int): frames decoded and voted since the pipeline was created.
+        skipped_frames (int): frames skipped by the detector since the pipeline was created.
+    """
+
+    def __init__(self, camera: CameraSession, rotate: bool = None, pool: DecodePool = None,
+                 recent_records: RecentRecords = None, continuous: bool = False):
+        """Initialize ScanPipeline with camera, rotate, pool, recent_records and continuous.
+
+        Args:
+            camera (CameraSession): camera session, opened by start() if needed and not released by the pipeline.
+            rotate (bool): True if the frames are rotated by 90 degrees, None for the orientation of the camera session (read at each detection).
+            pool (DecodePool): pool of processes decoding the frames, None to decode them in the decode thread.
+                The pool is not closed by the pipeline, so it can be used by the next detections.
+            recent_records (RecentRecords): pairs inserted recently, None to accept every confirmed pair.
+            continuous (bool): True if the pipeline goes on after a pair is confirmed.
+        """
+
+        self.camera = camera
+        self.rotate = camera.rotate if rotate is None else rotate
+        self.detector = BarcodeDetector()
+        self.pool = pool
+        self.consensus = ConsensusBuffer()
+        self.recent_records = recent_records
+        self.continuous = continuous
+        self.decoded_frames = 0
+        self.skipped_frames = 0
+
+        self._frames = queue.Queue(maxsize=1)  # Last frame read, waiting to be decoded.
+        self._results = queue.Queue(maxsize=1)  # Last result (frame, decoded texts), waiting to be shown.
+        self._confirmed = queue.Queue()  # Confirmed pairs, never dropped.
+        self._stop = threading.Event()
+        self._threads = []
+
+    @property
+    def running(self) -> bool:
+        return bool(self._threads) and not self._stop.is_set()
+
+    def start(self) -> bool:
+        """Open the camera, if it is not open yet, and start the capture and decode threads.
+
+        Return:
+            (bool): False if the camera cannot be opened, otherwise True.
+        """
+
+        if self._threads:
+            return True
+        if not self.camera.open():
+            return False
+
+        self._stop.clear()
+        self._threads = [threading.Thread(target=self._capture_loop, daemon=True),
+                         threading.Thread(target=self._decode_loop, daemon=True)]
+        for thread in self._threads:
+            thread.start()
+        return True
+
+    def stop(self):
+        """Stop the threads, the camera stays open for the next detection."""
+
+        self._stop.set()
+        for thread in self._threads:
+            if thread is not threading.current_thread():
+                thread.join(timeout=1)
+        self._threads = []
+
+        for pending in (self._frames, self._results):
+            try:
+                pending.get_nowait()
+            except queue.Empty:
+                pass
+        # The confirmed pairs are kept, so the last ones can still be taken with get_confirmed().
+
+    def get_result(self) -> tuple:
+        """Return the last result of the decoding without waiting.
+
+        Return:
+            tuple (frame, decoded_text): None if there are no new results, frame (np.ndarray) with the barcodes drawn,
+            decoded_text (set) with the decoded texts of the barcodes.
+        """
+
+        try:
+            return self._results.get_nowait()
+        except queue.Empty:
+            return None
+
+    def get_confirmed(self) -> list:
+        """Return the pairs of codes confirmed by the voting since the last call, without waiting.
+
+        Return:
+            (list): confirmed pairs (frozenset) in the order they were confirmed.
+        """
+
+        confirmed_pairs = []
+        while True:
+            try:
+                confirmed_pairs.append(self._confirmed.get_nowait())
+            except queue.Empty:
+                return confirmed_pairs
+
+    def _capture_loop(self):
+        """Read the frames from the camera until the pipeline is stopped, keeping only the last one."""
+
+        while not self._stop.is_set():
+            ret, frame = self.camera.read()  # Capture a frame from the camera.
+            if not ret:
+                self._stop.wait(0.01)
+                continue
+            _put_latest(self._frames, frame)
+
+    def _publish(self, frame, decoded_info: list, vote: bool = True):
+        """Draw the decoded barcodes on the frame and put the result in the queue, stopping the pipeline when a pair is confirmed.
+
+        Args:
+            frame (np.ndarray): frame of the camera.
+            decoded_info (list): barcodes decoded in the frame.
+            vote (bool): False for the skipped frames, which are shown but not voted.
+        """
+
+        metrics.count('scan.frames' if vote else 'scan.skipped')
+        if vote:
+            self.decoded_frames += 1
+        else:
+            self.skipped_frames += 1
+        decoded_text = draw_codes(frame, decoded_info)
+
+        confirmed = self.consensus.add(decoded_text) if vote else None
+        if confirmed is not None and self.recent_records is not None and confirmed in self.recent_records:
+            confirmed = None  # Label just inserted: it is not proposed again.
+
+        _put_latest(self._results, (frame, decoded_text))
+        if confirmed is None:
+            return
+
+        metrics.count('scan.confirmed')
+        self._confirmed.put(confirmed)
+        if not self.continuous:
+            self._stop.set()  # The article and the quantity are confirmed: the reading stops.
+        elif self.recent_records is not None:
+            self.recent_records.add(confirmed)  # The label is not confirmed again while it stays in front of the camera.
+
+    def _collect(self):
+        """Publish the results of the frames decoded by the pool, in the order the frames were submitted."""
+
+        for frame, decoded_info, found in self.pool.get_results():
+            self.detector.update(found)
+            if not self._stop.is_set():
+                self._publish(frame, decoded_info)
+
+    def _decode_loop(self):
+        """Decode the barcodes of the last frame until the pipeline is stopped or a pair of codes is confirmed."""
+
+        if self.pool is not None:
+            while not self.pool.acquire(timeout=POOL_WAIT):  # The pool is still used by the previous detection.
+                if self._stop.is_set():
+                    return
+
+        try:
+            while not self._stop.is_set():
+                if self.pool is not None:
+                    self._collect()
+
+                try:
+                    frame = self._frames.get(timeout=POOL_WAIT if self.pool is not None and self.pool.pending() else 0.1)
+                except queue.Empty:
+                    continue
+
+                if self.rotate:
+                    frame = cv2.rotate(frame, cv2.ROTATE_90_CLOCKWISE)  # Rotation of the PC camera if the tablet is used in portrait mode.
+
+                mode = self.detector.next_mode()  # None if the frame is skipped.
+                if mode is None:
+                    self._publish(frame, [], vote=False)
+                elif self.pool is None:
+                    with metrics.timer('scan.decode'):
+                        decoded_info, found = decode_frame(frame, mode == 'full', self.detector.locate_width)
+                    self.detector.update(found)
+                    self._publish(frame, decoded_info)
+                else:
+                    # Backpressure: while all the slots are in use, the results are collected and no frame is read.
+                    with metrics.timer('scan.pool_submit'):
+                        while not self.pool.submit(frame, mode == 'full', timeout=POOL_WAIT) and not self._stop.is_set():
+                            self._collect()
+        finally:
+            if self.pool is not None:
+                self.pool.discard()  # The frames of this detection still being decoded are not returned to the next one.
+                self.pool.release()
@@ -0,0 +1,204 @@
+"""This module contains the function that reads the rows of a spreadsheet (Excel or CSV file) one at a time.
+
+The file is never loaded entirely in memory: Excel files are opened in read only mode and CSV files are read line by line,
+so files with hundreds of thousands of rows can be read with constant memory.
+
+It contains also the parts shared by the imports of a spreadsheet (registry_import and inventory_import):
+the rows are grouped in blocks of CHUNK_ROWS rows checked together (iter_row_chunks()), and the rejected rows
+are saved in a CSV report next to the spreadsheet (rejects_report_path() and write_rejects()).
+
+Dependencies:
+    openpyxl: library with writing and reading functionalities of Excel files.
+    csv: module for reading and writing CSV files.
+    itertools
+    typing
+    os
+
+Example:
+    from spreadsheet_reader import iter_rows
+
+    for row_number, row in iter_rows('nuovi_articoli.xlsx'):
+        print(row_number, row)
+"""
+
+import os
+import csv
+import itertools
+from typing import Optional
+import openpyxl
+
+CHUNK_ROWS = 10000  # Number of rows checked together by the imports.
+
+def _to_str(value) -> Optional[str]:
+    """Convert the value of a cell to string, integer numbers are written without decimals.
+
+    Return:
+        (str): value of the cell as string, None for empty cells.
+    """
+
+    if value is None:
+        return None
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+def iter_rows(file_path: str):
+    """Read a spreadsheet and return an iterator of its rows.
+
+    Excel files (.xlsx, .xlsm) are read with openpyxl in read only mode, any other file is read as CSV
+    (the delimiter among ',', ';' and tab is detected from the beginning of the file).
+    The cells written as numbers have no leading zeros (an article 00010012 written as a number is read as '10012'):
+    the imports reject these articles with their own reason (see check_values.art_format_reason()).
+
+    Arg:
+        file_path (str): path of the spreadsheet.
+
+    Return:
+        iterator of tuples (row_number, row): row_number (int) starts from 1, row (tuple) contains the values as string
+        (None for empty cells).
+
+    Example:
+        >>> list(iter_rows('nuovi_articoli.csv'))
+        [(1, ('ARTICOLO',)), (2, ('Z9035105',))]
+    """
+
+    extension = os.path.splitext(file_path)[1].lower()
+
+    if extension in ('.xlsx', '.xlsm'):
+        workbook = openpyxl.load_workbook(file_path, read_only=True)  # Read only mode streams the rows.
+        try:
+            for row_number, row in enumerate(workbook.active.iter_rows(values_only=True), start=1):
+                yield row_number, tuple(_to_str(value) for value in row)
+        finally:
+            workbook.close()
+
+    else:
+        with open(file_path, newline='', encoding='utf-8-sig') as csv_file:
+            sample = csv_file.read(4096)
+            csv_file.seek(0)
+            try:
+                dialect = csv.Sniffer().sniff(sample, delimiters=',;\t')
+            except csv.Error:  # Single column files have no delimiter.
+                dialect = csv.excel
+
+            yield from _iter_csv(csv_file, dialect)
+
+def _iter_csv(lines, dialect):
+    """Return an iterator of tuples (row_number, row) of the lines of a CSV file, with the values as in iter_rows()."""
+
+    for row_number, row in enumerate(csv.reader(lines, dialect), start=1):
+        yield row_number, tuple(_to_str(value) if value != '' else None for value in row)
+
+def iter_csv_rows(stream):
+    """Read a CSV text stream already open (e.g. sys.stdin) and return an iterator of its rows, as iter_rows().
+
+    The stream is read line by line and never from the beginning again, so the delimiter is detected from the first line only.
+
+    Arg:
+        stream (file object): text stream.
+
+    Return:
+        iterator of tuples (row_number, row), see iter_rows().
+
+    Example:
+        >>> list(iter_csv_rows(io.StringIO('Articolo;Quantita\'\n90351051;1000\n')))
+        [(1, ('Articolo', "Quantita'")), (2, ('90351051', '1000'))]
+    """
+
+    first_line = stream.readline()
+    if first_line.startswith('\ufeff'):  # Byte order mark of the files saved by Excel.
+        first_line = first_line[1:]
+    try:
+        dialect = csv.Sniffer().sniff(first_line, delimiters=',;\t')
+    except csv.Error:  # Single column files have no delimiter.
+        dialect = csv.excel
+
+    yield from _iter_csv(itertools.chain([first_line], stream), dialect)
+
+def iter_row_chunks(rows, find_columns, columns: tuple, missing_reason: str, chunk_rows: int = CHUNK_ROWS):
+    """Group the rows of a spreadsheet in blocks of chunk_rows rows, keeping only the columns read by an import.
+
+    If find_columns returns the positions of the columns for the first row, the first row is a header and it is skipped,
+    otherwise the columns are the default ones. The empty rows are skipped and the rows with an empty value in the columns
+    are rejected with missing_reason.
+
+    Args:
+        rows (iterable): tuples (row_number, row), see iter_rows().
+        find_columns (function): function returning the positions of the columns if the row is a header, otherwise None.
+        columns (tuple): positions of the columns if the first row is not a header.
+        missing_reason (str): reason of the rows with an empty value.
+        chunk_rows (int): rows of each block.
+
+    Return:
+        iterator of tuples (chunk, rejected): chunk (list) contains tuples (row_number, values of the columns...),
+        rejected (list) contains tuples (row_number, values of the columns or '', missing_reason) of the rows of the block.
+
+    Example:
+        >>> list(iter_row_chunks(iter_rows('nuovi_articoli.csv'), lambda row: None, (0,), 'Articolo mancante'))
+        [([(1, 'ARTICOLO'), (2, 'Z9035105')], [])]
+    """
+
+    chunk = []
+    rejected = []
+
+    for row_number, row in rows:
+        if row_number == 1:
+            header_columns = find_columns(row)
+            if header_columns is not None:  # Header.
+                columns = header_columns
+                continue
+
+        values = tuple(row[column] if column < len(row) else None for column in columns)
+        if None in values:
+            if any(value is not None for value in row):
+                rejected.append((row_number, *(value or '' for value in values), missing_reason))
+            continue  # Empty rows are skipped.
+
+        chunk.append((row_number, *values))
+        if len(chunk) == chunk_rows:
+            yield chunk, rejected
+            chunk, rejected = [], []
+
+    if chunk or rejected:
+        yield chunk, rejected
+
+def rejects_report_path(file_path: str) -> str:
+    """Return the path of the CSV report of the rejected rows of an import:
+    the same name of the spreadsheet with the suffix '_scartati', in the same folder.
+
+    Example:
+        >>> rejects_report_path('C:/Users/Lara/Desktop/area3.xlsx')
+        'C:/Users/Lara/Desktop/area3_scartati.csv'
+    """
+
+    return os.path.splitext(file_path)[0] + '_scartati.csv'
+
+def write_rejects(report_path: str, header: list, rejected: list):
+    """Write the rejected rows of an import in a CSV report, the report is not written if there are no rejected rows.
+
+    Args:
+        report_path (str): path of the CSV report, nothing is written if None.
+        header (list): names of the columns.
+        rejected (list): tuples (row_number, values..., reason).
+    """
+
+    if report_path is None or not rejected:
+        return
+
+    with open(report_path, 'w', newline='', encoding='utf-8') as report:
+        writer = csv.writer(report)
+        writer.writerow(header)
+        writer.writerows(rejected)
+
+def import_message(label: str, added: int, rejected: list, report_path: str) -> str:
+    """Return the message shown at the end of an import.
+
+    Example:
+        >>> import_message('Record importati', 2, [(4, '90351051', '2.5', "Quantita' non valida")], 'area3_scartati.csv')
+        "Record importati: 2.\nRighe scartate: 1 (dettaglio in area3_scartati.csv)."
+    """
+
+    message = label + ': ' + str(added) + '.'
+    if rejected:
+        message += '\nRighe scartate: ' + str(len(rejected)) + ' (dettaglio in ' + report_path + ').'
+    return message
@@ -0,0 +1,95 @@
+"""This module contains the SummaryPanel implementation, a class containing three labels with the totals of the inventory and a button.
+
+The labels show the number of records and pieces of the selected article, of the selected file and of all the files.
+The totals are kept updated by ArticlesManager, so the panel reads them every REFRESH_MS milliseconds and stays live while scanning.
+The button exports the report of the totals of each article in all the files.
+
+Dependencies:
+    tkinter
+    inventory_consolidation: the module containing the functions that consolidate all the files.
+    inventory_export: the module containing the export settings (export.ini).
+
+Example:
+    from summary_panel import SummaryPanel
+
+    app = tk.Tk()
+    obj = SummaryPanel(master_window = app)
+    obj.pack()
+    app.mainloop()
+"""
+
+import tkinter as tk
+from tkinter import messagebox
+from inventory_consolidation import export_consolidation, REPORT_NAME
+from inventory_export import read_settings
+
+REFRESH_MS = 500  # Milliseconds between two updates of the labels.
+
+class SummaryPanel (tk.Frame):
+    """SummaryPanel is a frame containing three labels with the totals of the inventory and a button.
+
+    Attributes:
+        label_article (tk.Label): label with the totals of the article in the entry of ArticlesCommandPanel.
+        label_file (tk.Label): label with the totals of the file selected in FilesCommandPanel.
+        label_all_files (tk.Label): label with the totals of all the files.
+        button_export_totals (tk.Button): button for exporting the totals of each article in all the files.
+    """
+
+    def __init__(self, master_window: tk.Tk):
+        """Initialize SummaryPanel with master_window.
+
+        Arg:
+            master_window (tk.Tk): master application.
+        """
+
+        tk.Frame.__init__(self, master=master_window, highlightbackground='black', highlightthickness=2)
+
+        self.master = master_window
+
+        self._frame_font = 'calibri 16'
+
+        for i in range(4):
+            self.columnconfigure(index=i, weight=1)
+        self.rowconfigure(index=0, weight=1)
+
+        self.label_article = tk.Label(master=self, font=self._frame_font)
+        self.label_article.grid(row=0, column=0, sticky='nswe')
+        self.label_file = tk.Label(master=self, font=self._frame_font)
+        self.label_file.grid(row=0, column=1, sticky='nswe')
+        self.label_all_files = tk.Label(master=self, font=self._frame_font)
+        self.label_all_files.grid(row=0, column=2, sticky='nswe')
+        self.button_export_totals = tk.Button(master=self, text='Esporta\nTotali', relief='solid', borderwidth=1, font=self._frame_font, command=self.export_totals)
+        self.button_export_totals.grid(row=0, column=3, sticky='nswe', padx=5, pady=5)
+
+        self.after(REFRESH_MS, self.refresh)
+
+    def refresh(self):
+        """Update the labels with the current totals, then schedule the next update."""
+
+        files_manager = self.master.files_manager
+        selected_file = self.master.files_command_panel.files_choice.get()
+        article = self.master.articles_command_panel.entry_art.get()
+
+        records, pieces = (0, 0)
+        if selected_file in files_manager.files:
+            records, pieces = files_manager.files[selected_file].get_article_totals(article)
+        self.label_article.config(text='Articolo\n' + str(records) + ' record, ' + str(pieces) + ' pz')
+
+        records, pieces = files_manager.get_file_totals(selected_file)
+        self.label_file.config(text='File\n' + str(records) + ' record, ' + str(pieces) + ' pz')
+
+        records, pieces = files_manager.get_totals()
+        self.label_all_files.config(text='Tutti i file\n' + str(records) + ' record, ' + str(pieces) + ' pz')
+
+        self.after(REFRESH_MS, self.refresh)
+
+    def export_totals(self):
+        """Export the report of the totals of each article in all the files, in the destination and format of export.ini."""
+
+        try:
+            dest_path, export_format = read_settings()  # Destination folder and format in export.ini.
+            articles = export_consolidation(self.master.files_manager, dest_path + REPORT_NAME, export_format)
+        except (ImportError, ValueError) as error:
+            messagebox.showerror(title='Errore!', message=str(error))
+        else:
+            messagebox.showinfo(title='Successo!', message='Totali esportati con successo (' + str(articles) + ' articoli).')
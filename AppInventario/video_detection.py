@@ -4,20 +4,42 @@ and inserting of detected data into FilesManager and ArticlesManager.
 
 This module is also valid for QRcodes.
 
+The frames are read and decoded by ScanPipeline in background threads: VideoDetection takes the results
+every POLL_MS milliseconds with after(), so the user interface is never blocked while scanning.
+With DECODE_WORKERS processes the frames are decoded by a DecodePool, created at the first detection and kept until close().
+The camera is a CameraSession configured by camera.ini: it is opened at the first detection and kept open until close(),
+so a new detection starts reading the frames immediately. With 'source' in camera.ini the frames are read from a video,
+a folder of images or generated labels (see frame_sources), so the detection can be tried without camera.
+
+In continuous mode (continuous_detection()) the camera stays open and the confirmed pairs are inserted without the popup:
+the records are inserted in the selected file in batches of BATCH_SIZE records (or every BATCH_MS milliseconds),
+a small window shows the number of records read and the last one, and the last record can be cancelled.
+
 Dependencies:
     cv2 (OpenCV): open source computer vision and machine learning software library.
-    pyzbar: library that reads one-dimensional barcodes using the zbar library.
+    scan_pipeline: ScanPipeline implementation.
+    frame_sources: the module containing the function that returns the source of the frames written in camera.ini.
+    camera_session: CameraSession implementation.
+    decode_pool: DecodePool implementation.
+    scan_consensus: RecentRecords implementation.
     tkinter
     check_values: module containing the implementation of functions that check the values of article, new article and quantity detected.
-    PIL (Python Imaging Library): library for opening, manipulating and saving many different image file formats.
 """
 
 import cv2
-from pyzbar import pyzbar
+from scan_pipeline import ScanPipeline
+from frame_sources import source_from_config
+from camera_session import CameraSession
+from decode_pool import DecodePool
+from scan_consensus import RecentRecords
 from check_values import *
 import tkinter as tk
 from tkinter import messagebox 
-from PIL import ImageGrab
+
+POLL_MS = 30  # Milliseconds between two checks of the results of the decoding.
+DECODE_WORKERS = None  # Processes decoding the frames: None for the number of processors less one, 0 to decode in a thread.
+BATCH_SIZE = 10  # Records read in continuous mode inserted together in the file.
+BATCH_MS = 2000  # Milliseconds after which the records read in continuous mode are inserted anyway.
 
 class VideoDetection:
     """VideoDetection is a class with four methods related to barcode decoding 
@@ -27,6 +49,11 @@ class VideoDetection:
         entry_art (None): in the methods it becomes an entry for manipulating the detected article.
         entry_qty (None): in the methods it becomes an entry for manipulating the detected quantity.
         popup (None): in the methods it becomes a tk.Toplevel.
+        recent_records (RecentRecords): pairs of codes inserted recently, ignored by the detection.
+        pipeline (ScanPipeline): threads reading and decoding the frames, None if the detection is not running.
+        decode_pool (DecodePool): pool of processes decoding the frames, None if DECODE_WORKERS is 0 or before the first detection.
+        camera (CameraSession): camera kept open between the detections (or another source of frames), None before the first detection.
+        tally (tk.Toplevel): window with the records read in continuous mode, None if the continuous mode is not running.
     """
 
     def __init__(self, master_window: tk.Tk):
@@ -41,27 +68,35 @@ class VideoDetection:
         self.entry_art = None 
         self.entry_qty = None
         self.popup = None
-        self.last_decoded_text = set()
+        self.recent_records = RecentRecords()  # Records inserted recently, not proposed again by the detection.
+        self.pipeline = None
+        self.decode_pool = None
+        self.camera = None
+        self._window_shown = False  # True when the window of the PC camera has been shown.
+        self._poll_id = None  # Id of the next poll_detection() scheduled with after(), cancelled when the detection stops.
+        self._batch_id = None  # Id of the next poll_batch() scheduled with after().
+
+        self.tally = None
+        self._continuous_file = None  # File receiving the records read in continuous mode.
+        self._batch = []  # Records read in continuous mode and not inserted yet.
+        self._session_records = []  # Records read in the continuous session, the last one can be cancelled.
+        self._tally_labels = {}
 
     def show_popup(self, decoded_text_list: list):
-        """When barcodes are detected, a tk.Toplevel with two entries and two buttons appears.
+        """When a pair of barcodes is confirmed, a tk.Toplevel with two entries and two buttons appears.
+
+        The article and the quantity are checked only here, once for each confirmed pair.
 
         Arg:
             decoded_text_list (list): list containing the article and the quantity to insert.
         """
 
-        if check_art(decoded_text_list[0]) == True and check_qty(decoded_text_list[1]) == True:
-            art = decoded_text_list[0]
-            qty = decoded_text_list[1]
-        elif check_art(decoded_text_list[1]) == True and check_qty(decoded_text_list[0]) == True:
-            qty = decoded_text_list[0]
-            art = decoded_text_list[1]
-        else:
+        record = split_record(decoded_text_list)
+        if record is None:
             messagebox.showerror(title='Errore!', message='Articolo e\o quantita\' non validi.')
+            self.video_detection()  # New detection.
             return
-
-        if set(decoded_text_list) == self.last_decoded_text:
-            messagebox.showwarning(title='Attenzione!', message='Record appena inserito.')
+        art, qty = record
 
         self.popup = tk.Toplevel()
         self.popup.title('Codici rilevati')
@@ -95,8 +130,6 @@ class VideoDetection:
         button_insert.grid(row=2, column=0, sticky='nswe')
         button_new_detection = tk.Button(self.popup, text='Nuova Lettura', font=font, command=lambda: [self.popup.destroy(), self.video_detection()])
         button_new_detection.grid(row=2, column=1, sticky='nswe')   
-                
-        self.popup.mainloop()
 
     def insert_video_record(self):
         """Insert article and quantity detected in the selected file."""
@@ -113,84 +146,254 @@ class VideoDetection:
 
             # Another check because the entries can be modified after detection.
             if check_art(art) == True and check_qty(qty) == True:
-                self.vd_master.master.files_manager.files[selected_file].insert_record((art, qty))
-                self.last_decoded_text = {art, qty}
+                self.vd_master.master.files_manager.insert_record(selected_file, (art, qty))
+                self.recent_records.add({art, qty})
             else:
                 messagebox.showerror(title = 'Errore!', message = 'Articolo e\o quantita\' non validi.')
             
             self.popup.destroy()
             self.video_detection()
 
-    def video_detection(self, debug: int=0) -> list:
-        """Detect barcodes from the PC camera and returns their decoded texts.
+    def video_detection(self, debug: int=0):
+        """Start the detection of barcodes from the PC camera, the decoded texts are shown by poll_detection().
+
+        The function returns immediately: the frames are read and decoded in background threads.
 
         Arg:
             debug (int): an integer used as a flag for debug purpose (default value: 0).
+        """
+
+        if self.pipeline is not None:  # The detection is already running.
+            return
+
+        if self.start_pipeline(continuous=False):
+            self._poll_id = self.vd_master.after(POLL_MS, self.poll_detection)
+
+    def start_pipeline(self, continuous: bool) -> bool:
+        """Create the camera session and the pool of processes at the first detection, then start a ScanPipeline.
+
+        Arg:
+            continuous (bool): True for the continuous mode.
 
         Return:
-            decoded_text_list (list): list containing the decoded texts of barcodes.
+            (bool): False if the camera cannot be configured or opened (an error is shown), otherwise True.
         """
 
-        screen = ImageGrab.grab()  # Capture the screen's contents as an image.
-        screen_width, screen_height = screen.size 
-
-        camera = cv2.VideoCapture(1, cv2.CAP_DSHOW)  # Open the PC camera.
-
-        # Loop over frames from the camera.
-        while True:
-          
-           _, frame = camera.read()  # Capture a frame from the camera.
-
-           if screen_height > screen_width:
-              frame = cv2.rotate(frame, cv2.ROTATE_90_CLOCKWISE)  # Rotation of the PC camera if the tablet is used in portrait mode.
-
-           gray_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)  # Convert the frame to grayscale.
-
-           decoded_info = pyzbar.decode(gray_frame)  # Detect and decode barcodes in the grayscale frame.
-
-           # For every decoded barcodes, put the rectangle in the frame.
-           # Then add the decoded text in a set.
-           decoded_text = set()
-           for code in decoded_info:
-                # Extract the bounding box coordinates and barcodes data. 
-                (x, y, w, h) = code.rect
-                data = code.data.decode("utf-8")
-                decoded_text.add(data)
-
-                # Put the decoded text on the frame.
-                font = cv2.FONT_HERSHEY_SIMPLEX
-                font_scale = 0.5
-                thickness = 1
-                text_size, _ = cv2.getTextSize(text=data, fontFace=font, fontScale=font_scale, thickness=thickness)
-                cv2.putText(
-                     img=frame, 
-                     text=data, 
-                     org=(x, y - text_size[1]), 
-                     fontFace=font, 
-                     fontScale=font_scale, 
-                     color=(0, 0, 255), 
-                     thickness=thickness,
-                     lineType=cv2.LINE_AA,
-                )
-
-                cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 0), 2)  # Draw the bounding box around the barcode on the frame.
-
-           cv2.imshow('Frame', frame)  # Show the frame with the detected barcodes.
-           
-           if len(decoded_text) == 2:
-               camera.release()  # Release the camera.
-               cv2.destroyAllWindows()  # Close the window.
-               decoded_text_list = list(decoded_text)
-               self.show_popup(decoded_text_list)
-
-           # Exit the loop if the user clicks the 'X' button at the top right of the PC camera window.
-           if cv2.waitKey(1) and cv2.getWindowProperty('Frame', cv2.WND_PROP_VISIBLE) < 1:
-               camera.release()
-               cv2.destroyAllWindows()
-               decoded_text_list = []
-               break
-
-        return decoded_text_list
-
-    
+        if self.camera is None:
+            try:
+                self.camera = source_from_config(registry=registry)
+            except ValueError as error:
+                messagebox.showerror(title='Errore!', message=str(error))
+                return False
+
+        if self.decode_pool is None and DECODE_WORKERS != 0:
+            self.decode_pool = DecodePool(workers=DECODE_WORKERS)
+
+        # Rotation of the PC camera if the tablet is used in portrait mode, read at each detection because the tablet can be turned.
+        if isinstance(self.camera, CameraSession):
+            self.camera.refresh_orientation(self.vd_master.winfo_screenheight() > self.vd_master.winfo_screenwidth())
+        pipeline = ScanPipeline(self.camera, pool=self.decode_pool, recent_records=self.recent_records, continuous=continuous)
+        if not pipeline.start():
+            messagebox.showerror(title='Errore!', message='Impossibile aprire la camera.')
+            return False
+
+        self.pipeline = pipeline
+        self._window_shown = False
+        return True
+
+    def continuous_detection(self):
+        """Start the detection in continuous mode: the camera stays open and the confirmed pairs are inserted in the selected file
+        without the popup, until the user clicks 'Termina'.
+        """
+
+        if self.pipeline is not None:  # The detection is already running.
+            return
+
+        selected_file = self.vd_master.master.files_command_panel.files_choice.get()
+        if selected_file not in self.vd_master.master.files_manager.files:
+            messagebox.showerror(title='Errore!', message='Seleziona un File esistente.')
+            return
+
+        if not self.start_pipeline(continuous=True):
+            return
+
+        self._continuous_file = selected_file
+        self._batch = []
+        self._session_records = []
+        self.show_tally()
+        self._poll_id = self.vd_master.after(POLL_MS, self.poll_detection)
+        self._batch_id = self.vd_master.after(BATCH_MS, self.poll_batch)
+
+    def show_tally(self):
+        """Show a tk.Toplevel with the number of records read in continuous mode, the last record and two buttons."""
+
+        self.tally = tk.Toplevel()
+        self.tally.title('Lettura continua: ' + self._continuous_file)
+        self.tally.geometry('600x300+200+200')
+        self.tally.resizable(False, False)  # Window size cannot be changed by the user.
+        self.tally.protocol('WM_DELETE_WINDOW', self.stop_detection)
+
+        font = 'calibri 20'
+
+        self.tally.rowconfigure(index=0, weight=1)
+        self.tally.rowconfigure(index=1, weight=1)
+        self.tally.rowconfigure(index=2, weight=1)
+        self.tally.rowconfigure(index=3, weight=1)
+        self.tally.columnconfigure(index=0, weight=1)
+        self.tally.columnconfigure(index=1, weight=1)
+
+        self._tally_labels = {
+            'count': tk.Label(self.tally, font=font),
+            'last': tk.Label(self.tally, font=font),
+            'status': tk.Label(self.tally, font=font, fg='red'),
+        }
+        for row, label in enumerate(self._tally_labels.values()):
+            label.grid(row=row, column=0, columnspan=2, sticky='nswe')
+
+        button_undo = tk.Button(self.tally, text='Annulla Ultimo', font=font, command=self.undo_last)
+        button_undo.grid(row=3, column=0, sticky='nswe')
+        button_stop = tk.Button(self.tally, text='Termina', font=font, command=self.stop_detection)
+        button_stop.grid(row=3, column=1, sticky='nswe')
+
+        self.update_tally()
+
+    def update_tally(self, status: str = ''):
+        """Update the window of the continuous mode with the number of records read and the last one.
+
+        Arg:
+            status (str): message shown under the last record (e.g. a pair discarded).
+        """
+
+        if self.tally is None:
+            return
+
+        self._tally_labels['count'].config(text='Record letti: ' + str(len(self._session_records)))
+        if self._session_records:
+            art, qty = self._session_records[-1]
+            self._tally_labels['last'].config(text='Ultimo: ' + art + ' - ' + qty)
+        else:
+            self._tally_labels['last'].config(text='Ultimo: -')
+        self._tally_labels['status'].config(text=status)
+
+    def accept_record(self, pair: frozenset):
+        """Add a pair confirmed in continuous mode to the records to insert, inserting them when they are BATCH_SIZE.
+
+        Arg:
+            pair (frozenset): codes confirmed by the detection.
+        """
+
+        record = split_record(list(pair))
+        if record is None:
+            self.update_tally('Scartato: ' + ' - '.join(sorted(pair)))
+            return
+
+        self._batch.append(record)
+        self._session_records.append(record)
+        self.update_tally()
+        if len(self._batch) >= BATCH_SIZE:
+            self.flush_records()
+
+    def flush_records(self):
+        """Insert the records read in continuous mode and not inserted yet in the file, with a single operation."""
+
+        if not self._batch:
+            return
+
+        if not self.vd_master.master.files_manager.insert_records_list(self._continuous_file, self._batch):
+            messagebox.showerror(title='Errore!', message='Il File ' + self._continuous_file + ' non esiste piu\'.')
+            self._session_records = self._session_records[:len(self._session_records) - len(self._batch)]
+        self._batch = []
+
+    def poll_batch(self):
+        """Insert the records read in continuous mode every BATCH_MS milliseconds, so they are not kept too long in memory."""
+
+        self._batch_id = None
+        if self.tally is None:
+            return
+
+        self.flush_records()
+        self._batch_id = self.vd_master.after(BATCH_MS, self.poll_batch)
+
+    def undo_last(self):
+        """Cancel the last record read in continuous mode, from the records to insert or from the file."""
+
+        if not self._session_records:
+            return
+
+        record = self._session_records.pop()
+        if self._batch and self._batch[-1] == record:
+            self._batch.pop()
+        else:
+            self.vd_master.master.files_manager.delete_qty(self._continuous_file, record)
+        self.recent_records.discard(set(record))  # The label can be read again.
+        self.update_tally('Annullato: ' + record[0] + ' - ' + record[1])
+
+    def stop_detection(self):
+        """Stop the threads of the detection and close the window of the camera (the camera stays open for the next detection).
+
+        In continuous mode the records not inserted yet are inserted and the window of the records read is closed.
+        The checks scheduled with after() are cancelled, so they do not run with the next detection.
+        """
+
+        for after_id in (self._poll_id, self._batch_id):
+            if after_id is not None:
+                self.vd_master.after_cancel(after_id)
+        self._poll_id = self._batch_id = None
+
+        if self.pipeline is not None:
+            self.pipeline.stop()
+            if self.pipeline.continuous:
+                for pair in self.pipeline.get_confirmed():  # Pairs confirmed after the last check.
+                    self.accept_record(pair)
+            self.pipeline = None
+        if self._window_shown:
+            cv2.destroyAllWindows()  # Close the window.
+            self._window_shown = False
+        if self.tally is not None:
+            self.flush_records()
+            self.tally.destroy()
+            self.tally = None
+            self._continuous_file = None
+
+    def close(self):
+        """Stop the detection, release the camera and stop the processes decoding the frames, called when the App is closed."""
+
+        self.stop_detection()
+        if self.camera is not None:
+            self.camera.release()
+            self.camera = None
+        if self.decode_pool is not None:
+            self.decode_pool.close()
+            self.decode_pool = None
+
+    def poll_detection(self):
+        """Show the last frame decoded with the detected barcodes, then schedule the next check.
+
+        When a pair of barcodes is confirmed by more frames the detection stops and the popup appears,
+        in continuous mode the pair is added to the records to insert and the detection goes on.
+        """
+
+        self._poll_id = None
+        if self.pipeline is None:
+            return
+
+        result = self.pipeline.get_result()
+        if result is not None:
+            frame, decoded_text = result
+            cv2.imshow('Frame', frame)  # Show the frame with the detected barcodes.
+            self._window_shown = True
+
+        for pair in self.pipeline.get_confirmed():
+            if self.pipeline.continuous:
+                self.accept_record(pair)
+            else:
+                self.stop_detection()
+                self.show_popup(list(pair))
+                return
+
+        # Stop if the user clicks the 'X' button at the top right of the PC camera window.
+        if self._window_shown and cv2.waitKey(1) and cv2.getWindowProperty('Frame', cv2.WND_PROP_VISIBLE) < 1:
+            self.stop_detection()
+            return
 
+        self._poll_id = self.vd_master.after(POLL_MS, self.poll_detection)